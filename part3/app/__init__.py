@@ -1,8 +1,14 @@
 from flask import Flask
 from flask_restx import Api
+from sqlalchemy import inspect
 
 # Import extensions
-from app.extensions import bcrypt, jwt, db
+from app.extensions import jwt, db, password_hasher, metrics
+from app.models.collection_version import CollectionVersion
+from app.models.review import Review
+from app.passwords import PasswordHasherBusy
+from app.services import facade
+from app.commands import register_commands
 
 # Import namespaces
 from app.api.v1.users import api as users_ns
@@ -10,15 +16,28 @@ from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
 from app.api.v1.reviews import api as reviews_ns
 from app.api.v1.auth import api as auth_ns
+from app.api.v1.export import api as export_ns
 
 def create_app(config_class="config.DevelopmentConfig"):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
     # Initialize extensions
-    bcrypt.init_app(app)
     jwt.init_app(app)
     db.init_app(app)
+    password_hasher.init_app(app)
+    metrics.init_app(app)
+    password_hasher.on_duration = metrics.observe_password_hash
+    facade.init_app(app)
+    register_commands(app)
+    # Databases created before collection versions and the review foreign
+    # key indexes existed get them; counters for tables without a row start
+    # at their next write
+    with app.app_context():
+        CollectionVersion.__table__.create(db.engine, checkfirst=True)
+        if inspect(db.engine).has_table(Review.__tablename__):
+            for index in Review.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
     
     api = Api(
         app,
@@ -28,11 +47,16 @@ def create_app(config_class="config.DevelopmentConfig"):
         doc='/api/v1/'  # Swagger UI at /api/v1/
     )
 
+    @api.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        return {'message': str(error)}, 503, {'Retry-After': '1'}
+
     # Register all namespaces
     api.add_namespace(users_ns, path='/api/v1/users')
     api.add_namespace(amenities_ns, path='/api/v1/amenities')
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
     api.add_namespace(auth_ns, path='/api/v1/auth')
+    api.add_namespace(export_ns, path='/api/v1/export')
 
     return app
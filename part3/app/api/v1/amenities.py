@@ -2,6 +2,14 @@ from flask_restx import Namespace, Resource, fields
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import facade
+from app.query_budget import query_budget
+from app.api.v1.batch import batch_items, batch_model, batch_response
+from app.api.v1.pagination import (ids_arg, list_parser, many_model, many_result, page_args,
+                                   page_model)
+from app.api.v1.conditional import conditional
+from app.api.v1.serializer import marshal_response, mask_header
+from app.api.v1.projection import (add_projection_arguments, nested_mask, parse_projection,
+                                   projection_mask, projection_parser)
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -10,14 +18,39 @@ amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Name of the amenity')
 })
 
+amenity_page_model = page_model(api, 'AmenityPage', amenity_model)
+amenity_many_model = many_model(api, 'AmenityMany', amenity_model)
+amenity_list_parser = add_projection_arguments(list_parser)
+
 
 @api.route('/')
 class AmenityList(Resource):
-    @api.marshal_list_with(amenity_model)
+    @conditional(facade.get_amenities_version)
+    @query_budget(2)
+    @api.expect(amenity_list_parser)
+    @mask_header
+    @api.response(200, 'A page, or {items, missing} with ?ids=', amenity_page_model)
+    @api.response(400, 'Invalid projection, pagination or ids arguments')
     def get(self):
-        """Get a list of all amenities"""
-        return facade.get_all_amenities()
+        """Get a page of amenities, or the amenities listed in ?ids="""
+        try:
+            args = amenity_list_parser.parse_args()
+            limit, cursor = page_args(args)
+            ids = ids_arg(args)
+            projection = parse_projection(args, amenity_model)
+            if ids is None:
+                body = facade.get_amenities_page(limit, cursor, profile=projection)
+                model = amenity_page_model
+            else:
+                body = many_result(ids, facade.get_many_amenities(ids, projection))
+                model = amenity_many_model
+        except ValueError as e:
+            api.abort(400, str(e))
+        mask = projection and nested_mask(model, 'items',
+                                          projection_mask(projection, amenity_model))
+        return marshal_response(body, model, mask=mask)
 
+    @query_budget(3)
     @api.expect(amenity_model)
     @api.marshal_with(amenity_model, code=201)
     @jwt_required()
@@ -33,18 +66,50 @@ class AmenityList(Resource):
             api.abort(400, str(e))
 
 
+amenity_batch_model = batch_model(api, 'AmenityBatch')
+
+
+@api.route('/batch')
+class AmenityBatch(Resource):
+    @query_budget(3)
+    @api.expect([amenity_model])
+    @api.marshal_with(amenity_batch_model, code=201)
+    @api.response(207, 'Some amenities were rejected', amenity_batch_model)
+    @api.response(400, 'Not a JSON array, or more than MAX_BATCH_SIZE items')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def post(self):
+        """Create many amenities at once"""
+        current_user = get_jwt_identity()
+        if not current_user.get('is_admin'):
+            api.abort(403, "Admin privileges required")
+        try:
+            items = batch_items(request.json)
+        except ValueError as e:
+            api.abort(400, str(e))
+        return batch_response(facade.create_amenities(items))
+
+
 @api.route('/<string:amenity_id>')
 @api.param('amenity_id', 'Amenity ID')
 @api.response(404, 'Amenity not found')
 class AmenityResource(Resource):
-    @api.marshal_with(amenity_model)
+    @query_budget(1)
+    @api.expect(projection_parser)
+    @mask_header
+    @api.response(200, 'Success', amenity_model)
+    @api.response(400, 'Invalid projection arguments')
     def get(self, amenity_id):
         """Get an amenity by ID"""
         try:
-            return facade.get_amenity(amenity_id)
+            projection = parse_projection(projection_parser.parse_args(), amenity_model)
+            amenity = facade.get_amenity(amenity_id, profile=projection)
         except ValueError as e:
-            api.abort(404, str(e))
+            api.abort(400, str(e))
+        return marshal_response(amenity, amenity_model,
+                                mask=projection and projection_mask(projection, amenity_model))
 
+    @query_budget(4)
     @api.expect(amenity_model)
     @jwt_required()
     def put(self, amenity_id):
@@ -58,6 +123,7 @@ class AmenityResource(Resource):
         except ValueError as e:
             api.abort(400, str(e))
 
+    @query_budget(6)
     @api.doc('delete_amenity')
     @api.response(204, 'Amenity successfully deleted')
     @jwt_required()
@@ -1,6 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token
 from app.services import facade
+from app.query_budget import query_budget
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -12,16 +13,15 @@ login_model = api.model('Login', {
 
 @api.route('/login')
 class Login(Resource):
+    @query_budget(4)
     @api.expect(login_model)
     def post(self):
         """Authenticate user and return a JWT token"""
         credentials = api.payload  # Get the email and password from the request payload
         
-        # Step 1: Retrieve the user based on the provided email
-        user = facade.get_user_by_email(credentials['email'])
-        
-        # Step 2: Check if the user exists and the password is correct
-        if not user or not user.verify_password(credentials['password']):
+        # Step 1 and 2: Retrieve the user by email and check the password
+        user = facade.authenticate(credentials['email'], credentials['password'])
+        if not user:
             return {'error': 'Invalid credentials'}, 401
 
         # Step 3: Create a JWT token with the user's id and is_admin flag
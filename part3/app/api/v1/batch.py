@@ -0,0 +1,36 @@
+from flask import current_app
+from flask_restx import fields
+
+
+def batch_model(api, name):
+    """Registers the {created, failed, results} envelope of a batch create."""
+    result = api.model(f'{name}Result', {
+        'index': fields.Integer(description='Position of the item in the request'),
+        'status': fields.Integer(description='201, or the HTTP status the item failed with'),
+        'id': fields.String(description='ID of the created object'),
+        'message': fields.String(description='Why the item was rejected'),
+    })
+    return api.model(name, {
+        'created': fields.Integer(description='Number of items created'),
+        'failed': fields.Integer(description='Number of items rejected'),
+        'results': fields.List(fields.Nested(result, skip_none=True)),
+    })
+
+
+def batch_items(payload):
+    """Checks a batch request body: a JSON array of 1..MAX_BATCH_SIZE items."""
+    limit = current_app.config['MAX_BATCH_SIZE']
+    if not isinstance(payload, list) or not payload:
+        raise ValueError("Expected a non-empty JSON array of items")
+    if len(payload) > limit:
+        raise ValueError(f"A batch holds at most {limit} items")
+    return payload
+
+
+def batch_response(results):
+    """(body, status) for per-item results: 201 when every item was created,
+    207 Multi-Status otherwise."""
+    results = [dict(result, index=index) for index, result in enumerate(results)]
+    created = sum(result['status'] == 201 for result in results)
+    body = {'created': created, 'failed': len(results) - created, 'results': results}
+    return body, 201 if created == len(results) else 207
@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import g, request
+from flask_restx.utils import unpack
+from werkzeug.http import http_date, quote_etag
+from werkzeug.wrappers import Response
+
+
+def make_etag(version):
+    """Strong ETag for a version tuple such as (id, updated_at)."""
+    return quote_etag(hashlib.sha1(repr(tuple(version)).encode()).hexdigest())
+
+
+def last_modified(version):
+    """Newest datetime in a version tuple, as an aware UTC second."""
+    stamps = [value for value in version if isinstance(value, datetime)]
+    if not stamps:
+        return None
+    return max(stamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def not_modified(etag, modified, if_none_match, if_modified_since):
+    """Whether a client's validators still match (RFC 9110 section 13.2.2).
+
+    `if_none_match` is a werkzeug ETags set and `if_modified_since` an aware
+    datetime or None. If-None-Match wins over If-Modified-Since when both
+    are sent.
+    """
+    if if_none_match:
+        return if_none_match.contains_weak(etag.strip('"'))
+    return (if_modified_since is not None and modified is not None
+            and modified <= if_modified_since)
+
+
+def is_fresh(etag, modified):
+    """not_modified() for the current Flask request."""
+    return not_modified(etag, modified, request.if_none_match, request.if_modified_since)
+
+
+def validators(version):
+    """(headers, fresh) for a version tuple: the ETag/Last-Modified headers
+    and whether the current request already holds that version."""
+    etag, modified = make_etag(version), last_modified(version)
+    headers = {'ETag': etag}
+    if modified is not None:
+        headers['Last-Modified'] = http_date(modified)
+    return headers, is_fresh(etag, modified)
+
+
+def conditional(version_of):
+    """Adds ETag/Last-Modified to a GET handler and answers 304 when fresh.
+
+    `version_of` receives the handler's URL arguments and returns a small
+    tuple read with a narrow SELECT, or None when the resource does not
+    exist, in which case the handler runs and reports the 404 itself.
+    Apply it above @api.marshal_with so a 304 skips loading and marshalling.
+    The version is left in `g.resource_version` for handlers caching by it.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            version = g.resource_version = version_of(**kwargs)
+            if version is None:
+                return func(*args, **kwargs)
+            headers, fresh = validators(version)
+            if fresh:
+                return Response(status=304, headers=headers)
+            rv = func(*args, **kwargs)
+            if isinstance(rv, Response):
+                rv.headers.update(headers)
+                return rv
+            data, code, extra = unpack(rv)
+            return data, code, {**headers, **dict(extra or {})}
+        return wrapper
+    return decorator
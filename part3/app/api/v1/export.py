@@ -0,0 +1,107 @@
+from flask import Response, current_app, stream_with_context
+from flask_restx import Namespace, Resource, fields, reqparse
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services import facade
+from app.api.v1.serializer import compile_model, dumps
+
+api = Namespace('export', description='Streaming dumps of whole collections')
+
+timestamps = {
+    'created_at': fields.DateTime(description='Creation time (UTC)'),
+    'updated_at': fields.DateTime(description='Last update time (UTC)')
+}
+
+user_export_model = api.model('UserExport', {
+    'id': fields.String,
+    'first_name': fields.String,
+    'last_name': fields.String,
+    'email': fields.String,
+    'is_admin': fields.Boolean,
+    **timestamps
+})
+
+amenity_export_model = api.model('AmenityExport', {
+    'id': fields.String,
+    'name': fields.String,
+    **timestamps
+})
+
+place_export_model = api.model('PlaceExport', {
+    'id': fields.String,
+    'title': fields.String,
+    'description': fields.String,
+    'price': fields.Float,
+    'latitude': fields.Float,
+    'longitude': fields.Float,
+    'owner_id': fields.String,
+    'amenity_ids': fields.List(fields.String(attribute='id'), attribute='amenities'),
+    **timestamps
+})
+
+review_export_model = api.model('ReviewExport', {
+    'id': fields.String,
+    'text': fields.String,
+    'rating': fields.Integer,
+    'user_id': fields.String,
+    'place_id': fields.String,
+    **timestamps
+})
+
+# collection name -> (facade stream method, output model)
+collections = {
+    'users': (facade.stream_users, user_export_model),
+    'amenities': (facade.stream_amenities, amenity_export_model),
+    'places': (facade.stream_places, place_export_model),
+    'reviews': (facade.stream_reviews, review_export_model),
+}
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument('format', type=str, location='args', default='ndjson',
+                           choices=('ndjson', 'json'),
+                           help='One JSON object per line, or a single JSON array')
+
+
+def encode(rows, model, batch_size, as_array):
+    """Serializes rows lazily, one chunk of output per fetched batch."""
+    serialize = compile_model(model)
+    chunk = [b'['] if as_array else []
+    separator = b',' if as_array else b'\n'
+    first = True
+    for row in rows:
+        line = dumps(serialize(row))
+        if as_array:
+            chunk.append(line if first else separator + line)
+        else:
+            chunk.append(line + separator)
+        first = False
+        if len(chunk) >= batch_size:
+            yield b''.join(chunk)
+            chunk = []
+    if as_array:
+        chunk.append(b']')
+    if chunk:
+        yield b''.join(chunk)
+
+
+@api.route('/<string:collection>')
+@api.param('collection', 'users, amenities, places or reviews')
+@api.response(403, 'Admin privileges required')
+@api.response(404, 'Unknown collection')
+class CollectionExport(Resource):
+    @api.expect(export_parser)
+    @api.produces(['application/x-ndjson', 'application/json'])
+    @jwt_required()
+    def get(self, collection):
+        """Stream every row of a collection, ordered by id"""
+        current_user = get_jwt_identity()
+        if not current_user.get('is_admin'):
+            api.abort(403, "Admin privileges required")
+        if collection not in collections:
+            api.abort(404, f"Unknown collection '{collection}'")
+
+        as_array = export_parser.parse_args()['format'] == 'json'
+        stream, model = collections[collection]
+        batch_size = current_app.config['EXPORT_BATCH_SIZE']
+        body = encode(stream(batch_size), model, batch_size, as_array)
+        return Response(stream_with_context(body),
+                        mimetype='application/json' if as_array else 'application/x-ndjson')
@@ -0,0 +1,76 @@
+from flask import current_app
+from flask_restx import fields, reqparse
+from app.persistence.repository import IN_CHUNK_SIZE
+
+# Query string shared by every list endpoint
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument('limit', type=int, location='args',
+                               help='Maximum number of items to return')
+pagination_parser.add_argument('cursor', type=str, location='args',
+                               help='Opaque cursor taken from a previous page')
+
+# Query string of the collection endpoints: a page, or the rows of ?ids=
+list_parser = pagination_parser.copy()
+list_parser.add_argument('ids', type=str, location='args',
+                         help='Comma-separated IDs to fetch, in this order, instead of a page')
+
+
+def page_model(api, name, item_model, extra_fields=None):
+    """Registers the {items, next_cursor} envelope for `item_model`."""
+    return api.model(name, {
+        'items': fields.List(fields.Nested(item_model)),
+        'next_cursor': fields.String(description='Cursor for the next page, null on the last page'),
+        **(extra_fields or {})
+    })
+
+
+def many_model(api, name, item_model):
+    """Registers the {items, missing} envelope answering an ?ids= lookup."""
+    return api.model(name, {
+        'items': fields.List(fields.Nested(item_model),
+                             description='Items found, in request order'),
+        'missing': fields.List(fields.String, description='Requested IDs that do not exist'),
+    })
+
+
+def many_result(ids, found):
+    """Body of an ?ids= lookup from get_many()'s one-entry-per-id list."""
+    return {'items': [obj for obj in found if obj is not None],
+            'missing': [obj_id for obj_id, obj in zip(ids, found) if obj is None]}
+
+
+def ids_arg(args):
+    """The ?ids= list of a collection request, or None without one.
+
+    At most one IN chunk of ids is accepted, so a lookup runs one query per
+    relation however many ids it names and fits the endpoint's budget.
+    """
+    if args.get('ids') is None:
+        return None
+    ids = split_ids(args['ids'])
+    limit = min(current_app.config['MAX_BATCH_SIZE'], IN_CHUNK_SIZE)
+    if not ids:
+        raise ValueError("ids must list at least one ID")
+    if len(ids) > limit:
+        raise ValueError(f"ids accepts at most {limit} IDs")
+    return ids
+
+
+def split_ids(value):
+    """Parses a comma-separated id list, ignoring blanks and duplicates."""
+    ids = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if part and part not in ids:
+            ids.append(part)
+    return ids
+
+
+def page_args(args):
+    """Extracts a clamped (limit, cursor) pair from parsed query arguments."""
+    limit = args.get('limit')
+    if limit is None:
+        limit = current_app.config['DEFAULT_PAGE_SIZE']
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, current_app.config['MAX_PAGE_SIZE']), args.get('cursor')
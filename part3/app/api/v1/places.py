@@ -1,7 +1,17 @@
-from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask_restx import Namespace, Resource, fields, reqparse
+from flask import current_app, g, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import facade
+from app.services.facade import batch_failed
+from app.query_budget import query_budget
+from app.api.v1.batch import batch_items, batch_model, batch_response
+from app.api.v1.pagination import (ids_arg, list_parser, many_model, many_result, page_args,
+                                   page_model, pagination_parser, split_ids)
+from app.api.v1.conditional import conditional
+from app.api.v1.serializer import (compile_model, json_response, marshal_response, mask_header,
+                                   request_mask)
+from app.api.v1.projection import (add_projection_arguments, nested_mask, parse_projection,
+                                   projection_mask, projection_parser)
 
 api = Namespace('places', description='Place operations')
 
@@ -45,19 +55,138 @@ place_output_model = api.model('Place', {
     'latitude': fields.Float(description='Latitude of the place'),
     'longitude': fields.Float(description='Longitude of the place'),
     'owner_id': fields.String(description='ID of the owner'),
+    'review_count': fields.Integer(description='Number of reviews'),
+    'average_rating': fields.Float(description='Mean rating, null without reviews'),
+    'rating_histogram': fields.List(fields.Integer, description='Number of 1..5 star reviews'),
     'owner': fields.Nested(user_model),
     'amenities': fields.List(fields.Nested(amenity_model)),
     'reviews': fields.List(fields.Nested(review_model))
 })
 
+# Nested fields of place_output_model that ?expand controls
+PLACE_RELATIONS = ('owner', 'amenities', 'reviews')
+
+facet_model = api.model('AmenityFacet', {
+    'amenity_id': fields.String(description='Amenity ID'),
+    'count': fields.Integer(description='Places with this amenity among the amenity-filtered set')
+})
+
+place_page_model = page_model(api, 'PlacePage', place_output_model, {
+    'facets': fields.List(fields.Nested(facet_model))
+})
+
+place_many_model = many_model(api, 'PlaceMany', place_output_model)
+
+place_list_parser = add_projection_arguments(list_parser)
+place_list_parser.add_argument('min_price', type=float, location='args',
+                               help='Only places costing at least this per night')
+place_list_parser.add_argument('max_price', type=float, location='args',
+                               help='Only places costing at most this per night')
+place_list_parser.add_argument('min_rating', type=float, location='args',
+                               help='Only places whose average rating is at least this')
+place_list_parser.add_argument('sort', type=str, location='args', default='created_at',
+                               choices=('created_at', '-created_at', 'price', '-price', 'rating'),
+                               help='Sort order; rating lists the best rated places first')
+place_list_parser.add_argument('amenities', type=str, location='args',
+                               help='Comma-separated amenity IDs the places must offer')
+place_list_parser.add_argument('amenities_mode', type=str, location='args', default='all',
+                               choices=('all', 'any'),
+                               help='Require all of the amenities or any of them')
+
+cache_stats_model = api.model('PlaceCacheStats', {
+    'size': fields.Integer(description='Entries currently cached'),
+    'maxsize': fields.Integer(description='Maximum number of entries'),
+    'ttl': fields.Integer(description='Entry lifetime in seconds'),
+    'hits': fields.Integer(description='Lookups served from the cache'),
+    'misses': fields.Integer(description='Lookups that went to the database'),
+    'evictions': fields.Integer(description='Entries dropped to stay within maxsize'),
+    'hit_ratio': fields.Float(description='hits / (hits + misses)')
+})
+
+nearby_model = api.model('PlaceNearby', {
+    'distance_km': fields.Float(description='Great-circle distance from the query point'),
+    'place': fields.Nested(place_output_model)
+})
+
+nearby_parser = add_projection_arguments(reqparse.RequestParser())
+nearby_parser.add_argument('lat', type=float, location='args', required=True,
+                           help='Latitude of the query point')
+nearby_parser.add_argument('lon', type=float, location='args', required=True,
+                           help='Longitude of the query point')
+nearby_parser.add_argument('k', type=int, location='args', default=10,
+                           help='Number of places to return')
+nearby_parser.add_argument('max_km', type=float, location='args',
+                           help='Ignore places further away than this')
+
+search_hit_model = api.inherit('PlaceSearchHit', place_output_model, {
+    'score': fields.Float(description='Relevance of a text match, higher is better'),
+    'snippet': fields.String(description='Matching text with <mark> highlights (not HTML-escaped)')
+})
+search_page_model = page_model(api, 'PlaceSearchPage', search_hit_model)
+
+search_parser = add_projection_arguments(pagination_parser)
+search_parser.add_argument('q', type=str, location='args',
+                           help='Free text matched against titles and descriptions')
+search_parser.add_argument('bbox', type=str, location='args',
+                           help='Bounding box as minLat,minLon,maxLat,maxLon')
+
+
+def parse_bbox(value):
+    """Parses 'minLat,minLon,maxLat,maxLon' into a validated tuple of floats."""
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError("bbox must be four numbers: minLat,minLon,maxLat,maxLon")
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox latitudes must satisfy -90 <= minLat <= maxLat <= 90")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError("bbox longitudes must be between -180 and 180")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def place_projection(args, model=place_output_model):
+    """(profile, mask) for a place resource: the card profile and no mask
+    unless ?fields or ?expand narrow the output."""
+    projection = parse_projection(args, model, PLACE_RELATIONS)
+    if projection is None:
+        return 'place_card', None
+    return projection, projection_mask(projection, model, PLACE_RELATIONS)
+
 
 @api.route('/')
 class PlaceList(Resource):
-    @api.marshal_list_with(place_output_model)
+    @conditional(facade.get_places_version)
+    @query_budget(5)
+    @api.expect(place_list_parser)
+    @mask_header
+    @api.response(200, 'A page, or {items, missing} with ?ids=', place_page_model)
+    @api.response(400, 'Invalid filter, projection, pagination or ids arguments')
     def get(self):
-        """Retrieve a list of all places"""
-        return facade.get_all_places()
+        """Retrieve a page of places, optionally filtered by price and amenities,
+        or the places listed in ?ids="""
+        try:
+            args = place_list_parser.parse_args()
+            limit, cursor = page_args(args)
+            ids = ids_arg(args)
+            profile, mask = place_projection(args)
+            if ids is not None:
+                places = facade.get_many_places(ids, profile)
+                return marshal_response(many_result(ids, places), place_many_model,
+                                        mask=mask and nested_mask(place_many_model, 'items', mask))
+            page = facade.get_places_page(limit, cursor, profile=profile,
+                                          min_price=args['min_price'],
+                                          max_price=args['max_price'],
+                                          min_rating=args['min_rating'],
+                                          sort=args['sort'],
+                                          amenity_ids=split_ids(args['amenities']),
+                                          amenity_mode=args['amenities_mode'],
+                                          places_version=g.resource_version)
+        except ValueError as e:
+            api.abort(400, str(e))
+        return marshal_response(page, place_page_model,
+                                mask=mask and nested_mask(place_page_model, 'items', mask))
 
+    @query_budget(9)
     @api.expect(place_input_model)
     @api.marshal_with(place_output_model, code=201)
     @api.response(400, 'Invalid input data')
@@ -76,18 +205,140 @@ class PlaceList(Resource):
             api.abort(400, str(e))
 
 
+place_batch_model = batch_model(api, 'PlaceBatch')
+
+
+@api.route('/batch')
+class PlaceBatch(Resource):
+    @query_budget(6)
+    @api.expect([place_input_model])
+    @api.marshal_with(place_batch_model, code=201)
+    @api.response(207, 'Some places were rejected', place_batch_model)
+    @api.response(400, 'Not a JSON array, or more than MAX_BATCH_SIZE items')
+    @jwt_required()
+    def post(self):
+        """Register many places in one transaction"""
+        current_user = get_jwt_identity()
+        try:
+            items = batch_items(request.json)
+        except ValueError as e:
+            api.abort(400, str(e))
+        forbidden = set()
+        if not current_user.get('is_admin', False):
+            forbidden = {index for index, item in enumerate(items)
+                         if isinstance(item, dict) and item.get('owner_id') != current_user['id']}
+        created = iter(facade.create_places(
+            [item for index, item in enumerate(items) if index not in forbidden]))
+        return batch_response([
+            batch_failed(403, "Unauthorized action: owner_id must match authenticated user")
+            if index in forbidden else next(created) for index in range(len(items))])
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @query_budget(3)
+    @api.expect(search_parser)
+    @mask_header
+    @api.response(200, 'Success', search_page_model)
+    @api.response(400, 'Invalid search arguments')
+    def get(self):
+        """Search places by text and/or map viewport"""
+        try:
+            args = search_parser.parse_args()
+            if not args['q'] and not args['bbox']:
+                raise ValueError("Provide q, bbox or both")
+            limit, cursor = page_args(args)
+            bbox = parse_bbox(args['bbox']) if args['bbox'] else None
+            profile, mask = place_projection(args, search_hit_model)
+            page = facade.search_places(limit, cursor, text_query=args['q'], bbox=bbox,
+                                        profile=profile)
+        except ValueError as e:
+            api.abort(400, str(e))
+        return marshal_response(page, search_page_model,
+                                mask=mask and nested_mask(search_page_model, 'items', mask))
+
+
+@api.route('/nearby')
+class PlaceNearby(Resource):
+    @query_budget(5)
+    @api.expect(nearby_parser)
+    @mask_header
+    @api.response(200, 'Success', [nearby_model])
+    @api.response(400, 'Invalid query point')
+    def get(self):
+        """Find the places closest to a point"""
+        try:
+            args = nearby_parser.parse_args()
+            if not (-90 <= args['lat'] <= 90 and -180 <= args['lon'] <= 180):
+                raise ValueError("lat must be between -90 and 90 and lon between -180 and 180")
+            if args['k'] < 1:
+                raise ValueError("k must be a positive integer")
+            if args['max_km'] is not None and args['max_km'] < 0:
+                raise ValueError("max_km cannot be negative")
+            k = min(args['k'], current_app.config['MAX_PAGE_SIZE'])
+            profile, mask = place_projection(args)
+            hits = facade.get_nearby_places(args['lat'], args['lon'], k, args['max_km'],
+                                            profile=profile)
+        except ValueError as e:
+            api.abort(400, str(e))
+        nearby = [{'place': place, 'distance_km': distance} for place, distance in hits]
+        return marshal_response(nearby, nearby_model,
+                                mask=mask and nested_mask(nearby_model, 'place', mask))
+
+
+@api.route('/cache-stats')
+class PlaceCacheStats(Resource):
+    @api.marshal_with(cache_stats_model)
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def get(self):
+        """Hit/miss counters of the place detail cache"""
+        current_user = get_jwt_identity()
+        if not current_user.get('is_admin'):
+            api.abort(403, "Admin privileges required")
+        return facade.get_place_cache_stats()
+
+
+serialize_place = compile_model(place_output_model)
+
+
 @api.route('/<string:place_id>')
 @api.param('place_id', 'Place ID')
 @api.response(404, 'Place not found')
 class PlaceResource(Resource):
-    @api.marshal_with(place_output_model)
+    @conditional(facade.get_place_version)
+    @query_budget(3)
+    @api.expect(projection_parser)
+    @mask_header
+    @api.response(200, 'Success', place_output_model)
+    @api.response(400, 'Invalid projection arguments')
     def get(self, place_id):
         """Get place details by ID"""
         try:
-            return facade.get_place(place_id)
+            projection = parse_projection(projection_parser.parse_args(),
+                                          place_output_model, PLACE_RELATIONS)
         except ValueError as e:
-            api.abort(404, str(e))
+            api.abort(400, str(e))
+        header_mask = request_mask() if projection is None else None
+        if projection is None and header_mask is None:
+            # Only the full document goes through the detail cache
+            document = facade.get_place_document(place_id, serialize_place,
+                                                 g.resource_version)
+        elif projection is None:
+            place = facade.get_place(place_id, profile='place_detail')
+            document = place and compile_model(place_output_model, header_mask)(place)
+        else:
+            place = facade.get_place(place_id, profile=projection)
+            mask = projection_mask(projection, place_output_model, PLACE_RELATIONS)
+            document = place and compile_model(place_output_model, mask)(place)
+        if document is None:
+            api.abort(404, "Place not found")
+        response = json_response(document)
+        if projection is None:
+            response.vary.add(current_app.config['RESTX_MASK_HEADER'])
+        return response
 
+    @query_budget(9)
     @api.expect(place_input_model)
     @api.response(200, 'Place updated successfully')
     @api.response(400, 'Invalid input data')
@@ -98,14 +349,18 @@ class PlaceResource(Resource):
             current_user = get_jwt_identity()
             is_admin = current_user.get('is_admin', False)
 
-            place = facade.get_place(place_id)
-            if not is_admin and place['owner_id'] != current_user['id']:
-                api.abort(403, "Unauthorized action: You can only update your own places")
+            if not is_admin:
+                owner_id = facade.get_place_owner(place_id)
+                if owner_id is None:
+                    api.abort(404, "Place not found")
+                if owner_id != current_user['id']:
+                    api.abort(403, "Unauthorized action: You can only update your own places")
             place_data = request.json
             return facade.update_place(place_id, place_data)
         except ValueError as e:
             api.abort(400, str(e))
 
+    @query_budget(7)
     @api.doc('delete_place')
     @api.response(204, 'Place successfully deleted')
     @jwt_required()
@@ -115,9 +370,12 @@ class PlaceResource(Resource):
             current_user = get_jwt_identity()
             is_admin = current_user.get('is_admin', False)
 
-            place = facade.get_place(place_id)
-            if not is_admin and place['owner_id'] != current_user['id']:
-                api.abort(403, "Unauthorized action: You can only delete your own places")
+            if not is_admin:
+                owner_id = facade.get_place_owner(place_id)
+                if owner_id is None:
+                    api.abort(404, "Place not found")
+                if owner_id != current_user['id']:
+                    api.abort(403, "Unauthorized action: You can only delete your own places")
 
             facade.delete_place(place_id)
             return '', 204
@@ -128,11 +386,14 @@ class PlaceResource(Resource):
 @api.param('place_id', 'Place ID')
 @api.response(404, 'Place not found')
 class PlaceReviewList(Resource):
-    @api.marshal_list_with(review_model)
+    @query_budget(2)
+    @mask_header
+    @api.response(200, 'Success', [review_model])
     def get(self, place_id):
         """Get all reviews for a specific place"""
         try:
-            return facade.get_reviews_by_place(place_id)
+            reviews = facade.get_reviews_by_place(place_id)
         except ValueError as e:
             api.abort(404, str(e))
+        return marshal_response(reviews, review_model)
 
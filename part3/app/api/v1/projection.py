@@ -0,0 +1,63 @@
+from flask_restx import reqparse
+from app.api.v1.pagination import split_ids
+from app.persistence.projection import Projection
+
+
+def add_projection_arguments(parser):
+    """Returns a copy of `parser` that also accepts ?fields and ?expand."""
+    parser = parser.copy()
+    parser.add_argument('fields', type=str, location='args',
+                        help='Comma-separated fields to return, e.g. id,title,price')
+    parser.add_argument('expand', type=str, location='args',
+                        help='Comma-separated relationships to embed, e.g. owner,amenities')
+    return parser
+
+
+# Query string of the single-item endpoints
+projection_parser = add_projection_arguments(reqparse.RequestParser())
+
+
+def parse_projection(args, model, relations=()):
+    """Validates ?fields / ?expand against `model` and builds a Projection.
+
+    Returns None when neither is given, so callers keep their default,
+    fully embedded output. A relationship named in `fields` is expanded;
+    otherwise only the relationships listed in `expand` are. The id is
+    always returned. Fields inherited from parent models (api.inherit)
+    count as the model's own.
+    """
+    if args.get('fields') is None and args.get('expand') is None:
+        return None
+    expand = split_ids(args.get('expand'))
+    for name in expand:
+        if name not in relations:
+            raise ValueError(f"Cannot expand '{name}'")
+    if args.get('fields') is None:
+        return Projection(None, expand)
+
+    known = model.resolved
+    fields = split_ids(args['fields'])
+    for name in fields:
+        if name not in known:
+            raise ValueError(f"Unknown field '{name}'")
+    expand += [name for name in fields if name in relations and name not in expand]
+    scalars = [name for name in fields if name not in relations]
+    if 'id' in known and 'id' not in scalars:
+        scalars.insert(0, 'id')
+    return Projection(scalars, expand)
+
+
+def projection_mask(projection, model, relations=()):
+    """flask-restx mask string keeping only the projected keys of `model`."""
+    if projection.fields is None:
+        keys = [name for name in model.resolved if name not in relations]
+    else:
+        keys = list(projection.fields)
+    return ','.join(keys + list(projection.expand))
+
+
+def nested_mask(model, key, item_mask):
+    """Mask applying `item_mask` to model[key] and keeping the other keys,
+    e.g. the items of a page envelope."""
+    return ','.join(f'{name}{{{item_mask}}}' if name == key else name
+                    for name in model.resolved)
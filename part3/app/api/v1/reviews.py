@@ -2,6 +2,14 @@ from flask_restx import Namespace, Resource, fields
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import facade
+from app.query_budget import query_budget
+from app.api.v1.batch import batch_items, batch_model, batch_response
+from app.api.v1.pagination import (ids_arg, list_parser, many_model, many_result, page_args,
+                                   page_model)
+from app.api.v1.conditional import conditional
+from app.api.v1.serializer import marshal_response, mask_header
+from app.api.v1.projection import (add_projection_arguments, nested_mask, parse_projection,
+                                   projection_mask, projection_parser)
 
 api = Namespace('reviews', description='Review operations')
 
@@ -14,14 +22,40 @@ review_model = api.model('Review', {
     'place_id': fields.String(required=True, description='ID of the place')
 })
 
+review_page_model = page_model(api, 'ReviewPage', review_model)
+review_many_model = many_model(api, 'ReviewMany', review_model)
+review_list_parser = add_projection_arguments(list_parser)
+
 
 @api.route('/')
 class ReviewList(Resource):
-    @api.marshal_list_with(review_model)
+    @conditional(facade.get_reviews_version)
+    @query_budget(2)
+    @api.expect(review_list_parser)
+    @mask_header
+    @api.response(200, 'A page, or {items, missing} with ?ids=', review_page_model)
+    @api.response(400, 'Invalid projection, pagination or ids arguments')
     def get(self):
-        """Retrieve a list of all reviews"""
-        return facade.get_all_reviews()
+        """Retrieve a page of reviews, or the reviews listed in ?ids="""
+        try:
+            args = review_list_parser.parse_args()
+            limit, cursor = page_args(args)
+            ids = ids_arg(args)
+            projection = parse_projection(args, review_model)
+            profile = projection or 'review_summary'
+            if ids is None:
+                body = facade.get_reviews_page(limit, cursor, profile=profile)
+                model = review_page_model
+            else:
+                body = many_result(ids, facade.get_many_reviews(ids, profile))
+                model = review_many_model
+        except ValueError as e:
+            api.abort(400, str(e))
+        mask = projection and nested_mask(model, 'items',
+                                          projection_mask(projection, review_model))
+        return marshal_response(body, model, mask=mask)
 
+    @query_budget(6)
     @api.expect(review_model)
     @api.marshal_with(review_model, code=201)
     @api.response(400, 'Invalid input data')
@@ -34,18 +68,46 @@ class ReviewList(Resource):
             api.abort(400, str(e))
 
 
+review_batch_model = batch_model(api, 'ReviewBatch')
+
+
+@api.route('/batch')
+class ReviewBatch(Resource):
+    @query_budget(6)
+    @api.expect([review_model])
+    @api.marshal_with(review_batch_model, code=201)
+    @api.response(207, 'Some reviews were rejected', review_batch_model)
+    @api.response(400, 'Not a JSON array, or more than MAX_BATCH_SIZE items')
+    def post(self):
+        """Register many reviews in one transaction"""
+        try:
+            items = batch_items(request.json)
+        except ValueError as e:
+            api.abort(400, str(e))
+        return batch_response(facade.create_reviews(items))
+
+
 @api.route('/<string:review_id>')
 @api.param('review_id', 'Review ID')
 @api.response(404, 'Review not found')
 class ReviewResource(Resource):
-    @api.marshal_with(review_model)
+    @conditional(facade.get_review_version)
+    @query_budget(2)
+    @api.expect(projection_parser)
+    @mask_header
+    @api.response(200, 'Success', review_model)
+    @api.response(400, 'Invalid projection arguments')
     def get(self, review_id):
         """Get review details by ID"""
         try:
-            return facade.get_review(review_id)
+            projection = parse_projection(projection_parser.parse_args(), review_model)
+            review = facade.get_review(review_id, profile=projection or 'review_summary')
         except ValueError as e:
-            api.abort(404, str(e))
+            api.abort(400, str(e))
+        return marshal_response(review, review_model,
+                                mask=projection and projection_mask(projection, review_model))
 
+    @query_budget(7)
     @api.expect(review_model)
     @api.response(200, 'Review updated successfully')
     @api.response(400, 'Invalid input data')
@@ -56,14 +118,18 @@ class ReviewResource(Resource):
             current_user = get_jwt_identity()
             is_admin = current_user.get('is_admin', False)
 
-            review = facade.get_review(review_id)
-            if not is_admin and review['user_id'] != current_user['id']:
-                api.abort(403, "Unauthorized action: You can only update your own reviews")
+            if not is_admin:
+                author_id = facade.get_review_author(review_id)
+                if author_id is None:
+                    api.abort(404, "Review not found")
+                if author_id != current_user['id']:
+                    api.abort(403, "Unauthorized action: You can only update your own reviews")
             review_data = request.json
             return facade.update_review(review_id, review_data)
         except ValueError as e:
             api.abort(400, str(e))
 
+    @query_budget(5)
     @api.response(200, 'Review deleted successfully')
     @jwt_required()
     def delete(self, review_id):
@@ -72,9 +138,12 @@ class ReviewResource(Resource):
             current_user = get_jwt_identity()
             is_admin = current_user.get('is_admin', False)
 
-            review = facade.get_review(review_id)
-            if not is_admin and review['user_id'] != current_user['id']:
-                api.abort(403, "Unauthorized action: You can only delete your own reviews")
+            if not is_admin:
+                author_id = facade.get_review_author(review_id)
+                if author_id is None:
+                    api.abort(404, "Review not found")
+                if author_id != current_user['id']:
+                    api.abort(403, "Unauthorized action: You can only delete your own reviews")
             return facade.delete_review(review_id)
         except ValueError as e:
             api.abort(404, str(e))
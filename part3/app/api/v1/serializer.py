@@ -0,0 +1,202 @@
+import orjson
+from flask import current_app, request
+from flask_restx import fields
+from flask_restx.mask import Mask
+from flask_restx.utils import merge
+
+from app.services.cache import LRUCache
+
+# Field types with a compiled formatter: value -> expression on `v{n}`
+SCALAR_FORMATS = {
+    fields.String: 'str({})',
+    fields.Integer: 'int({})',
+    fields.Float: 'float({})',
+    fields.Boolean: 'bool({})',
+}
+
+# Compiled functions are kept per (model, canonical mask); masks come from
+# clients (?fields/?expand and the X-Fields header), so the number of
+# distinct keys is bounded here
+COMPILED_CACHE_SIZE = 256
+
+_compiled = LRUCache(maxsize=COMPILED_CACHE_SIZE, ttl=float('inf'))
+
+
+class _DictView:
+    """Attribute access over a dict, so compiled code reads dicts like objects."""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return self.data.get(name)
+
+
+def _resolved(model):
+    return model.resolved if hasattr(model, 'resolved') else model
+
+
+def _scalar_format(field):
+    """Format string for a field type compiled inline, or None."""
+    if type(field) in SCALAR_FORMATS:
+        return SCALAR_FORMATS[type(field)]
+    if type(field) is fields.DateTime and field.dt_format == 'iso8601':
+        return '{}.isoformat()'
+    return None
+
+
+def _plain_attribute(field, name):
+    """Attribute name the field reads, or None when only restx can resolve it."""
+    attribute = name if field.attribute is None else field.attribute
+    if not isinstance(attribute, str) or '.' in attribute:
+        return None
+    return attribute
+
+
+def compile_model(model, mask=None):
+    """Returns a function turning an object (or dict) into the dict that
+    flask_restx.marshal(obj, model, mask=mask) would build.
+
+    The function is generated once per (model, mask) and kept in a bounded
+    LRU cache: every field becomes a plain getattr plus an inline
+    conversion, nested models become calls to their own compiled functions.
+    Field types without a compiled form fall back to the field's own
+    output(). Masks naming the same fields in another order or more than
+    once share one function.
+    """
+    if isinstance(mask, str):
+        mask = Mask(mask) if mask else None
+    key = (id(model), _mask_key(mask) if mask else None)
+    entry = _compiled.get(key)
+    # The model is kept with its function, so its id cannot be reused
+    # while the entry lives
+    if entry is None or entry[0] is not model:
+        entry = (model, _generate(model, mask))
+        _compiled.set(key, entry)
+    return entry[1]
+
+
+def _mask_key(mask):
+    """Canonical form of a mask: its fields sorted, nested masks likewise."""
+    return tuple(sorted((name, _mask_key(value) if isinstance(value, Mask) else None)
+                        for name, value in mask.items()))
+
+
+def _generate(model, mask):
+    env = {'_DictView': _DictView}
+    body, keys = [], []
+
+    def constant(value):
+        name = f'_c{len(env)}'
+        env[name] = value
+        return name
+
+    for n, (name, field) in enumerate(_resolved(model).items()):
+        if mask is not None and name not in mask:
+            continue
+        if isinstance(field, type):
+            field = field()
+        submask = mask[name] if mask is not None and isinstance(mask[name], Mask) else None
+        attribute = _plain_attribute(field, name)
+        value = f'v{n}'
+        keys.append(f'{name!r}: {value}')
+        if attribute is None:
+            body.append(f'{value} = {constant(field)}.output({name!r}, source)')
+            continue
+        body.append(f'{value} = getattr(obj, {attribute!r}, None)')
+        expression = _field_expression(field, value, submask, constant)
+        if expression is None:
+            body.append(f'{value} = {constant(field)}.output({name!r}, source)')
+        else:
+            body.append(f'{value} = {expression}')
+
+    source = '\n'.join([
+        'def serialize(source):',
+        '    obj = _DictView(source) if source.__class__ is dict else source',
+        *(f'    {line}' for line in body),
+        f"    return {{{', '.join(keys)}}}",
+    ])
+    exec(compile(source, f'<serializer {getattr(model, "name", "model")}>', 'exec'), env)
+    return env['serialize']
+
+
+def _field_expression(field, value, submask, constant):
+    """Expression formatting `value` like field.output() would, or None."""
+    if isinstance(field, fields.Nested):
+        nested = constant(compile_model(field.nested, submask))
+        if field.allow_null:
+            return f'None if {value} is None else {nested}({value})'
+        if field.default is not None:
+            return f'{constant(field.default)} if {value} is None else {nested}({value})'
+        return f'{nested}({value})'
+
+    if isinstance(field, fields.List):
+        item = _item_expression(field.container, submask, constant)
+        if item is None or field.default is not None:
+            return None
+        return f'None if {value} is None else [{item} for item in {value}]'
+
+    formatter = _scalar_format(field)
+    if formatter is None:
+        return None
+    default = field.default
+    fallback = constant(field.format(default) if default else default)
+    return f'{fallback} if {value} is None else {formatter.format(value)}'
+
+
+def _item_expression(container, submask, constant):
+    if isinstance(container, fields.Nested):
+        return f'{constant(compile_model(container.nested, submask))}(item)'
+    formatter = _scalar_format(container)
+    if formatter is None:
+        return None
+    item = 'item'
+    if container.attribute is not None:
+        if not isinstance(container.attribute, str):
+            return None
+        item = f'getattr(item, {container.attribute!r})'
+    return formatter.format(item)
+
+
+def dumps(document):
+    """Encodes an already marshalled document to JSON bytes."""
+    return orjson.dumps(document)
+
+
+def json_response(document, code=200):
+    return current_app.response_class(dumps(document), status=code,
+                                      mimetype='application/json')
+
+
+def request_mask():
+    """The fields mask sent in the X-Fields header (RESTX_MASK_HEADER), or
+    None. A malformed one raises a MaskError, which the Api answers with 400.
+    """
+    return request.headers.get(current_app.config['RESTX_MASK_HEADER']) or None
+
+
+def mask_header(func):
+    """Documents the X-Fields header parameter of a handler answering with
+    marshal_response(), as @api.marshal_with does."""
+    func.__apidoc__ = merge(getattr(func, '__apidoc__', {}), {'__mask__': True})
+    return func
+
+
+def marshal_response(data, model, mask=None, code=200):
+    """Response equivalent of `marshal(data, model, mask=mask), code`.
+
+    Without an explicit `mask`, the request's X-Fields header masks the
+    output like it does under @api.marshal_with.
+    """
+    from_header = mask is None
+    if from_header:
+        mask = request_mask()
+    serialize = compile_model(model, mask)
+    if isinstance(data, (list, tuple)):
+        response = json_response([serialize(item) for item in data], code)
+    else:
+        response = json_response(serialize(data), code)
+    if from_header:
+        response.vary.add(current_app.config['RESTX_MASK_HEADER'])
+    return response
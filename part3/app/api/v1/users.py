@@ -2,6 +2,13 @@ from flask_restx import Namespace, Resource, fields
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import facade
+from app.query_budget import query_budget
+from app.api.v1.pagination import (ids_arg, list_parser, many_model, many_result, page_args,
+                                   page_model)
+from app.api.v1.conditional import conditional
+from app.api.v1.serializer import marshal_response, mask_header
+from app.api.v1.projection import (add_projection_arguments, nested_mask, parse_projection,
+                                   projection_mask, projection_parser)
 
 api = Namespace('users', description='User operations')
 
@@ -13,15 +20,41 @@ user_model = api.model('User', {
     'password': fields.String(required=True, description='Password', write_only=True)
 })
 
+user_page_model = page_model(api, 'UserPage', user_model)
+user_many_model = many_model(api, 'UserMany', user_model)
+user_list_parser = add_projection_arguments(list_parser)
+
 
 @api.route('/')
 class UserList(Resource):
+    @conditional(facade.get_users_version)
+    @query_budget(2)
     @api.doc('list_users')
-    @api.marshal_list_with(user_model)
+    @api.expect(user_list_parser)
+    @mask_header
+    @api.response(200, 'A page, or {items, missing} with ?ids=', user_page_model)
+    @api.response(400, 'Invalid projection, pagination or ids arguments')
     def get(self):
-        """List all users"""
-        return facade.get_all_users()
+        """List a page of users, or the users listed in ?ids="""
+        try:
+            args = user_list_parser.parse_args()
+            limit, cursor = page_args(args)
+            ids = ids_arg(args)
+            projection = parse_projection(args, user_model)
+            profile = projection or 'user_summary'
+            if ids is None:
+                body = facade.get_users_page(limit, cursor, profile=profile)
+                model = user_page_model
+            else:
+                body = many_result(ids, facade.get_many_users(ids, profile))
+                model = user_many_model
+        except ValueError as e:
+            api.abort(400, str(e))
+        mask = projection and nested_mask(model, 'items',
+                                          projection_mask(projection, user_model))
+        return marshal_response(body, model, mask=mask)
 
+    @query_budget(4)
     @api.doc('create_user')
     @api.expect(user_model)
     @jwt_required()
@@ -48,15 +81,24 @@ class UserList(Resource):
 @api.param('user_id', 'The user identifier')
 @api.response(404, 'User not found')
 class UserResource(Resource):
+    @conditional(facade.get_user_version)
+    @query_budget(2)
     @api.doc('get_user')
-    @api.marshal_with(user_model)
+    @api.expect(projection_parser)
+    @mask_header
+    @api.response(200, 'Success', user_model)
+    @api.response(400, 'Invalid projection arguments')
     def get(self, user_id):
         """Fetch a user by ID"""
         try:
-            return facade.get_user(user_id)
+            projection = parse_projection(projection_parser.parse_args(), user_model)
+            user = facade.get_user(user_id, profile=projection or 'user_summary')
         except ValueError as e:
-            api.abort(404, str(e))
+            api.abort(400, str(e))
+        return marshal_response(user, user_model,
+                                mask=projection and projection_mask(projection, user_model))
 
+    @query_budget(5)
     @api.doc('update_user')
     @api.expect(user_model)
     @jwt_required()
@@ -83,6 +125,7 @@ class UserResource(Resource):
         except ValueError as e:
             api.abort(404, str(e))
 
+    @query_budget(6)
     @api.doc('delete_user')
     @api.response(204, 'User successfully deleted')
     @jwt_required()
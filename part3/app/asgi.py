@@ -0,0 +1,176 @@
+import io
+import re
+import sys
+from asgiref.wsgi import WsgiToAsgi
+from flask_restx import abort
+from werkzeug.exceptions import HTTPException
+from werkzeug.wrappers import Response
+from app import create_app
+from app.extensions import metrics
+from app.metrics import current_request
+from app.services import facade
+from app.persistence.async_repository import AsyncDatabase
+from app.services.async_facade import AsyncHBnBFacade
+from app.api.v1.conditional import validators
+from app.api.v1.pagination import ids_arg, many_result, page_args, split_ids
+from app.api.v1.projection import parse_projection, projection_mask, projection_parser, nested_mask
+from app.api.v1.serializer import compile_model, json_response, marshal_response
+from app.api.v1.places import (PLACE_RELATIONS, place_list_parser, place_many_model,
+                               place_output_model, place_page_model, place_projection,
+                               serialize_place)
+
+# Sub-paths of /api/v1/places/ that are Flask routes, not place ids
+PLACE_ROUTES = ('search', 'nearby', 'cache-stats', 'batch')
+
+
+def wsgi_environ(scope):
+    """Minimal WSGI environ for a bodiless ASGI HTTP request."""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'SERVER_NAME': scope['server'][0] if scope.get('server') else 'localhost',
+        'SERVER_PORT': str(scope['server'][1]) if scope.get('server') else '80',
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    for name, value in scope.get('headers', ()):
+        key = 'HTTP_' + name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class HBnBASGI:
+    """ASGI application serving place browsing and place detail on the event loop.
+
+    Those two GETs run as coroutines on an AsyncHBnBFacade, inside a Flask
+    request context built from the ASGI scope so they parse and validate
+    arguments exactly like the Flask resources. Every other request,
+    writes included, is handed to the Flask app through asgiref's
+    WsgiToAsgi, which runs it in a worker thread.
+    """
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.database = AsyncDatabase()
+        self.database.init_app(flask_app)
+        self.facade = AsyncHBnBFacade(self.database, facade.amenity_index, facade.place_cache)
+        # (path pattern, Flask rule used as the metrics label, handler)
+        self.routes = [
+            (re.compile(r'/api/v1/places/'), '/api/v1/places/', self.list_places),
+            (re.compile(r'/api/v1/places/(?P<place_id>[^/]+)'),
+             '/api/v1/places/<string:place_id>', self.get_place),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        rule, handler, kwargs = self.resolve(scope)
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+        token = metrics.start()
+        try:
+            with self.flask_app.request_context(wsgi_environ(scope)):
+                try:
+                    response = await handler(**kwargs)
+                except HTTPException as e:
+                    response = json_response(getattr(e, 'data', None)
+                                             or {'message': e.description}, e.code)
+            metrics.finish(current_request.get(), rule, scope['method'], response)
+        finally:
+            current_request.reset(token)
+            await self.database.remove()
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                        for name, value in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    def resolve(self, scope):
+        """(rule, handler, URL arguments) for requests served here, else Nones."""
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None, None, None
+        for pattern, rule, handler in self.routes:
+            match = pattern.fullmatch(scope['path'])
+            if match and match.groupdict().get('place_id') not in PLACE_ROUTES:
+                return rule, handler, match.groupdict()
+        return None, None, None
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.database.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def list_places(self):
+        """Async twin of PlaceList.get"""
+        version = await self.facade.get_places_version()
+        headers, fresh = validators(version)
+        if fresh:
+            return Response(status=304, headers=headers)
+        try:
+            args = place_list_parser.parse_args()
+            limit, cursor = page_args(args)
+            ids = ids_arg(args)
+            profile, mask = place_projection(args)
+            if ids is not None:
+                places = await self.facade.get_many_places(ids, profile)
+                response = marshal_response(
+                    many_result(ids, places), place_many_model,
+                    mask=mask and nested_mask(place_many_model, 'items', mask))
+                response.headers.update(headers)
+                return response
+            page = await self.facade.get_places_page(limit, cursor, profile=profile,
+                                                     min_price=args['min_price'],
+                                                     max_price=args['max_price'],
+                                                     min_rating=args['min_rating'],
+                                                     sort=args['sort'],
+                                                     amenity_ids=split_ids(args['amenities']),
+                                                     amenity_mode=args['amenities_mode'],
+                                                     places_version=version)
+        except ValueError as e:
+            abort(400, str(e))
+        response = marshal_response(page, place_page_model,
+                                    mask=mask and nested_mask(place_page_model, 'items', mask))
+        response.headers.update(headers)
+        return response
+
+    async def get_place(self, place_id):
+        """Async twin of PlaceResource.get"""
+        version = await self.facade.get_place_version(place_id)
+        if version is None:
+            abort(404, "Place not found")
+        headers, fresh = validators(version)
+        if fresh:
+            return Response(status=304, headers=headers)
+        try:
+            projection = parse_projection(projection_parser.parse_args(),
+                                          place_output_model, PLACE_RELATIONS)
+        except ValueError as e:
+            abort(400, str(e))
+        if projection is None:
+            document = await self.facade.get_place_document(place_id, serialize_place,
+                                                             version)
+        else:
+            place = await self.facade.get_place(place_id, profile=projection)
+            mask = projection_mask(projection, place_output_model, PLACE_RELATIONS)
+            document = place and compile_model(place_output_model, mask)(place)
+        if document is None:
+            abort(404, "Place not found")
+        response = json_response(document)
+        response.headers.update(headers)
+        return response
+
+
+def create_asgi_app(config_class="config.DevelopmentConfig"):
+    return HBnBASGI(create_app(config_class))
@@ -0,0 +1,78 @@
+import time
+
+import click
+
+from app.extensions import db
+from app.seeding import ADMIN_EMAIL, SCALES, SEED_PASSWORD, dataset_size, is_seeded, seed_dataset
+from app.services import facade
+
+
+def register_commands(app):
+    """Attaches the maintenance commands to `flask <command>`."""
+
+    @app.cli.command('init-db')
+    @click.option('--admin-email', envvar='HBNB_ADMIN_EMAIL', default='admin@hbnb.io',
+                  show_default=True)
+    @click.option('--admin-password', envvar='HBNB_ADMIN_PASSWORD', default='admin',
+                  show_default=True)
+    def init_db(admin_email, admin_password):
+        """Create missing tables and the admin user. Safe to run again."""
+        db.create_all()
+        if facade.get_user_by_email(admin_email):
+            click.echo(f"Admin user {admin_email} already exists")
+        else:
+            facade.create_user({'first_name': 'Admin', 'last_name': 'User',
+                                'email': admin_email, 'password': admin_password,
+                                'is_admin': True})
+            click.echo(f"Admin user {admin_email} created")
+        click.echo("Database ready")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Rebuild the places full-text index from the places table."""
+        facade.rebuild_search_index()
+        click.echo("Search index rebuilt")
+
+    @app.cli.command('recompute-review-aggregates')
+    def recompute_review_aggregates():
+        """Recompute every place's review count, rating sum and histogram."""
+        count = facade.recompute_review_aggregates()
+        click.echo(f"Review aggregates recomputed for {count} places")
+
+    @app.cli.command('seed')
+    @click.option('--scale', type=click.Choice(list(SCALES)), default='small', show_default=True,
+                  help='Preset row counts, see app/seeding.py')
+    @click.option('--users', type=int, help='Override the number of users')
+    @click.option('--places', type=int, help='Override the number of places')
+    @click.option('--reviews', type=int, help='Override the number of reviews')
+    @click.option('--amenities', type=int, help='Override the number of amenities')
+    @click.option('--max-amenities', type=int, default=10, show_default=True,
+                  help='Most amenities linked to one place')
+    @click.option('--seed', 'random_seed', type=int, default=42, show_default=True,
+                  help='Random seed; the same seed gives the same rows and ids')
+    @click.option('--batch-size', type=int, default=10000, show_default=True,
+                  help='Rows per executemany')
+    @click.option('--password', default=SEED_PASSWORD, show_default=True,
+                  help='Password of every seeded user')
+    @click.option('--admin-email', envvar='HBNB_ADMIN_EMAIL', default=ADMIN_EMAIL,
+                  show_default=True, help='Email of the seeded admin user')
+    @click.option('--reset', is_flag=True, help='Drop and recreate every table first')
+    def seed(scale, users, places, reviews, amenities, max_amenities, random_seed,
+             batch_size, password, admin_email, reset):
+        """Fill an empty database with a deterministic synthetic dataset."""
+        if reset:
+            db.drop_all()
+        db.create_all()
+        if is_seeded():
+            raise click.ClickException("The database already has users; use --reset to replace them")
+        sizes = dataset_size(scale, users=users, places=places, reviews=reviews,
+                             amenities=amenities)
+        start = time.perf_counter()
+        try:
+            written = seed_dataset(**sizes, max_amenities=max_amenities, seed=random_seed,
+                                   batch_size=batch_size, password=password,
+                                   admin_email=admin_email)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(', '.join(f'{count} {table}' for table, count in written.items())
+                   + f" written in {time.perf_counter() - start:.1f}s")
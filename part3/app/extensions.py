@@ -1,7 +1,9 @@
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
+from app.metrics import Metrics
+from app.passwords import PasswordHasher
 
-bcrypt = Bcrypt()
 jwt = JWTManager()
 db = SQLAlchemy()
+password_hasher = PasswordHasher()
+metrics = Metrics()
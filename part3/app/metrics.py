@@ -0,0 +1,207 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Statistics of the request being served in this thread or asyncio task
+current_request = ContextVar('current_request', default=None)
+
+
+class RequestStats:
+    """What one request spent, filled in while it runs."""
+    __slots__ = ('started', 'statements', 'db_seconds', 'hash_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+
+
+class Series:
+    """Accumulated counters of one (endpoint, method) pair."""
+    __slots__ = ('buckets', 'count', 'seconds', 'statuses', 'statements',
+                 'db_seconds', 'hash_seconds', 'response_bytes')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.statuses = {}
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.response_bytes = 0
+
+    def merge(self, other):
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.seconds += other.seconds
+        for status, count in list(other.statuses.items()):
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.statements += other.statements
+        self.db_seconds += other.db_seconds
+        self.hash_seconds += other.hash_seconds
+        self.response_bytes += other.response_bytes
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = conn.info.get('metrics_started')
+    if stats is not None and started:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started.pop()
+
+
+class Metrics:
+    """Per-endpoint request metrics, served at /metrics in Prometheus text format.
+
+    Each thread records into its own shard of counters, so the request path
+    takes no lock; a scrape merges the shards. Counters are per process:
+    under gunicorn every worker reports its own.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.server_timing = app.config.get('SERVER_TIMING', False)
+        for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                               ('after_cursor_execute', _after_cursor_execute)):
+            if not event.contains(Engine, name, listener):
+                event.listen(Engine, name, listener)
+
+        @app.before_request
+        def start_request_metrics():
+            g.metrics_token = self.start()
+
+        @app.after_request
+        def record_request_metrics(response):
+            stats = current_request.get()
+            if stats is not None and request.endpoint != 'metrics':
+                rule = request.url_rule.rule if request.url_rule else 'unmatched'
+                self.finish(stats, rule, request.method, response)
+            return response
+
+        @app.teardown_request
+        def reset_request_metrics(error=None):
+            token = g.pop('metrics_token', None)
+            if token is not None:
+                current_request.reset(token)
+
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+    def start(self):
+        """Begins recording the current request; returns the ContextVar token."""
+        return current_request.set(RequestStats())
+
+    def observe_password_hash(self, seconds):
+        stats = current_request.get()
+        if stats is not None:
+            stats.hash_seconds += seconds
+
+    def finish(self, stats, endpoint, method, response):
+        """Records a finished request and adds its Server-Timing header.
+
+        Streamed bodies count as 0 bytes: their size is unknown here.
+        """
+        seconds = time.perf_counter() - stats.started
+        series = self._series(endpoint, method)
+        series.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series.count += 1
+        series.seconds += seconds
+        series.statuses[response.status_code] = series.statuses.get(response.status_code, 0) + 1
+        series.statements += stats.statements
+        series.db_seconds += stats.db_seconds
+        series.hash_seconds += stats.hash_seconds
+        if not response.is_streamed:
+            series.response_bytes += response.content_length or 0
+        if self.server_timing:
+            timings = [f'app;dur={seconds * 1000:.3f}',
+                       f'db;dur={stats.db_seconds * 1000:.3f};desc="{stats.statements} statements"']
+            if stats.hash_seconds:
+                timings.append(f'hash;dur={stats.hash_seconds * 1000:.3f}')
+            response.headers['Server-Timing'] = ', '.join(timings)
+
+    def _series(self, endpoint, method):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        series = shard.get((endpoint, method))
+        if series is None:
+            series = shard[(endpoint, method)] = Series()
+        return series
+
+    def snapshot(self):
+        """Every shard merged into one Series per (endpoint, method)."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            # list() copies in one step, so a thread adding a key cannot break the loop
+            for key, series in list(shard.items()):
+                merged.setdefault(key, Series()).merge(series)
+        return merged
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        snapshot = sorted(self.snapshot().items())
+        labels = {key: f'endpoint="{_escape(key[0])}",method="{key[1]}"' for key, _ in snapshot}
+
+        family('hbnb_http_request_duration_seconds', 'histogram', 'Request latency.')
+        for key, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), series.buckets):
+                cumulative += count
+                lines.append(f'hbnb_http_request_duration_seconds_bucket{{{labels[key]},'
+                             f'le="{bound}"}} {cumulative}')
+            lines.append(f'hbnb_http_request_duration_seconds_sum{{{labels[key]}}} {series.seconds}')
+            lines.append(f'hbnb_http_request_duration_seconds_count{{{labels[key]}}} {series.count}')
+
+        family('hbnb_http_requests_total', 'counter', 'Requests by response status.')
+        for key, series in snapshot:
+            for status, count in sorted(series.statuses.items()):
+                lines.append(f'hbnb_http_requests_total{{{labels[key]},status="{status}"}} {count}')
+
+        for name, attribute, help_text in (
+                ('hbnb_http_response_bytes_total', 'response_bytes', 'Response body bytes.'),
+                ('hbnb_db_statements_total', 'statements', 'SQL statements executed.'),
+                ('hbnb_db_duration_seconds_total', 'db_seconds', 'Time spent executing SQL.'),
+                ('hbnb_password_hash_duration_seconds_total', 'hash_seconds',
+                 'Time spent waiting for bcrypt.')):
+            family(name, 'counter', help_text)
+            for key, series in snapshot:
+                lines.append(f'{name}{{{labels[key]}}} {getattr(series, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,23 @@
+from app.extensions import db
+from sqlalchemy import event, insert
+
+
+class CollectionVersion(db.Model):
+    """Change counter of one table, bumped by every transaction writing it.
+
+    Collection ETags and the in-process indexes read these rows instead of
+    scanning the tables they describe, see app/persistence/versions.py.
+    """
+    __tablename__ = 'collection_versions'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+
+@event.listens_for(CollectionVersion.__table__, 'after_create')
+def _add_counters(target, connection, **kw):
+    """Starts a counter at 0 for every other table of the metadata."""
+    connection.execute(insert(target), [{'name': name, 'version': 0}
+                                        for name in target.metadata.tables
+                                        if name != target.name])
@@ -1,7 +1,26 @@
 from app.extensions import db
-from sqlalchemy import ForeignKey
+from sqlalchemy import DDL, ForeignKey, event
 from .baseclass import BaseModel
 
+# Places are bucketed into a fixed lat/long grid so that viewport queries
+# become a handful of integer range scans on places.grid_cell.
+GRID_CELL_DEGREES = 0.1
+GRID_ROWS = int(round(180 / GRID_CELL_DEGREES))
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+
+
+def grid_row(latitude):
+    return min(int((float(latitude) + 90) / GRID_CELL_DEGREES), GRID_ROWS - 1)
+
+
+def grid_column(longitude):
+    return min(int((float(longitude) + 180) / GRID_CELL_DEGREES), GRID_COLUMNS - 1)
+
+
+def grid_cell(latitude, longitude):
+    """Row-major id of the grid cell containing (latitude, longitude)."""
+    return grid_row(latitude) * GRID_COLUMNS + grid_column(longitude)
+
 # Association table for many-to-many relationship between Place and Amenity
 place_amenity = db.Table('place_amenity',
     db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
@@ -13,13 +32,23 @@ class Place(BaseModel):
 
     title = db.Column(db.String(120), nullable=False)
     description = db.Column(db.String(500), nullable=True)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
     owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    grid_cell = db.Column(db.Integer, nullable=False, index=True)
+
+    # Review aggregates, maintained by the facade on every review write
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0)
+    rating_2 = db.Column(db.Integer, nullable=False, default=0)
+    rating_3 = db.Column(db.Integer, nullable=False, default=0)
+    rating_4 = db.Column(db.Integer, nullable=False, default=0)
+    rating_5 = db.Column(db.Integer, nullable=False, default=0)
 
     reviews = db.relationship('Review', backref='place', lazy=True)
-    amenities = db.relationship('Amenity', secondary=place_amenity, lazy='subquery',
+    amenities = db.relationship('Amenity', secondary=place_amenity, lazy=True,
                                backref=db.backref('places', lazy=True))
 
     def __init__(self, title, price, latitude, longitude, owner_id,
@@ -50,6 +79,18 @@ class Place(BaseModel):
         self.owner_id = owner_id
         self.amenities = amenities or []
 
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
+    @property
+    def rating_histogram(self):
+        """Number of 1..5 star reviews, in that order."""
+        return [self.rating_1 or 0, self.rating_2 or 0, self.rating_3 or 0,
+                self.rating_4 or 0, self.rating_5 or 0]
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -59,7 +100,48 @@ class Place(BaseModel):
             "latitude": self.latitude,
             "longitude": self.longitude,
             "owner_id": self.owner_id,
-            "owner": self.owner.to_dict() if self.owner else None,
+            "review_count": self.review_count or 0,
+            "average_rating": self.average_rating,
+            "rating_histogram": self.rating_histogram,
+            "owner": self.owner.to_summary() if self.owner else None,
             "reviews": [review.to_dict() for review in self.reviews],
             "amenities": [amenity.to_dict() for amenity in self.amenities]
         }
+
+
+@event.listens_for(Place, 'before_insert')
+@event.listens_for(Place, 'before_update')
+def _sync_grid_cell(mapper, connection, target):
+    """Keeps grid_cell in step with latitude/longitude on every flush."""
+    target.grid_cell = grid_cell(target.latitude, target.longitude)
+
+
+# Full-text search: an FTS5 external-content index over places.title and
+# places.description, kept in sync by triggers. SQLite only; other backends
+# fall back to LIKE matching in PlaceRepository.
+PLACES_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+        title, description,
+        content='places', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+        INSERT INTO places_fts(rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE OF title, description ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO places_fts(rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END""",
+)
+
+for _statement in PLACES_FTS_DDL:
+    event.listen(Place.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Place.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS places_fts").execute_if(dialect='sqlite'))
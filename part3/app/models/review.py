@@ -6,8 +6,8 @@ class Review(BaseModel):
 
     text = db.Column(db.String(500), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False, index=True)
 
     def __init__(self, text, rating, user_id, place_id, id=None):
         super().__init__(id=id)
@@ -17,7 +17,8 @@ class Review(BaseModel):
             raise ValueError("User ID is required")
         if not place_id:
             raise ValueError("Place ID is required")
-        if not (1 <= rating <= 5):
+        # Also the index of the place's rating_<n> histogram column
+        if not isinstance(rating, int) or not (1 <= rating <= 5):
             raise ValueError("Rating must be between 1 and 5")
 
         self.text = text
@@ -31,7 +32,5 @@ class Review(BaseModel):
             "text": self.text,
             "rating": self.rating,
             "user_id": self.user_id,
-            "place_id": self.place_id,
-            "user": self.user.to_dict() if self.user else None,
-            "place": self.place.to_dict() if self.place else None
+            "place_id": self.place_id
         }
@@ -1,5 +1,5 @@
 import re
-from app.extensions import bcrypt, db
+from app.extensions import db, password_hasher
 from .baseclass import BaseModel
 
 class User(BaseModel):
@@ -31,20 +31,30 @@ class User(BaseModel):
         return re.match(r"[^@]+@[^@]+\.[^@]+", email)
 
     def hash_password(self, password):
-        """Hashes the password before storing it."""
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Hashes the password (in the hashing pool) before storing it."""
+        self.password = password_hasher.hash(password)
 
     def verify_password(self, password):
         """Verifies if the provided password matches the hashed password."""
-        return bcrypt.check_password_hash(self.password, password)
+        return password_hasher.verify(password, self.password)
 
-    def to_dict(self):
+    def needs_rehash(self):
+        """Whether the stored hash uses another work factor than configured."""
+        return password_hasher.needs_rehash(self.password)
+
+    def to_summary(self):
+        """Scalar fields only, safe to embed in other documents."""
         return {
             "id": self.id,
             "first_name": self.first_name,
             "last_name": self.last_name,
-            "email": self.email,
+            "email": self.email
+        }
+
+    def to_dict(self):
+        return {
+            **self.to_summary(),
             "is_admin": self.is_admin,
-            "places": [place.to_dict() for place in self.places],
-            "reviews": [review.to_dict() for review in self.reviews]
+            "places": [place.id for place in self.places],
+            "reviews": [review.id for review in self.reviews]
         }
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import bcrypt
+
+
+# Workers are started from a fresh server process (or interpreter) rather
+# than forked from the app process, whose other threads may hold locks the
+# child would inherit in a locked state
+START_METHOD = ('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                else 'spawn')
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are queued, or one did not finish in time."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _verify(password, hashed):
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:  # not a bcrypt hash
+        return False
+
+
+def hash_cost(hashed):
+    """Work factor stored in a bcrypt hash such as '$2b$12$...'."""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a pool of worker processes instead of the request thread.
+
+    At most `max_pending` hashes may be queued or running per process;
+    beyond that, and when a result takes longer than `timeout` seconds,
+    PasswordHasherBusy is raised so the API can answer 503 instead of
+    piling up blocked threads. With `workers=0` hashing runs inline.
+    The pool is created on the first hash in each process, so a server
+    forking its workers after create_app() does not share or inherit it.
+    """
+    def __init__(self, rounds=12, workers=0, max_pending=32, timeout=5.0):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        # Called with the seconds each hash or verify took, e.g. by app.metrics
+        self.on_duration = None
+        self.configure(rounds, workers, max_pending, timeout)
+
+    def init_app(self, app):
+        self.configure(app.config.get('BCRYPT_LOG_ROUNDS', 12),
+                       app.config.get('PASSWORD_HASH_WORKERS', 0),
+                       app.config.get('PASSWORD_HASH_MAX_PENDING', 32),
+                       app.config.get('PASSWORD_HASH_TIMEOUT', 5.0))
+
+    def configure(self, rounds, workers, max_pending, timeout):
+        self.shutdown()
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def hash(self, password):
+        if not password:
+            raise ValueError("Password must be non-empty.")
+        return self._run(_hash, password.encode('utf-8'), self.rounds)
+
+    def verify(self, password, hashed):
+        if not password or not hashed:
+            return False
+        return self._run(_verify, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """Whether a stored hash was made with a different work factor."""
+        return hash_cost(hashed) != self.rounds
+
+    def _executor(self):
+        # A pool inherited through fork() has no live workers: start a new one
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(START_METHOD))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, func, *args):
+        if self.on_duration is None:
+            return self._call(func, *args)
+        started = time.perf_counter()
+        try:
+            return self._call(func, *args)
+        finally:
+            self.on_duration(time.perf_counter() - started)
+
+    def _call(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Password hashing is saturated, retry shortly")
+        try:
+            future = self._executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the work is really done, even after a timeout
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy("Password hashing timed out, retry shortly")
@@ -0,0 +1,154 @@
+from asyncio import current_task
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker, create_async_engine
+from app.persistence.base import Repository
+from app.persistence.pagination import Page
+from app.persistence.repository import SQLAlchemyQueries, chunked
+
+# Backend name -> asyncio driver used when ASYNC_DATABASE_URI is not set
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_database_uri(uri):
+    """The asyncio twin of a sync SQLAlchemy URL, e.g. sqlite:///x.db ->
+    sqlite+aiosqlite:///x.db."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for '{backend}', set ASYNC_DATABASE_URI")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+class AsyncDatabase:
+    """Async engine plus one AsyncSession per asyncio task.
+
+    The async counterpart of Flask-SQLAlchemy's `db`: the session is scoped
+    to the task serving the request and must be released with remove()
+    once the response is sent.
+    """
+    def __init__(self):
+        self.engine = None
+        self.session = None
+
+    def init_app(self, app):
+        uri = (app.config.get('ASYNC_DATABASE_URI')
+               or async_database_uri(app.config['SQLALCHEMY_DATABASE_URI']))
+        self.engine = create_async_engine(uri, **app.config.get('ASYNC_ENGINE_OPTIONS', {}))
+        self.session = async_scoped_session(
+            async_sessionmaker(self.engine, expire_on_commit=False),
+            scopefunc=current_task)
+
+    async def remove(self):
+        await self.session.remove()
+
+    async def dispose(self):
+        await self.engine.dispose()
+
+
+class AsyncSQLAlchemyRepository(SQLAlchemyQueries, Repository):
+    """SQLAlchemyRepository on an AsyncDatabase; every method is a coroutine.
+
+    Lazy loads cannot run under asyncio, so whatever the caller reads off
+    the returned objects must be covered by the loading profile.
+    """
+    def __init__(self, model, database=None):
+        super().__init__(model)
+        self.database = database
+
+    @property
+    def session(self):
+        return self.database.session
+
+    async def add(self, obj):
+        self.session.add(obj)
+        await self.session.commit()
+
+    async def get(self, obj_id, profile=None):
+        return await self.session.get(self.model, obj_id, options=self.loader_options(profile))
+
+    async def get_many(self, ids, profile=None):
+        """Rows by id in request order, None for misses; see SQLAlchemyRepository.get_many()."""
+        loaded = []
+        for chunk in chunked(dict.fromkeys(ids)):
+            loaded.extend((await self.session.scalars(self.many_statement(chunk, profile))).unique())
+        return self.in_request_order(ids, loaded)
+
+    async def exists(self, obj_id):
+        return await self.session.scalar(self.exists_statement(obj_id)) is not None
+
+    async def exists_many(self, ids):
+        return await self.get_existing_values('id', ids)
+
+    async def get_columns(self, obj_id, *names):
+        return (await self.session.execute(self.columns_statement(obj_id, names))).first()
+
+    async def get_all(self):
+        return (await self.session.scalars(select(self.model))).all()
+
+    async def stream(self, batch_size=1000, profile=None):
+        """Async iterator over every row in id order, see SQLAlchemyRepository.stream()."""
+        result = await self.session.stream_scalars(self.stream_statement(batch_size, profile))
+        async for obj in result:
+            yield obj
+
+    async def get_version(self, obj_id):
+        row = (await self.session.execute(self.version_statement(obj_id))).first()
+        return tuple(row) if row else None
+
+    async def get_collection_version(self):
+        return tuple((await self.session.execute(self.collection_version_statement())).one())
+
+    async def get_page(self, limit, cursor=None, criteria=(), profile=None,
+                       sort='created_at', sort_key=None, descending=False, columns=(), joins=()):
+        query = self.page_statement(limit, cursor, criteria, profile, sort, sort_key,
+                                    descending, columns, joins)
+        rows = (await self.session.execute(query)).unique().all()
+        return self.page_from_rows(rows, limit, sort, columns)
+
+    async def get_record_page(self, limit, cursor=None, criteria=(), profile=None,
+                              sort='created_at', sort_key=None, descending=False, joins=()):
+        """Page of read-only records, see SQLAlchemyRepository.get_record_page()."""
+        columns, relations = self.record_fields(profile)
+        query = self.record_page_statement(columns, relations, limit, cursor, criteria, sort,
+                                           sort_key, descending, joins)
+        rows, next_cursor = self.record_page_rows((await self.session.execute(query)).all(),
+                                                  limit, sort, columns, relations)
+        related = {}
+        for name in relations:
+            relation, found = self.record_relations[name], {}
+            if relation.joined:
+                continue
+            for chunk in chunked(self.related_keys(rows, columns, name)):
+                relation.collect(await self.session.execute(relation.statement(chunk)), found)
+            related[name] = found
+        return Page(self.records(rows, columns, relations, related), next_cursor)
+
+    async def update(self, obj_id, data):
+        obj = await self.get(obj_id)
+        if obj:
+            for key, value in data.items():
+                setattr(obj, key, value)
+            await self.session.commit()
+
+    async def delete(self, obj_id):
+        obj = await self.get(obj_id)
+        if obj:
+            await self.session.delete(obj)
+            await self.session.commit()
+
+    async def get_by_attribute(self, attr_name, attr_value):
+        query = select(self.model).filter_by(**{attr_name: attr_value}).limit(1)
+        return (await self.session.scalars(query)).first()
+
+    async def get_existing_values(self, attr_name, values):
+        """See SQLAlchemyRepository.get_existing_values()."""
+        column = getattr(self.model, attr_name)
+        found = set()
+        for chunk in chunked(set(values)):
+            found.update(await self.session.scalars(select(column).where(column.in_(chunk))))
+        return found
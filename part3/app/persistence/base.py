@@ -9,10 +9,30 @@ class Repository(ABC):
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, ids, profile=None):
+        pass
+
+    @abstractmethod
+    def exists(self, obj_id):
+        pass
+
+    @abstractmethod
+    def exists_many(self, ids):
+        pass
+
+    @abstractmethod
+    def get_columns(self, obj_id, *names):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
 
+    @abstractmethod
+    def get_page(self, limit, cursor=None):
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+class Page:
+    """A slice of a collection plus the cursor pointing at the next slice."""
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(values, sort='created_at'):
+    """Packs the sort key of the last row of a page into an opaque token.
+
+    The sort name travels with the values so that a cursor taken from one
+    ordering is rejected by another instead of silently skipping rows.
+    """
+    payload = [sort] + [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns, sort='created_at'):
+    """Unpacks a token produced by encode_cursor back into typed values."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != len(columns) + 1:
+        raise ValueError("Invalid cursor")
+    if payload[0] != sort:
+        raise ValueError("Cursor does not belong to this sort order")
+
+    decoded = []
+    for column, value in zip(columns, payload[1:]):
+        if value is not None and _python_type(column) is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (ValueError, TypeError):
+                raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def after_key(columns, values, descending=False):
+    """Builds the keyset predicate `(c1, c2, ...) > (v1, v2, ...)`.
+
+    With `descending` the comparison is flipped to `<`. Written as nested
+    OR/AND terms rather than a row-value comparison so every backend can
+    drive it from an ordinary (sort_key, id) index.
+    """
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond,
+               and_(column == value, after_key(columns[1:], values[1:], descending)))
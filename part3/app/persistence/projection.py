@@ -0,0 +1,13 @@
+class Projection:
+    """Which fields and relationships a caller wants, usable as a loading profile.
+
+    `fields` lists the scalar output fields (None means all of them) and
+    `expand` the relationships to embed; anything else is neither loaded
+    nor serialized.
+    """
+    def __init__(self, fields=None, expand=()):
+        self.fields = None if fields is None else tuple(fields)
+        self.expand = tuple(expand)
+
+    def __repr__(self):
+        return f'Projection(fields={self.fields!r}, expand={self.expand!r})'
@@ -0,0 +1,85 @@
+from sqlalchemy import select
+
+_types = {}
+
+
+class Record:
+    """Base of the read-only row classes built by record_type()."""
+    __slots__ = ()
+
+    def __repr__(self):
+        values = ', '.join(f'{name}={getattr(self, name, None)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({values})'
+
+
+def record_type(model, fields, derived=()):
+    """A __slots__ class named after `model` holding `fields`, built with
+    positional values in that order.
+
+    Records carry no identity map entry, no instrumentation and no
+    per-instance __dict__. The model properties named in `derived` are
+    copied onto the class, so they compute from the record's columns just
+    as they do on the model.
+    """
+    key = (model, tuple(fields), tuple(derived))
+    if key not in _types:
+        namespace = {'__slots__': tuple(fields)}
+        for name in derived:
+            attribute = getattr(model, name, None)
+            if isinstance(attribute, property):
+                namespace[name] = attribute
+        source = '\n'.join([
+            f"def __init__(_r, {', '.join(fields)}):",
+            *(f'    _r.{name} = {name}' for name in fields),
+            '    pass',
+        ])
+        exec(compile(source, f'<record {model.__name__}>', 'exec'), namespace)
+        _types[key] = type(f'{model.__name__}Record', (Record,), namespace)
+    return _types[key]
+
+
+class RecordRelation:
+    """How get_record_page() embeds one relationship into records.
+
+    The related `columns` of `model` are matched on `key_column` against
+    the record field `key`. A `joined` relation is outer-joined into the
+    page SELECT, like joinedload(); the others are read with one IN query
+    per page, reaching `key_column` through `joins` ((target, onclause)
+    pairs). Each record gets the list of its related records when `many`,
+    else the one record or None.
+    """
+    def __init__(self, key, model, columns, key_column, joins=(), many=False, joined=False):
+        self.key = key
+        self.model = model
+        self.columns = tuple(columns)
+        self.key_column = key_column
+        self.joins = tuple(joins)
+        self.many = many
+        self.joined = joined
+
+    @property
+    def record_type(self):
+        return record_type(self.model, self.columns)
+
+    def selected(self):
+        return [getattr(self.model, name) for name in self.columns]
+
+    def statement(self, keys):
+        query = select(self.key_column.label('record_key'), *self.selected())
+        query = query.select_from(self.model)
+        for target, onclause in self.joins:
+            query = query.join(target, onclause)
+        return query.where(self.key_column.in_(keys))
+
+    def collect(self, rows, found):
+        """Adds the rows of statement() to the {key: value} map `found`."""
+        make = self.record_type
+        for key, *values in rows:
+            if self.many:
+                found.setdefault(key, []).append(make(*values))
+            else:
+                found[key] = make(*values)
+        return found
+
+    def value(self, found, key):
+        return found.get(key, [] if self.many else None)
@@ -1,32 +1,419 @@
+from contextlib import contextmanager
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import load_only
 from app.extensions import db
 from app.persistence.base import Repository
+from app.persistence.projection import Projection
+from app.persistence.pagination import Page, after_key, decode_cursor, encode_cursor
+from app.persistence.records import record_type
+from app.persistence.versions import versions_statement
+
+# Values per IN (...) list, under the 999 bound parameters old SQLite builds allow
+IN_CHUNK_SIZE = 500
+
+# db.session.info keys: nesting depth of unit_of_work() blocks, and the
+# callbacks to run once the outermost one commits
+UNIT_OF_WORK_DEPTH = 'unit_of_work_depth'
+ON_COMMIT = 'unit_of_work_on_commit'
+
+
+def in_unit_of_work():
+    return db.session.info.get(UNIT_OF_WORK_DEPTH, 0) > 0
+
+
+def commit():
+    """Commits the session, or only flushes it inside a unit of work.
+
+    The flush still sends the SQL, so ids, constraint errors and the
+    query-level reads that follow see the change before the unit commits.
+    """
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def on_commit(callback):
+    """Runs `callback` once the current unit of work commits, or now
+    outside of one. Dropped if the unit rolls back."""
+    if in_unit_of_work():
+        db.session.info.setdefault(ON_COMMIT, []).append(callback)
+    else:
+        callback()
+
+
+@contextmanager
+def unit_of_work():
+    """Groups repository writes into one transaction with a single commit.
+
+    Inside the block repositories flush instead of committing. Leaving the
+    outermost block commits everything, or rolls it all back if it exits
+    with an exception; nested blocks join the outer transaction. The state
+    lives in db.session.info, so it is per thread like the session itself.
+    """
+    info = db.session.info
+    depth = info.get(UNIT_OF_WORK_DEPTH, 0)
+    info[UNIT_OF_WORK_DEPTH] = depth + 1
+    try:
+        yield
+    except BaseException:
+        info[UNIT_OF_WORK_DEPTH] = depth
+        if depth == 0:
+            info.pop(ON_COMMIT, None)
+            db.session.rollback()
+        raise
+    info[UNIT_OF_WORK_DEPTH] = depth
+    if depth == 0:
+        try:
+            db.session.commit()
+        except BaseException:
+            info.pop(ON_COMMIT, None)
+            db.session.rollback()
+            raise
+        for callback in info.pop(ON_COMMIT, ()):
+            callback()
+
+
+def chunked(values, size=None):
+    size = size or IN_CHUNK_SIZE
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SQLAlchemyQueries:
+    """Statement building shared by the sync and async repositories.
+
+    Nothing here touches a session: subclasses execute the statements on
+    Flask-SQLAlchemy's scoped session or on an AsyncSession.
+    """
+    # Named loader option sets, see loader_options()
+    profiles = {}
+    # Relationship name -> callable building its loader, for Projection.expand
+    expansions = {}
+    # Output field -> the columns it is computed from, for Projection.fields
+    derived_fields = {}
+    # Relationship name -> RecordRelation, for get_record_page()
+    record_relations = {}
+    # Relationships embedded in records unless a Projection picks others
+    default_record_relations = ()
+    # Tables whose collection versions make up the collection's version;
+    # None for the model's own table
+    version_tables = None
 
-class SQLAlchemyRepository(Repository):
     def __init__(self, model):
         self.model = model
 
+    def loader_options(self, profile=None):
+        """Resolves a loading profile name into SQLAlchemy loader options.
+
+        Profiles are declared by each repository as callables so that
+        relationship attributes are only looked up once mappers are ready.
+        A Projection can be passed wherever a profile name is accepted.
+        """
+        if profile is None:
+            return ()
+        if isinstance(profile, Projection):
+            return self.projection_options(profile)
+        if profile not in self.profiles:
+            raise KeyError(f"Unknown loading profile '{profile}' for {self.model.__name__}")
+        return self.profiles[profile]()
+
+    def projection_options(self, projection):
+        """Loads only the projected columns plus the expanded relationships.
+
+        Relationships left out stay lazy and, never being serialized, are
+        never queried.
+        """
+        options = []
+        if projection.fields is not None:
+            columns = set(self.model.__mapper__.column_attrs.keys())
+            names = {'id'}
+            for name in projection.fields:
+                names.update(self.derived_fields.get(name, (name,)))
+            options.append(load_only(*[getattr(self.model, name)
+                                       for name in sorted(names & columns)]))
+        for name in projection.expand:
+            if name not in self.expansions:
+                raise ValueError(f"Cannot expand '{name}' on {self.model.__name__}")
+            options.append(self.expansions[name]())
+        return tuple(options)
+
+    def stream_statement(self, batch_size=1000, profile=None):
+        return (select(self.model).options(*self.loader_options(profile))
+                .order_by(self.model.id).execution_options(yield_per=batch_size))
+
+    def many_statement(self, ids, profile=None):
+        return (select(self.model).options(*self.loader_options(profile))
+                .where(self.model.id.in_(ids)))
+
+    def exists_statement(self, obj_id):
+        return select(literal(1)).where(self.model.id == obj_id).limit(1)
+
+    def columns_statement(self, obj_id, names):
+        return select(*[getattr(self.model, name) for name in names]).where(
+            self.model.id == obj_id)
+
+    @staticmethod
+    def in_request_order(ids, objects):
+        """One entry per id, in the order given: the object, or None for a miss."""
+        by_id = {obj.id: obj for obj in objects}
+        return [by_id.get(obj_id) for obj_id in ids]
+
+    def version_statement(self, obj_id):
+        return select(self.model.id, self.model.updated_at).where(self.model.id == obj_id)
+
+    def collection_version_statement(self):
+        """(version, updated_at) of each of version_tables, flattened into one
+        row, see app/persistence/versions.py."""
+        return versions_statement(self.version_tables or (self.model.__tablename__,))
+
+    def page_statement(self, limit, cursor=None, criteria=(), profile=None,
+                       sort='created_at', sort_key=None, descending=False, columns=(), joins=()):
+        """SELECT of one page for get_page(), fetching one extra row to tell
+        whether another page follows."""
+        query = select(self.model).options(*self.loader_options(profile))
+        return self._paged(query, limit, cursor, criteria, sort, sort_key, descending,
+                           columns, joins)
+
+    def _paged(self, query, limit, cursor, criteria, sort, sort_key, descending, columns, joins):
+        """Adds the sort key column, filters, keyset condition and ordering
+        of a page to `query`."""
+        if sort_key is None:
+            sort_key = self.model.created_at
+        order = (sort_key, self.model.id)
+        for target, onclause in joins:
+            query = query.join(target, onclause)
+        query = query.add_columns(sort_key, *columns).where(*criteria)
+        if cursor:
+            values = decode_cursor(cursor, order, sort)
+            query = query.where(after_key(order, values, descending))
+        if descending:
+            query = query.order_by(sort_key.desc(), self.model.id.desc())
+        else:
+            query = query.order_by(sort_key, self.model.id)
+        return query.limit(limit + 1)
+
+    @staticmethod
+    def page_from_rows(rows, limit, sort='created_at', columns=()):
+        """Turns the rows of page_statement() into a Page."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_key = rows[-1][:2]
+            next_cursor = encode_cursor([last_key, last.id], sort)
+        if columns:
+            return Page([(row[0],) + tuple(row[2:]) for row in rows], next_cursor)
+        return Page([row[0] for row in rows], next_cursor)
+
+    def record_fields(self, profile=None):
+        """(columns, relations) of the records get_record_page() builds.
+
+        A Projection narrows both, like it narrows loader options; a profile
+        name or None reads every column plus default_record_relations.
+        """
+        projection = profile if isinstance(profile, Projection) else None
+        relations = projection.expand if projection else self.default_record_relations
+        for name in relations:
+            if name not in self.record_relations:
+                raise ValueError(f"Cannot expand '{name}' on {self.model.__name__}")
+        columns = self.model.__mapper__.column_attrs.keys()
+        if projection and projection.fields is not None:
+            names = {'id'}
+            for name in projection.fields:
+                names.update(self.derived_fields.get(name, (name,)))
+            names.update(self.record_relations[name].key for name in relations)
+            columns = [name for name in columns if name in names]
+        return tuple(columns), tuple(relations)
+
+    def record_page_statement(self, columns, relations, limit, cursor=None, criteria=(),
+                              sort='created_at', sort_key=None, descending=False, joins=()):
+        """page_statement() selecting `columns`, then the columns of the
+        joined `relations`, instead of the entity."""
+        query = select(*[getattr(self.model, name) for name in columns])
+        for name in relations:
+            relation = self.record_relations[name]
+            if relation.joined:
+                query = query.add_columns(*relation.selected()).outerjoin(
+                    relation.model, relation.key_column == getattr(self.model, relation.key))
+        return self._paged(query, limit, cursor, criteria, sort, sort_key, descending, (), joins)
+
+    def record_page_rows(self, rows, limit, sort, columns, relations):
+        """(rows of the page, next cursor) from the rows of record_page_statement()."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            width = len(columns) + sum(len(self.record_relations[name].columns)
+                                       for name in relations
+                                       if self.record_relations[name].joined)
+            next_cursor = encode_cursor([last[width], last[columns.index('id')]], sort)
+        return rows, next_cursor
+
+    def related_keys(self, rows, columns, name):
+        """Values of relation `name`'s key field over a page of rows."""
+        index = columns.index(self.record_relations[name].key)
+        return {row[index] for row in rows if row[index] is not None}
+
+    def records(self, rows, columns, relations, related):
+        """The records of a page: its column values followed by each
+        relation's value, taken from the joined columns of the row or from
+        the {key: value} map `related` holds for the relation."""
+        make = record_type(self.model, columns + relations, tuple(self.derived_fields))
+        size = offset = len(columns)
+        embedders = []
+        for name in relations:
+            relation = self.record_relations[name]
+            if relation.joined:
+                start, offset = offset, offset + len(relation.columns)
+                embedders.append(self._joined_value(relation.record_type, start, offset))
+            else:
+                embedders.append(self._related_value(relation, related[name],
+                                                     columns.index(relation.key)))
+        return [make(*row[:size], *[embed(row) for embed in embedders]) for row in rows]
+
+    @staticmethod
+    def _joined_value(make, start, stop):
+        # An outer join without a match leaves the related columns all NULL
+        return lambda row: None if row[start] is None else make(*row[start:stop])
+
+    @staticmethod
+    def _related_value(relation, found, index):
+        return lambda row: relation.value(found, row[index])
+
+
+class SQLAlchemyRepository(SQLAlchemyQueries, Repository):
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        commit()
+
+    def add_many(self, rows):
+        """Inserts column dicts, all with the same keys, as one executemany
+        INSERT. Mapper events do not run and no objects are loaded."""
+        if rows:
+            db.session.execute(insert(self.model), rows)
+            commit()
+
+    def get(self, obj_id, profile=None):
+        return db.session.get(self.model, obj_id, options=self.loader_options(profile))
+
+    def get_many(self, ids, profile=None):
+        """Loads rows by id with one IN query per IN_CHUNK_SIZE distinct ids.
+
+        Returns one entry per requested id, in request order, with None
+        where no row exists.
+        """
+        loaded = []
+        for chunk in chunked(dict.fromkeys(ids)):
+            loaded.extend(db.session.scalars(self.many_statement(chunk, profile)).unique())
+        return self.in_request_order(ids, loaded)
 
-    def get(self, obj_id):
-        return self.model.query.get(obj_id)
+    def exists(self, obj_id):
+        """Whether a row with this id exists, read with a SELECT 1 that loads
+        no object."""
+        return db.session.scalar(self.exists_statement(obj_id)) is not None
+
+    def exists_many(self, ids):
+        """The subset of `ids` that exist, with one IN query per IN_CHUNK_SIZE ids."""
+        return self.get_existing_values('id', ids)
+
+    def get_columns(self, obj_id, *names):
+        """The named columns of one row as a Row (e.g. row.owner_id), or None.
+
+        Only those columns are selected and no object is hydrated, so this
+        suits checks that need a field or two of a row and not the row.
+        """
+        return db.session.execute(self.columns_statement(obj_id, names)).first()
+
+    def get_record_page(self, limit, cursor=None, criteria=(), profile=None,
+                        sort='created_at', sort_key=None, descending=False, joins=()):
+        """get_page() for read-only traffic: items are records, not objects.
+
+        The page is one column SELECT, with the joined relationships in it,
+        plus one IN query per other embedded relationship (see
+        record_fields()); records are __slots__ objects built straight from
+        the result rows. Nothing enters the identity map, so a page
+        costs a fraction of the memory and CPU of hydrating the models.
+        """
+        columns, relations = self.record_fields(profile)
+        query = self.record_page_statement(columns, relations, limit, cursor, criteria, sort,
+                                           sort_key, descending, joins)
+        rows, next_cursor = self.record_page_rows(db.session.execute(query).all(),
+                                                  limit, sort, columns, relations)
+        related = {}
+        for name in relations:
+            relation, found = self.record_relations[name], {}
+            if relation.joined:
+                continue
+            for chunk in chunked(self.related_keys(rows, columns, name)):
+                relation.collect(db.session.execute(relation.statement(chunk)), found)
+            related[name] = found
+        return Page(self.records(rows, columns, relations, related), next_cursor)
 
     def get_all(self):
         return self.model.query.all()
 
+    def stream(self, batch_size=1000, profile=None):
+        """Yields every row in id order, fetching `batch_size` at a time.
+
+        Rows come from a server-side cursor (yield_per), so memory use does
+        not grow with the table. Use only profiles whose loaders work per
+        batch (selectinload), not joined collection loads.
+        """
+        yield from db.session.scalars(self.stream_statement(batch_size, profile))
+
+    def get_version(self, obj_id):
+        """(id, updated_at) of one row, or None, without loading the object."""
+        row = db.session.execute(self.version_statement(obj_id)).first()
+        return tuple(row) if row else None
+
+    def get_collection_version(self):
+        """(max(updated_at), count) over the whole table.
+
+        The count makes deletions visible, which max(updated_at) alone misses.
+        """
+        return tuple(db.session.execute(self.collection_version_statement()).one())
+
+    def get_page(self, limit, cursor=None, criteria=(), profile=None,
+                 sort='created_at', sort_key=None, descending=False, columns=(), joins=()):
+        """Returns up to `limit` rows ordered by (sort_key, id).
+
+        `sort_key` defaults to created_at and may be any column expression;
+        `sort` names the ordering inside the cursor. `joins` are (target,
+        onclause) pairs joined before filtering. When extra `columns` are
+        given, each item is an (obj, *column_values) tuple. Pages are
+        addressed by keyset rather than offset, so fetching page N costs the
+        same index range scan as fetching page 1.
+        """
+        query = self.page_statement(limit, cursor, criteria, profile, sort, sort_key,
+                                    descending, columns, joins)
+        rows = db.session.execute(query).unique().all()
+        return self.page_from_rows(rows, limit, sort, columns)
+
     def update(self, obj_id, data):
+        """Sets `data` on the row and commits; returns the updated object,
+        or None when no row has this id."""
         obj = self.get(obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
+        return obj
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
 
     def get_by_attribute(self, attr_name, attr_value):
-        return self.model.query.filter_by(**{attr_name: attr_value}).first()
\ No newline at end of file
+        return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    def get_existing_values(self, attr_name, values):
+        """The subset of `values` present in column `attr_name`, read with
+        one IN query per IN_CHUNK_SIZE values."""
+        column = getattr(self.model, attr_name)
+        found = set()
+        for chunk in chunked(set(values)):
+            found.update(db.session.scalars(select(column).where(column.in_(chunk))))
+        return found
@@ -0,0 +1,125 @@
+"""Collection versions: a change counter per table.
+
+Every transaction that writes a table bumps that table's collection_versions
+row just before it commits, in the same transaction. "Did anything in
+these tables change?" is then a primary key lookup per table instead of a
+max(updated_at)/count() scan of each of them.
+
+Writes are noticed on the session: flushed ORM objects (and the
+many-to-many tables their collections write) and INSERT/UPDATE/DELETE
+statements run through Session.execute(). SQL sent past the session must
+report the tables it wrote with mark_written().
+"""
+from datetime import datetime
+from itertools import chain
+from sqlalchemy import event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.collection_version import CollectionVersion
+
+# Session.info keys: tables written in the open transaction, and the
+# {table: (version, updated_at)} the last commit moved them to
+WRITTEN = 'collection_versions_written'
+COMMITTED = 'collection_versions_committed'
+
+_versions = CollectionVersion.__table__
+
+
+def mark_written(session, *tables):
+    """Records writes made without the session seeing them (e.g. straight
+    on its connection), so the commit bumps those tables too."""
+    session.info.setdefault(WRITTEN, set()).update(tables)
+
+
+def committed_versions(session):
+    """{table: (version, updated_at)} of the tables the session's last
+    commit wrote; empty again once the session starts a new transaction."""
+    return session.info.get(COMMITTED, {})
+
+
+def caught_up(version, committed):
+    """`version` ({table: (version, updated_at)}) moved past a commit this
+    process made, or None when another writer moved one of its tables in
+    between, so whoever holds `version` missed changes and must reload.
+    """
+    moved = dict(version)
+    for name, (counter, _) in version.items():
+        if name in committed:
+            if counter is None or committed[name][0] != counter + 1:
+                return None
+            moved[name] = committed[name]
+    return moved
+
+
+def versions_statement(tables):
+    """One row: version and updated_at of each of `tables`, in that order."""
+    columns = []
+    for name in tables:
+        row = _versions.c.name == name
+        columns += [select(_versions.c.version).where(row).scalar_subquery(),
+                    select(_versions.c.updated_at).where(row).scalar_subquery()]
+    return select(*columns)
+
+
+def versions_by_table(row, tables):
+    """{table: (version, updated_at)} from a versions_statement() row."""
+    return {name: tuple(row[2 * i:2 * i + 2]) for i, name in enumerate(tables)}
+
+
+def _written_tables(session, flush_context):
+    tables = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        state = inspect(obj)
+        tables.add(state.mapper.local_table.name)
+        for relationship in state.mapper.relationships:
+            if relationship.secondary is not None and (
+                    obj in session.deleted or state.attrs[relationship.key].history.has_changes()):
+                tables.add(relationship.secondary.name)
+    mark_written(session, *tables)
+
+
+def _written_by_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        name = orm_execute_state.statement.table.name
+        if name != _versions.name:
+            mark_written(orm_execute_state.session, name)
+
+
+def _bump(session):
+    # Commit flushes after before_commit; flush now so its tables count
+    session.flush()
+    tables = session.info.pop(WRITTEN, set())
+    session.info[COMMITTED] = {}
+    if not tables:
+        return
+    connection = session.connection()
+    statement = (update(_versions).where(_versions.c.name.in_(sorted(tables)))
+                 .values(version=_versions.c.version + 1, updated_at=datetime.utcnow()))
+    columns = (_versions.c.name, _versions.c.version, _versions.c.updated_at)
+    if connection.dialect.update_returning:
+        rows = connection.execute(statement.returning(*columns)).all()
+    else:
+        connection.execute(statement)
+        rows = connection.execute(select(*columns).where(_versions.c.name.in_(sorted(tables)))).all()
+    committed = {name: (version, updated_at) for name, version, updated_at in rows}
+    # Tables created after collection_versions start counting here
+    missing = [{'name': name, 'version': 1, 'updated_at': datetime.utcnow()}
+               for name in sorted(tables - committed.keys())]
+    if missing:
+        connection.execute(insert(_versions), missing)
+        committed.update((row['name'], (1, row['updated_at'])) for row in missing)
+    session.info[COMMITTED] = committed
+
+
+def _forget_writes(session, *args):
+    session.info.pop(WRITTEN, None)
+
+
+def _forget_commit(session, *args):
+    session.info.pop(COMMITTED, None)
+
+
+event.listen(Session, 'after_flush', _written_tables)
+event.listen(Session, 'do_orm_execute', _written_by_statement)
+event.listen(Session, 'before_commit', _bump)
+event.listen(Session, 'after_rollback', _forget_writes)
+event.listen(Session, 'after_begin', _forget_commit)
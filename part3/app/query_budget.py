@@ -0,0 +1,116 @@
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# How many times the same SQL may run in one budget before it counts as N+1
+MAX_REPEATS = 3
+
+# Budgets open in this thread or asyncio task, innermost last
+_active = ContextVar('query_budgets', default=())
+
+
+class QueryBudgetExceeded(Exception):
+    """A block issued more SQL than its budget allows."""
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for budget in _active.get():
+        budget.statements[statement] += 1
+
+
+def _check_before_commit(session, *args):
+    # Under 'raise' a block already over budget fails before it commits, so
+    # the error never follows a write that went through. Commits flush
+    # after before_commit, hence the check after each flush as well
+    if has_app_context() and current_app.config.get('QUERY_BUDGET_ACTION') == 'raise':
+        for budget in _active.get():
+            budget.check()
+
+
+class QueryBudget:
+    """Counts the SQL statements executed inside a `with` block.
+
+    On exit the block is checked against `max_statements` and against
+    N+1 patterns: one statement text, differing only in its bound
+    parameters, run more than `max_repeats` times. A violation is logged
+    or raised as QueryBudgetExceeded according to QUERY_BUDGET_ACTION
+    ('log', 'raise' or 'off'). Under 'raise' the block is also checked
+    before each commit it makes, so an overrun rolls the write back instead
+    of failing after it went through. Budgets nest; every open budget
+    counts a statement. Each instance serves one block, use query_budget()
+    to decorate functions.
+    """
+    def __init__(self, max_statements=None, max_repeats=MAX_REPEATS, name='query budget'):
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.name = name
+        self.statements = Counter()
+        self._token = None
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    def repeated(self):
+        """(statement, times) for statements run more than max_repeats times."""
+        if self.max_repeats is None:
+            return []
+        return [(statement, times) for statement, times in self.statements.most_common()
+                if times > self.max_repeats]
+
+    def violations(self):
+        problems = []
+        if self.max_statements is not None and self.count > self.max_statements:
+            problems.append(f"{self.count} statements, budget is {self.max_statements}")
+        for statement, times in self.repeated():
+            problems.append(f"N+1: ran {times} times: {' '.join(statement.split())[:200]}")
+        return problems
+
+    def check(self):
+        action = current_app.config.get('QUERY_BUDGET_ACTION', 'log') if has_app_context() else 'log'
+        problems = self.violations()
+        if not problems or action == 'off':
+            return
+        message = f"{self.name}: " + "; ".join(problems)
+        if action == 'raise':
+            raise QueryBudgetExceeded(message)
+        if has_app_context():
+            current_app.logger.warning(message)
+
+    def __enter__(self):
+        if not event.contains(Engine, 'before_cursor_execute', _count_statement):
+            event.listen(Engine, 'before_cursor_execute', _count_statement)
+        for name in ('before_commit', 'after_flush'):
+            if not event.contains(Session, name, _check_before_commit):
+                event.listen(Session, name, _check_before_commit)
+        self._token = _active.set(_active.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active.reset(self._token)
+        # A block that failed already reports its own error
+        if exc_type is None:
+            self.check()
+        return False
+
+
+def query_budget(max_statements=None, max_repeats=MAX_REPEATS):
+    """Decorator running each call of a resource method or facade method
+    inside its own QueryBudget, named after the function.
+
+    Put it above @api.marshal_with so lazy loads made while marshalling
+    are counted, and below @conditional so the version lookup is not.
+    """
+    def decorator(func):
+        name = func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with QueryBudget(max_statements, max_repeats, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
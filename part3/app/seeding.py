@@ -0,0 +1,210 @@
+"""Deterministic synthetic datasets for benchmark and staging databases
+(`flask seed`, benchmarks/load_test.py).
+
+The same (sizes, seed) always produces the same rows, ids included, so two
+releases are measured against identical data. Rows bypass the facade: they
+go in through Core executemany inserts in large transactions, and every
+user shares a single bcrypt hash computed once.
+"""
+import itertools
+import operator
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, insert, select
+
+from app.extensions import db, password_hasher
+from app.models.user import User
+from app.models.amenity import Amenity
+from app.models.place import Place, place_amenity, grid_cell
+from app.models.review import Review
+from app.persistence.versions import mark_written
+
+SCALES = {
+    'tiny': {'users': 200, 'places': 1000, 'reviews': 5000, 'amenities': 20},
+    'small': {'users': 1000, 'places': 10000, 'reviews': 50000, 'amenities': 50},
+    'medium': {'users': 5000, 'places': 50000, 'reviews': 500000, 'amenities': 50},
+    'large': {'users': 10000, 'places': 200000, 'reviews': 2000000, 'amenities': 50},
+}
+
+ADMIN_EMAIL = 'admin@hbnb.io'
+SEED_PASSWORD = 'hbnb-seed'
+
+CITIES = [
+    ('San Juan', 18.47, -66.11), ('New York', 40.71, -74.01), ('Paris', 48.86, 2.35),
+    ('Tokyo', 35.68, 139.69), ('Lisbon', 38.72, -9.14), ('Mexico City', 19.43, -99.13),
+    ('Cape Town', -33.92, 18.42), ('Sydney', -33.87, 151.21), ('Reykjavik', 64.15, -21.94),
+    ('Buenos Aires', -34.60, -58.38), ('Bangkok', 13.76, 100.50), ('Berlin', 52.52, 13.40),
+]
+ADJECTIVES = ['Cozy', 'Sunny', 'Quiet', 'Modern', 'Rustic', 'Spacious', 'Charming', 'Bright']
+NOUNS = ['Loft', 'Studio', 'Cottage', 'Apartment', 'Villa', 'Cabin', 'Bungalow', 'Suite']
+WORDS = ('ocean view garden balcony kitchen downtown beach mountain pool terrace '
+         'historic wifi parking fireplace family quiet market metro park').split()
+REVIEW_TEXTS = ['Great stay', 'Would come back', 'Clean and quiet', 'Host was lovely',
+                'Not as pictured', 'Perfect location', 'A bit noisy at night', 'Excellent value']
+# Share of 1..5 star reviews
+RATING_WEIGHTS = [0.05, 0.07, 0.15, 0.33, 0.40]
+EPOCH = datetime(2024, 1, 1)
+# Version and variant bits of a random (version 4) UUID
+UUID4_CLEAR = ~((0xf000 << 64) | (0xc000 << 48))
+UUID4_SET = (0x4000 << 64) | (0x8000 << 48)
+
+
+def dataset_size(scale='small', **overrides):
+    """Row counts of a named scale, with any non-None override applied."""
+    sizes = dict(SCALES[scale])
+    sizes.update({name: value for name, value in overrides.items() if value is not None})
+    return sizes
+
+
+def is_seeded():
+    return db.session.scalar(select(func.count(User.id))) > 0
+
+
+def bulk_insert(table, rows, batch_size=10000):
+    """INSERTs `rows`, dicts all having the same keys, in executemany batches
+    on the session's connection; returns the number of rows.
+
+    The statement is compiled once and the batches go straight to the
+    driver: at these volumes SQLAlchemy's per-row parameter handling costs
+    more than the inserts themselves.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    connection = db.session.connection()
+    # The driver-level inserts bypass the session; count them as writes
+    mark_written(db.session, table.name)
+    dialect = connection.dialect
+    columns = list(first)
+    compiled = insert(table).compile(dialect=dialect, column_keys=columns)
+    processors = []
+    for name in columns:
+        processor = table.c[name].type.dialect_impl(dialect).bind_processor(dialect)
+        if processor is not None:
+            processors.append((name, processor))
+    shape = operator.itemgetter(*compiled.positiontup) if compiled.positional else dict
+
+    def parameters(row):
+        for name, processor in processors:
+            row[name] = processor(row[name])
+        return shape(row)
+
+    count = 0
+    rows = itertools.chain([first], rows)
+    while batch := [parameters(row) for row in itertools.islice(rows, batch_size)]:
+        connection.exec_driver_sql(str(compiled), batch)
+        count += len(batch)
+    return count
+
+
+def seed_dataset(users, places, reviews, amenities, max_amenities=10, seed=42,
+                 batch_size=10000, password=SEED_PASSWORD, admin_email=ADMIN_EMAIL):
+    """Fills an empty database; returns the row count written per table.
+
+    Places cluster around a dozen cities; amenity popularity and reviews
+    per place follow long-tailed distributions, so a few places carry most
+    of the reviews like on a real listing site. The first user is an admin
+    (`admin_email`); every user's password is `password`.
+    """
+    if users < 1 or amenities < 1 or (reviews and not places):
+        raise ValueError("Seeding needs at least one user and one amenity, "
+                         "and places to attach reviews to")
+    rng = np.random.default_rng(seed)
+    id_bits = random.Random(seed)
+
+    def new_ids(count):
+        ids = []
+        for _ in range(count):
+            # str(uuid.UUID(int=bits, version=4)) without the object overhead
+            bits = (id_bits.getrandbits(128) & UUID4_CLEAR) | UUID4_SET
+            text = f'{bits:032x}'
+            ids.append(f'{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}')
+        return ids
+
+    def stamp(i, step):
+        created = EPOCH + timedelta(seconds=i * step)
+        return {'created_at': created, 'updated_at': created}
+
+    def write(table, count, row):
+        """Inserts row(0) .. row(count - 1) and commits."""
+        bulk_insert(table, (row(i) for i in range(count)), batch_size)
+        db.session.commit()
+
+    hashed = password_hasher.hash(password)
+    user_ids = new_ids(users)
+    write(User.__table__, users, lambda i: {
+        'id': user_ids[i], 'first_name': 'Admin' if i == 0 else f'User{i}',
+        'last_name': 'Seed', 'is_admin': i == 0, 'password': hashed,
+        'email': admin_email if i == 0 else f'user{i}@seed.hbnb.io', **stamp(i, 60),
+    })
+
+    amenity_ids = new_ids(amenities)
+    write(Amenity.__table__, amenities,
+          lambda i: {'id': amenity_ids[i], 'name': f'Amenity {i}', **stamp(i, 60)})
+
+    # Reviews are drawn first so places can be inserted with their aggregates
+    popularity = rng.pareto(1.2, places) + 1
+    review_place = rng.choice(places, size=reviews, p=popularity / popularity.sum())
+    review_rating = rng.choice(5, size=reviews, p=RATING_WEIGHTS) + 1
+    histograms = np.stack([np.bincount(review_place[review_rating == stars], minlength=places)
+                           for stars in range(1, 6)], axis=1)
+
+    place_ids = new_ids(places)
+    centres = np.array([(lat, lon) for _, lat, lon in CITIES])
+    city = rng.integers(len(CITIES), size=places)
+    coordinates = centres[city] + rng.normal(0, 0.3, size=(places, 2))
+    latitudes = np.clip(coordinates[:, 0], -90, 90).tolist()
+    longitudes = np.clip(coordinates[:, 1], -180, 180).tolist()
+    prices = np.maximum(np.round(rng.lognormal(4.6, 0.5, size=places), 2), 1.0).tolist()
+    owners = rng.integers(users, size=places).tolist()
+    words = rng.integers(len(WORDS), size=(places, 12))
+    histograms = histograms.tolist()
+    city = city.tolist()
+
+    def place_row(i):
+        latitude, longitude, histogram = latitudes[i], longitudes[i], histograms[i]
+        return {
+            'id': place_ids[i], 'owner_id': user_ids[owners[i]],
+            'title': f'{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[(i // 8) % len(NOUNS)]} '
+                     f'in {CITIES[city[i]][0]}',
+            'description': ' '.join([WORDS[j] for j in words[i].tolist()]),
+            'price': prices[i], 'latitude': latitude, 'longitude': longitude,
+            'grid_cell': grid_cell(latitude, longitude),
+            'review_count': sum(histogram),
+            'rating_sum': sum(stars * n for stars, n in enumerate(histogram, 1)),
+            **{f'rating_{stars}': n for stars, n in enumerate(histogram, 1)},
+            **stamp(i, 30),
+        }
+    write(Place.__table__, places, place_row)
+
+    # Weighted sampling without replacement, a batch of places at a time:
+    # the top k of log(weight) + Gumbel noise is a weighted draw of k.
+    log_weights = -np.log(np.arange(1, amenities + 1))
+    fan_out = rng.binomial(min(max_amenities, amenities), 0.4, size=places).tolist()
+
+    def amenity_links():
+        for start in range(0, places, batch_size):
+            stop = min(start + batch_size, places)
+            keys = log_weights + rng.gumbel(size=(stop - start, amenities))
+            ranked = np.argsort(-keys, axis=1)
+            for i in range(start, stop):
+                for j in ranked[i - start, :fan_out[i]].tolist():
+                    yield {'place_id': place_ids[i], 'amenity_id': amenity_ids[j]}
+    links = bulk_insert(place_amenity, amenity_links(), batch_size)
+    db.session.commit()
+
+    authors = [user_ids[j] for j in rng.integers(users, size=reviews).tolist()]
+    reviewed = [place_ids[j] for j in review_place.tolist()]
+    review_rating = review_rating.tolist()
+    review_ids = new_ids(reviews)
+    write(Review.__table__, reviews, lambda i: {
+        'id': review_ids[i], 'text': REVIEW_TEXTS[i % len(REVIEW_TEXTS)],
+        'rating': review_rating[i], 'user_id': authors[i], 'place_id': reviewed[i],
+        **stamp(i, 5),
+    })
+
+    return {'users': users, 'amenities': amenities, 'places': places,
+            'place_amenity': links, 'reviews': reviews}
@@ -0,0 +1,111 @@
+import threading
+
+from app.persistence.versions import caught_up
+
+
+class AmenityBitmapIndex:
+    """One bitset per amenity over place ordinals, for facet filtering.
+
+    Each place that has at least one amenity gets a small integer ordinal;
+    an amenity's bitmap is a Python int with bit N set when the place with
+    ordinal N offers it. AND/OR across amenities and per-amenity counts are
+    then single big-int operations. Like PlaceGeoIndex it is per process,
+    loaded lazily from place_amenity, kept current (version included) by
+    the facade's own writes and reloaded when the database moves past the
+    version it was loaded at for any other reason.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.loaded = False
+            self.version = None
+            self._ordinals = {}
+            self._place_ids = []
+            self._bitmaps = {}
+
+    def load(self, links, version=None):
+        """Replaces the index contents with (place_id, amenity_id) rows read
+        at `version`, see is_current()."""
+        with self._lock:
+            self._ordinals, self._place_ids, self._bitmaps = {}, [], {}
+            for place_id, amenity_id in links:
+                bit = 1 << self._ordinal(place_id)
+                self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+            self.version = version
+            self.loaded = True
+
+    def is_current(self, version):
+        """Whether the index was loaded at `version`; links written by other
+        processes move the version and call for a reload."""
+        return self.loaded and self.version == version
+
+    def catch_up(self, committed):
+        """Moves the index past a commit of this process it already holds
+        the links of, see PlaceGeoIndex.catch_up()."""
+        with self._lock:
+            if self.loaded:
+                self.version = caught_up(self.version, committed) or self.version
+
+    def set_place_amenities(self, place_id, amenity_ids):
+        with self._lock:
+            self._clear_place(place_id)
+            if amenity_ids:
+                bit = 1 << self._ordinal(place_id)
+                for amenity_id in amenity_ids:
+                    self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+
+    def remove_place(self, place_id):
+        with self._lock:
+            self._clear_place(place_id)
+
+    def remove_amenity(self, amenity_id):
+        with self._lock:
+            self._bitmaps.pop(amenity_id, None)
+
+    def match(self, amenity_ids, mode='all'):
+        """Bitset of the places having all (or any) of the amenities."""
+        with self._lock:
+            bitmaps = [self._bitmaps.get(amenity_id, 0) for amenity_id in amenity_ids]
+        if not bitmaps:
+            return 0
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result & bitmap if mode == 'all' else result | bitmap
+        return result
+
+    def place_ids(self, bits):
+        """Expands a bitset back into place ids."""
+        ids = []
+        with self._lock:
+            while bits:
+                lowest = bits & -bits
+                ids.append(self._place_ids[lowest.bit_length() - 1])
+                bits ^= lowest
+        return ids
+
+    def facet_counts(self, bits=None):
+        """Places per amenity, restricted to `bits` when given."""
+        with self._lock:
+            if bits is None:
+                return {amenity_id: bitmap.bit_count()
+                        for amenity_id, bitmap in self._bitmaps.items()}
+            return {amenity_id: (bitmap & bits).bit_count()
+                    for amenity_id, bitmap in self._bitmaps.items()}
+
+    def _ordinal(self, place_id):
+        ordinal = self._ordinals.get(place_id)
+        if ordinal is None:
+            ordinal = self._ordinals[place_id] = len(self._place_ids)
+            self._place_ids.append(place_id)
+        return ordinal
+
+    def _clear_place(self, place_id):
+        ordinal = self._ordinals.get(place_id)
+        if ordinal is None:
+            return
+        mask = ~(1 << ordinal)
+        for amenity_id, bitmap in self._bitmaps.items():
+            self._bitmaps[amenity_id] = bitmap & mask
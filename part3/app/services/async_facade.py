@@ -0,0 +1,100 @@
+from app.services.facade import amenity_filters, facet_list
+from app.services.repositories.user_repository import AsyncUserRepository
+from app.services.repositories.amenity_repository import AsyncAmenityRepository
+from app.services.repositories.place_repository import AsyncPlaceRepository
+from app.services.repositories.review_repository import AsyncReviewRepository
+
+
+class AsyncHBnBFacade:
+    """The read side of HBnBFacade on an AsyncDatabase.
+
+    Writes are not mirrored here: they keep going through HBnBFacade, whose
+    amenity index and place cache this facade shares (pass them in), so a
+    write served by Flask invalidates what the async reads see.
+    """
+    def __init__(self, database, amenity_index, place_cache):
+        self.user_repo = AsyncUserRepository(database)
+        self.amenity_repo = AsyncAmenityRepository(database)
+        self.place_repo = AsyncPlaceRepository(database)
+        self.review_repo = AsyncReviewRepository(database)
+        self.amenity_index = amenity_index
+        self.place_cache = place_cache
+
+    # User methods
+    async def get_user(self, user_id, profile=None):
+        return await self.user_repo.get(user_id, profile)
+
+    async def get_many_users(self, ids, profile=None):
+        return await self.user_repo.get_many(ids, profile)
+
+    async def get_users_page(self, limit, cursor=None, profile=None):
+        return await self.user_repo.get_record_page(limit, cursor, profile=profile)
+
+    # Amenity methods
+    async def get_amenity(self, amenity_id, profile=None):
+        return await self.amenity_repo.get(amenity_id, profile)
+
+    async def get_many_amenities(self, ids, profile=None):
+        return await self.amenity_repo.get_many(ids, profile)
+
+    async def get_amenities_page(self, limit, cursor=None, profile=None):
+        return await self.amenity_repo.get_record_page(limit, cursor, profile=profile)
+
+    async def _amenity_bitmap_index(self, places_version=None):
+        """HBnBFacade._amenity_bitmap_index() on the shared index."""
+        if places_version is None:
+            version = await self.place_repo.get_index_version()
+        else:
+            version = self.place_repo.index_version(places_version)
+        if not self.amenity_index.is_current(version):
+            self.amenity_index.load(await self.place_repo.get_amenity_links(), version)
+        return self.amenity_index
+
+    # Place methods
+    async def get_place(self, place_id, profile=None):
+        return await self.place_repo.get(place_id, profile)
+
+    async def get_many_places(self, ids, profile=None):
+        return await self.place_repo.get_many(ids, profile)
+
+    async def get_place_document(self, place_id, serialize, version=None):
+        """HBnBFacade.get_place_document() on the shared place cache."""
+        if version is None:
+            version = await self.get_place_version(place_id)
+            if version is None:
+                return None
+        document = self.place_cache.get(place_id, version)
+        if document is None:
+            place = await self.place_repo.get(place_id, 'place_detail')
+            if place is None:
+                return None
+            document = serialize(place)
+            self.place_cache.set(place_id, document, version)
+        return document
+
+    async def get_place_version(self, place_id):
+        return await self.place_repo.get_version(place_id)
+
+    async def get_places_version(self):
+        return await self.place_repo.get_collection_version()
+
+    async def get_places_page(self, limit, cursor=None, profile=None, min_price=None,
+                              max_price=None, sort='created_at', amenity_ids=None,
+                              amenity_mode='all', min_rating=None, places_version=None):
+        index = await self._amenity_bitmap_index(places_version)
+        bits, filters = amenity_filters(index, amenity_ids, amenity_mode)
+        page = await self.place_repo.find_record_page(limit, cursor, min_price=min_price,
+                                               max_price=max_price, min_rating=min_rating,
+                                               sort=sort, profile=profile, **filters)
+        page.facets = facet_list(index, bits)
+        return page
+
+    # Review methods
+    async def get_review(self, review_id, profile=None):
+        return await self.review_repo.get(review_id, profile)
+
+    async def get_many_reviews(self, ids, profile=None):
+        return await self.review_repo.get_many(ids, profile)
+
+    async def get_reviews_page(self, limit, cursor=None, profile=None):
+        return await self.review_repo.get_record_page(limit, cursor, profile=profile)
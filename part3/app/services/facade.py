@@ -1,12 +1,65 @@
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from app.extensions import db, password_hasher
 from app.models.user import User
 from app.models.amenity import Amenity
-from app.models.place import Place
+from app.models.place import Place, grid_cell
 from app.models.review import Review
-from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.repository import (IN_CHUNK_SIZE, SQLAlchemyRepository, in_unit_of_work,
+                                        on_commit, unit_of_work)
+from app.persistence.versions import committed_versions
 from app.services.repositories.user_repository import UserRepository
 from app.services.repositories.amenity_repository import AmenityRepository
 from app.services.repositories.place_repository import PlaceRepository
 from app.services.repositories.review_repository import ReviewRepository
+from app.services.geo_index import PlaceGeoIndex
+from app.services.amenity_index import AmenityBitmapIndex
+from app.services.cache import LRUCache
+
+# Amenity filters matching more places than this are evaluated in SQL
+# rather than as an id list taken from the bitmap index; the list becomes
+# one IN (...), so it stays within the bound parameters of one chunk.
+MAX_BITMAP_ID_FILTER = IN_CHUNK_SIZE
+
+
+def amenity_filters(index, amenity_ids, amenity_mode='all'):
+    """The bitset matching an amenity selection (None without one) and the
+    find_page() filters applying it."""
+    if not amenity_ids:
+        return None, {}
+    bits = index.match(amenity_ids, amenity_mode)
+    if bits.bit_count() <= MAX_BITMAP_ID_FILTER:
+        return bits, {'place_ids': index.place_ids(bits)}
+    return bits, {'amenity_ids': amenity_ids, 'amenity_mode': amenity_mode}
+
+
+def batch_created(obj_id):
+    return {'status': 201, 'id': obj_id}
+
+
+def batch_failed(status, message):
+    return {'status': status, 'message': message}
+
+
+def validated(model, item):
+    """Runs the model constructor's validation on a batch item; returns a
+    transient object with a fresh id, or the batch_failed() result."""
+    if not isinstance(item, dict):
+        return None, batch_failed(400, "Each item must be a JSON object")
+    try:
+        obj = model(**{key: value for key, value in item.items()
+                       if key not in ('id', 'amenities')})
+    except (ValueError, TypeError) as e:
+        return None, batch_failed(400, str(e))
+    obj.id = str(uuid.uuid4())
+    return obj, None
+
+
+def facet_list(index, bits):
+    return [{'amenity_id': amenity_id, 'count': count}
+            for amenity_id, count in index.facet_counts(bits).items()]
 
 
 class HBnBFacade:
@@ -15,6 +68,52 @@ class HBnBFacade:
         self.amenity_repo = AmenityRepository()
         self.place_repo = PlaceRepository()
         self.review_repo = ReviewRepository()
+        self.place_geo_index = PlaceGeoIndex()
+        self.amenity_index = AmenityBitmapIndex()
+        # Serialized place detail documents, keyed by place id
+        self.place_cache = LRUCache()
+
+    def init_app(self, app):
+        """Drops in-process state built against a previously bound database."""
+        self.place_geo_index.reset()
+        self.amenity_index.reset()
+        self.place_cache.configure(app.config.get('PLACE_CACHE_SIZE', 1024),
+                                   app.config.get('PLACE_CACHE_TTL', 300))
+
+    @contextmanager
+    def unit_of_work(self):
+        """Runs the facade writes made inside the block as one transaction.
+
+        Each write flushes instead of committing; the block commits once on
+        exit, or rolls everything back on an exception. The in-memory
+        indexes, updated as writes happen, are then dropped to be reloaded
+        from the database.
+        """
+        try:
+            with unit_of_work():
+                yield self
+        except BaseException:
+            if not in_unit_of_work():
+                self.place_geo_index.reset()
+                self.amenity_index.reset()
+                self.place_cache.clear()
+            raise
+
+    def _invalidate_places(self, *place_ids):
+        # Again after the commit: a reader may re-cache the old row meanwhile
+        self.place_cache.invalidate(*place_ids)
+        if in_unit_of_work():
+            on_commit(lambda: self.place_cache.invalidate(*place_ids))
+
+    def _catch_up(self, *indexes):
+        """Moves `indexes` past the commit of the write just made instead of
+        reloading them for it: they hold its changes once the facade has
+        applied them, which inside a unit of work it does before the commit.
+        Call right after the repository write, before the session reads
+        again and starts a transaction that forgets the committed versions.
+        """
+        on_commit(lambda: [index.catch_up(committed_versions(db.session))
+                           for index in indexes])
 
     # User methods
     def create_user(self, user_data):
@@ -22,22 +121,56 @@ class HBnBFacade:
         self.user_repo.add(user)
         return user
 
-    def get_user(self, user_id):
-        return self.user_repo.get(user_id)
+    def get_user(self, user_id, profile=None):
+        return self.user_repo.get(user_id, profile)
+
+    def get_many_users(self, ids, profile=None):
+        return self.user_repo.get_many(ids, profile)
 
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit, cursor=None, profile=None):
+        return self.user_repo.get_record_page(limit, cursor, profile=profile)
+
+    def stream_users(self, batch_size=1000):
+        return self.user_repo.stream(batch_size)
+
+    def get_user_version(self, user_id):
+        return self.user_repo.get_version(user_id)
+
+    def get_users_version(self):
+        return self.user_repo.get_collection_version()
+
     def update_user(self, user_id, update_data):
+        if 'password' in update_data:
+            update_data = dict(update_data,
+                               password=password_hasher.hash(update_data['password']))
         self.user_repo.update(user_id, update_data)
+        self._invalidate_places(*self.place_repo.get_ids_by_owner(user_id))
         return {"message": "User updated successfully"}
 
     def get_user_by_email(self, email):
         """Retrieves a user by their email address."""
         return self.user_repo.get_user_by_email(email)
 
+    def authenticate(self, email, password):
+        """Returns the user owning these credentials, or None.
+
+        A hash made with another work factor than BCRYPT_LOG_ROUNDS is
+        replaced while the plain password is at hand.
+        """
+        user = self.user_repo.get_user_by_email(email)
+        if not user or not user.verify_password(password):
+            return None
+        if user.needs_rehash():
+            self.user_repo.update(user.id, {'password': password_hasher.hash(password)})
+        return user
+
     def delete_user(self, user_id):
+        place_ids = self.place_repo.get_ids_by_owner(user_id)
         self.user_repo.delete(user_id)
+        self._invalidate_places(*place_ids)
 
     # Amenity methods
     def create_amenity(self, amenity_data):
@@ -45,77 +178,383 @@ class HBnBFacade:
         self.amenity_repo.add(amenity)
         return amenity
 
-    def get_amenity(self, amenity_id):
-        return self.amenity_repo.get(amenity_id)
+    def create_amenities(self, items):
+        """Creates many amenities with one INSERT; returns a result per item.
+
+        Names already taken, in the database (one IN query) or earlier in
+        the batch, are reported with status 409.
+        """
+        results, rows = [], []
+        amenities = [validated(Amenity, item) for item in items]
+        taken = self.amenity_repo.get_existing_values(
+            'name', [amenity.name for amenity, _ in amenities
+                     if amenity and isinstance(amenity.name, str)])
+        for amenity, error in amenities:
+            if amenity and not isinstance(amenity.name, str):
+                error = batch_failed(400, "Amenity name must be a string")
+            elif amenity and amenity.name in taken:
+                error = batch_failed(409, f"Amenity '{amenity.name}' already exists")
+            if error:
+                results.append(error)
+                continue
+            taken.add(amenity.name)
+            rows.append({'id': amenity.id, 'name': amenity.name})
+            results.append(batch_created(amenity.id))
+        self.amenity_repo.add_many(rows)
+        return results
+
+    def get_amenity(self, amenity_id, profile=None):
+        return self.amenity_repo.get(amenity_id, profile)
+
+    def get_many_amenities(self, ids, profile=None):
+        return self.amenity_repo.get_many(ids, profile)
 
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, cursor=None, profile=None):
+        return self.amenity_repo.get_record_page(limit, cursor, profile=profile)
+
+    def stream_amenities(self, batch_size=1000):
+        return self.amenity_repo.stream(batch_size)
+
+    def get_amenities_version(self):
+        return self.amenity_repo.get_collection_version()
+
     def update_amenity(self, amenity_id, data):
         self.amenity_repo.update(amenity_id, data)
+        self._invalidate_places(*self.place_repo.get_ids_with_amenity(amenity_id))
         return {"message": "Amenity updated successfully"}
 
     def delete_amenity(self, amenity_id):
+        place_ids = self.place_repo.get_ids_with_amenity(amenity_id)
         self.amenity_repo.delete(amenity_id)
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        self._invalidate_places(*place_ids)
+        self.amenity_index.remove_amenity(amenity_id)
+
+    def _resolve_amenities(self, amenity_ids):
+        amenities = self.amenity_repo.get_many(amenity_ids)
+        for amenity_id, amenity in zip(amenity_ids, amenities):
+            if amenity is None:
+                raise ValueError(f"Amenity ID {amenity_id} is invalid")
+        return amenities
+
+    def _index_version(self, places_version=None):
+        """Version the in-process place indexes are checked against, taken
+        from a get_places_version() row when the caller has one."""
+        if places_version is None:
+            return self.place_repo.get_index_version()
+        return self.place_repo.index_version(places_version)
+
+    def _amenity_bitmap_index(self, places_version=None):
+        """The amenity index, reloaded when place_amenity changed since it
+        was loaded, also by writes from other processes."""
+        version = self._index_version(places_version)
+        if not self.amenity_index.is_current(version):
+            self.amenity_index.load(self.place_repo.get_amenity_links(), version)
+        return self.amenity_index
 
     # Place methods
     def create_place(self, place_data):
         owner_id = place_data.get("owner_id")
-        if not self.user_repo.get(owner_id):
+        if not self.user_repo.exists(owner_id):
             raise ValueError("Invalid owner_id")
         
         amenity_ids = place_data.pop("amenities", [])
-        place = Place(**place_data)
-        
-        for amenity_id in amenity_ids:
-            amenity = self.amenity_repo.get(amenity_id)
-            if not amenity:
-                raise ValueError(f"Amenity ID {amenity_id} is invalid")
-            place.amenities.append(amenity)
+        place = Place(**place_data, amenities=self._resolve_amenities(amenity_ids))
 
         self.place_repo.add(place)
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        if self.place_geo_index.loaded:
+            self.place_geo_index.upsert(place.id, place.latitude, place.longitude)
+        if self.amenity_index.loaded:
+            # The ids as sent: reading them off the committed (expired)
+            # amenities would reload each one with its own SELECT
+            self.amenity_index.set_place_amenities(place.id, list(amenity_ids))
         return place
 
-    def get_place(self, place_id):
-        return self.place_repo.get(place_id)
+    def create_places(self, items):
+        """Creates many places in one transaction; returns a result per item.
+
+        Owners and amenities are checked with one IN query each for the
+        whole batch, and places and their amenity links are written with
+        one executemany INSERT each. Invalid items are reported and skipped.
+        """
+        places = [validated(Place, item) for item in items]
+        owners = self.user_repo.exists_many(
+            [place.owner_id for place, _ in places
+             if place and isinstance(place.owner_id, str)])
+        amenity_ids = [item.get('amenities') or [] if isinstance(item, dict) else []
+                       for item in items]
+        known_amenities = self.amenity_repo.exists_many(
+            [amenity_id for ids in amenity_ids if isinstance(ids, list)
+             for amenity_id in ids if isinstance(amenity_id, str)])
+        results, rows, links, created = [], [], [], []
+        for (place, error), linked in zip(places, amenity_ids):
+            if place and (not isinstance(place.owner_id, str) or place.owner_id not in owners):
+                error = batch_failed(400, "Invalid owner_id")
+            elif place and not isinstance(linked, list):
+                error = batch_failed(400, "amenities must be a list of amenity IDs")
+            elif place:
+                missing = [amenity_id for amenity_id in linked
+                           if not isinstance(amenity_id, str) or amenity_id not in known_amenities]
+                if missing:
+                    error = batch_failed(400, f"Amenity ID {missing[0]} is invalid")
+            if error:
+                results.append(error)
+                continue
+            linked = list(dict.fromkeys(linked))
+            rows.append({'id': place.id, 'title': place.title, 'description': place.description,
+                         'price': place.price, 'latitude': place.latitude,
+                         'longitude': place.longitude, 'owner_id': place.owner_id,
+                         'grid_cell': grid_cell(place.latitude, place.longitude)})
+            links.extend({'place_id': place.id, 'amenity_id': amenity_id} for amenity_id in linked)
+            created.append((place, linked))
+            results.append(batch_created(place.id))
+        with self.unit_of_work():
+            self.place_repo.add_many(rows)
+            self.place_repo.add_amenity_links(links)
+            self._catch_up(self.place_geo_index, self.amenity_index)
+            for place, linked in created:
+                if self.place_geo_index.loaded:
+                    self.place_geo_index.upsert(place.id, place.latitude, place.longitude)
+                if self.amenity_index.loaded:
+                    self.amenity_index.set_place_amenities(place.id, linked)
+        return results
+
+    def get_place(self, place_id, profile=None):
+        return self.place_repo.get(place_id, profile)
+
+    def get_place_document(self, place_id, serialize, version=None):
+        """Read-through cache of `serialize(place)` for the place detail view.
+
+        Returns None when the place does not exist. Documents are cached
+        under the place's get_place_version(), read here unless the caller
+        already has it, so one cached before a write made by another
+        process is a miss rather than a stale hit. Facade writes also drop
+        the entries they touch, and PLACE_CACHE_TTL bounds their lifetime.
+        """
+        if version is None:
+            version = self.get_place_version(place_id)
+            if version is None:
+                return None
+        document = self.place_cache.get(place_id, version)
+        if document is None:
+            place = self.place_repo.get(place_id, 'place_detail')
+            if place is None:
+                return None
+            document = serialize(place)
+            self.place_cache.set(place_id, document, version)
+        return document
+
+    def stream_places(self, batch_size=1000):
+        return self.place_repo.stream(batch_size, profile='place_export')
+
+    def get_place_owner(self, place_id):
+        """owner_id of a place, or None if it does not exist."""
+        row = self.place_repo.get_columns(place_id, 'owner_id')
+        return row and row.owner_id
+
+    def get_place_version(self, place_id):
+        return self.place_repo.get_version(place_id)
+
+    def get_places_version(self):
+        return self.place_repo.get_collection_version()
+
+    def get_place_cache_stats(self):
+        return self.place_cache.stats()
+
+    def get_many_places(self, ids, profile=None):
+        return self.place_repo.get_many(ids, profile)
 
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    def get_places_page(self, limit, cursor=None, profile=None, min_price=None,
+                        max_price=None, sort='created_at', amenity_ids=None,
+                        amenity_mode='all', min_rating=None, places_version=None):
+        """Pages through places; the page carries per-amenity facet counts.
+
+        Facet counts cover the places matching the amenity selection (all
+        places when there is none), independent of the price filters.
+        Pass the get_places_version() row already read, if any, to save
+        the amenity index its freshness check.
+        """
+        index = self._amenity_bitmap_index(places_version)
+        bits, filters = amenity_filters(index, amenity_ids, amenity_mode)
+        page = self.place_repo.find_record_page(limit, cursor, min_price=min_price,
+                                         max_price=max_price, min_rating=min_rating,
+                                         sort=sort, profile=profile, **filters)
+        page.facets = facet_list(index, bits)
+        return page
+
+    def search_places(self, limit, cursor=None, text_query=None, bbox=None, profile=None):
+        """Pages through places matching free text and/or a bounding box.
+
+        `bbox` is (min_lat, min_lon, max_lat, max_lon). Text matches come back
+        as PlaceSearchHit items ranked by relevance.
+        """
+        if text_query:
+            return self.place_repo.search_text(text_query, limit, cursor, bbox=bbox,
+                                               profile=profile)
+        return self.place_repo.find_record_page(limit, cursor, bbox=bbox, profile=profile)
+
+    def get_nearby_places(self, latitude, longitude, k, max_km=None, profile=None):
+        """Returns up to k (place, distance_km) pairs, closest first."""
+        version = self._index_version()
+        if not self.place_geo_index.is_current(version):
+            self.place_geo_index.load(self.place_repo.get_coordinates(), version)
+        hits = self.place_geo_index.nearest(latitude, longitude, k, max_km)
+        places = self.place_repo.get_many([place_id for place_id, _ in hits], profile)
+        return [(place, distance) for place, (_, distance) in zip(places, hits)
+                if place is not None]
+
+    def rebuild_search_index(self):
+        self.place_repo.rebuild_search_index()
+
     def update_place(self, place_id, data):
-        self.place_repo.update(place_id, data)
+        if 'amenities' in data:
+            # Relinking amenities writes no places column, so bump updated_at
+            # explicitly to move the place's ETag/Last-Modified
+            data = dict(data, amenities=self._resolve_amenities(data['amenities']),
+                        updated_at=datetime.utcnow())
+            # Read before the commit expires the amenities, not once each after it
+            amenity_ids = [amenity.id for amenity in data['amenities']]
+        place = self.place_repo.update(place_id, data)
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        self._invalidate_places(place_id)
+        # An unknown id must not enter the indexes as a phantom place
+        if place and self.amenity_index.loaded and 'amenities' in data:
+            self.amenity_index.set_place_amenities(place_id, amenity_ids)
+        if place and self.place_geo_index.loaded and ('latitude' in data or 'longitude' in data):
+            self.place_geo_index.upsert(place.id, place.latitude, place.longitude)
         return {"message": "Place updated successfully"}
 
     def delete_place(self, place_id):
         self.place_repo.delete(place_id)
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        self._invalidate_places(place_id)
+        self.place_geo_index.remove(place_id)
+        self.amenity_index.remove_place(place_id)
 
     # Review methods
     def create_review(self, review_data):
         user_id = review_data.get("user_id")
-        if not self.user_repo.get(user_id):
+        if not self.user_repo.exists(user_id):
             raise ValueError("Invalid user_id")
         place_id = review_data.get("place_id")
-        if not self.place_repo.get(place_id):
+        if not self.place_repo.exists(place_id):
             raise ValueError("Invalid place_id")
         review = Review(**review_data)
+        # Aggregates are bumped in the same transaction the review commits in
+        self.place_repo.apply_review_delta(place_id, added_rating=review.rating)
         self.review_repo.add(review)
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        self._invalidate_places(place_id)
         return review
 
-    def get_review(self, review_id):
-        return self.review_repo.get(review_id)
+    def create_reviews(self, items):
+        """Creates many reviews in one transaction; returns a result per item.
+
+        Authors and places are checked with one IN query each, reviews are
+        inserted with one executemany INSERT and the review aggregates of
+        every touched place are bumped with one executemany UPDATE.
+        """
+        reviews = [validated(Review, item) for item in items]
+        users = self.user_repo.exists_many(
+            [review.user_id for review, _ in reviews
+             if review and isinstance(review.user_id, str)])
+        places = self.place_repo.exists_many(
+            [review.place_id for review, _ in reviews
+             if review and isinstance(review.place_id, str)])
+        results, rows = [], []
+        ratings = defaultdict(list)
+        for review, error in reviews:
+            if review and (not isinstance(review.user_id, str) or review.user_id not in users):
+                error = batch_failed(400, "Invalid user_id")
+            elif review and (not isinstance(review.place_id, str)
+                             or review.place_id not in places):
+                error = batch_failed(400, "Invalid place_id")
+            if error:
+                results.append(error)
+                continue
+            rows.append({'id': review.id, 'text': review.text, 'rating': review.rating,
+                         'user_id': review.user_id, 'place_id': review.place_id})
+            ratings[review.place_id].append(review.rating)
+            results.append(batch_created(review.id))
+        with self.unit_of_work():
+            self.place_repo.add_review_ratings(ratings)
+            self.review_repo.add_many(rows)
+            self._catch_up(self.place_geo_index, self.amenity_index)
+            self._invalidate_places(*ratings)
+        return results
+
+    def get_review(self, review_id, profile=None):
+        return self.review_repo.get(review_id, profile)
+
+    def get_many_reviews(self, ids, profile=None):
+        return self.review_repo.get_many(ids, profile)
 
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit, cursor=None, profile=None):
+        return self.review_repo.get_record_page(limit, cursor, profile=profile)
+
+    def stream_reviews(self, batch_size=1000):
+        return self.review_repo.stream(batch_size)
+
+    def get_review_author(self, review_id):
+        """user_id of a review, or None if it does not exist."""
+        row = self.review_repo.get_columns(review_id, 'user_id')
+        return row and row.user_id
+
+    def get_review_version(self, review_id):
+        return self.review_repo.get_version(review_id)
+
+    def get_reviews_version(self):
+        return self.review_repo.get_collection_version()
+
     def get_reviews_by_place(self, place_id):
-        if not self.place_repo.get(place_id):
+        if not self.place_repo.exists(place_id):
             raise ValueError("Place not found")
         return self.review_repo.get_reviews_by_place(place_id)
 
     def update_review(self, review_id, data):
+        review = self.review_repo.get(review_id)
+        stale_places = ()
+        if review:
+            place_id = data.get('place_id', review.place_id)
+            rating = data.get('rating', review.rating)
+            if not isinstance(rating, int) or not (1 <= rating <= 5):
+                raise ValueError("Rating must be between 1 and 5")
+            if place_id != review.place_id:
+                if not self.place_repo.exists(place_id):
+                    raise ValueError("Invalid place_id")
+                self.place_repo.apply_review_delta(review.place_id, removed_rating=review.rating)
+                self.place_repo.apply_review_delta(place_id, added_rating=rating)
+            elif rating != review.rating:
+                self.place_repo.apply_review_delta(place_id, review.rating, rating)
+            stale_places = (review.place_id, place_id)
         self.review_repo.update(review_id, data)
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        self._invalidate_places(*stale_places)
         return {"message": "Review updated successfully"}
 
     def delete_review(self, review_id):
+        review = self.review_repo.get(review_id)
+        stale_places = ()
+        if review:
+            self.place_repo.apply_review_delta(review.place_id, removed_rating=review.rating)
+            stale_places = (review.place_id,)
         self.review_repo.delete(review_id)
-        return {"message": "Review deleted successfully"}
\ No newline at end of file
+        self._catch_up(self.place_geo_index, self.amenity_index)
+        self._invalidate_places(*stale_places)
+        return {"message": "Review deleted successfully"}
+
+    def recompute_review_aggregates(self):
+        """Rebuilds review_count/rating_sum/histograms for every place."""
+        count = self.place_repo.recompute_review_aggregates()
+        self.place_cache.clear()
+        return count
\ No newline at end of file
@@ -0,0 +1,233 @@
+import heapq
+import threading
+
+import numpy as np
+
+from app.persistence.versions import caught_up
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 32
+# The tree is rebuilt once pending inserts plus tombstones exceed this share
+# of its size (and at least REBUILD_MIN_CHANGES of them have piled up).
+REBUILD_FRACTION = 0.05
+REBUILD_MIN_CHANGES = 256
+
+
+def unit_vectors(latitudes, longitudes):
+    """Maps degrees onto points of the unit sphere, one row per point."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def haversine_km(lat, lon, latitudes, longitudes):
+    """Great-circle distance from one point to an array of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def chord_sq_for_km(km):
+    """Squared straight-line distance between two unit-sphere points km apart.
+
+    Chord length grows monotonically with arc length, so nearest neighbours
+    in 3-D Euclidean space are also nearest along the surface.
+    """
+    angle = min(km / EARTH_RADIUS_KM, np.pi)
+    return (2 * np.sin(angle / 2)) ** 2
+
+
+class KDTree:
+    """Static KD tree over 3-D points, stored as flat NumPy arrays."""
+    def __init__(self, points):
+        self.points = points
+        count = len(points)
+        self.order = np.arange(count)
+        self.starts, self.ends = [], []
+        self.children = []
+        lows, highs = [], []
+
+        if count:
+            stack = [(0, count, None, 0)]
+            while stack:
+                start, end, parent, side = stack.pop()
+                node = len(self.starts)
+                if parent is not None:
+                    self.children[parent][side] = node
+                members = self.order[start:end]
+                box = points[members]
+                low, high = box.min(axis=0), box.max(axis=0)
+                self.starts.append(start)
+                self.ends.append(end)
+                self.children.append([None, None])
+                lows.append(low)
+                highs.append(high)
+
+                if end - start > LEAF_SIZE:
+                    axis = int(np.argmax(high - low))
+                    middle = (end - start) // 2
+                    split = np.argpartition(box[:, axis], middle)
+                    self.order[start:end] = members[split]
+                    stack.append((start + middle, end, node, 1))
+                    stack.append((start, start + middle, node, 0))
+
+        self.lows = np.array(lows).reshape(-1, 3)
+        self.highs = np.array(highs).reshape(-1, 3)
+
+    def _box_distance_sq(self, node, point):
+        gap = np.maximum(self.lows[node] - point, 0) + np.maximum(point - self.highs[node], 0)
+        return float(gap @ gap)
+
+    def query(self, point, k, bound_sq=np.inf, alive=None):
+        """Indices and squared distances of the k nearest points within bound_sq.
+
+        `alive`, when given, is a boolean mask over the points; entries that
+        are False are skipped.
+        """
+        best_idx = np.empty(0, dtype=np.int64)
+        best_sq = np.empty(0, dtype=np.float64)
+        if not self.starts or k < 1:
+            return best_idx, best_sq
+
+        heap = [(self._box_distance_sq(0, point), 0)]
+        while heap:
+            box_sq, node = heapq.heappop(heap)
+            worst = best_sq[-1] if len(best_sq) == k else bound_sq
+            if box_sq > worst:
+                break
+            left, right = self.children[node]
+            if left is not None:
+                for child in (left, right):
+                    child_sq = self._box_distance_sq(child, point)
+                    if child_sq <= worst:
+                        heapq.heappush(heap, (child_sq, child))
+                continue
+
+            members = self.order[self.starts[node]:self.ends[node]]
+            delta = self.points[members] - point
+            dist_sq = np.einsum('ij,ij->i', delta, delta)
+            keep = dist_sq <= bound_sq
+            if alive is not None:
+                keep &= alive[members]
+            best_idx = np.concatenate((best_idx, members[keep]))
+            best_sq = np.concatenate((best_sq, dist_sq[keep]))
+            ranked = np.argsort(best_sq, kind='stable')[:k]
+            best_idx, best_sq = best_idx[ranked], best_sq[ranked]
+        return best_idx, best_sq
+
+
+class PlaceGeoIndex:
+    """k-nearest-neighbour index over place coordinates.
+
+    Writes land in a small pending buffer (scanned brute force) and mask out
+    the stale tree entry; the tree is rebuilt from scratch once the
+    buffer grows past REBUILD_FRACTION of the indexed places. The index is
+    per process: it is filled lazily from the database, kept current by the
+    facade's place write methods, which also move its version past their
+    own commits (catch_up()), and reloaded when the places collection
+    version moves past it for any other reason, such as another process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.loaded = False
+            self.version = None
+            self._ids = np.empty(0, dtype=object)
+            self._positions = {}
+            self._latitudes = np.empty(0)
+            self._longitudes = np.empty(0)
+            self._alive = np.empty(0, dtype=bool)
+            self._tree = KDTree(np.empty((0, 3)))
+            self._pending = {}
+            self._removed = set()
+
+    def load(self, rows, version=None):
+        """Replaces the index contents with (id, latitude, longitude) rows
+        read at `version`, see is_current()."""
+        with self._lock:
+            self._ids = np.empty(0, dtype=object)
+            self._latitudes = np.empty(0)
+            self._longitudes = np.empty(0)
+            self._pending = {place_id: (lat, lon) for place_id, lat, lon in rows}
+            self._removed = set()
+            self._rebuild()
+            self.version = version
+            self.loaded = True
+
+    def is_current(self, version):
+        """Whether the index was loaded at `version`; writes made by other
+        processes move the version and call for a reload."""
+        return self.loaded and self.version == version
+
+    def catch_up(self, committed):
+        """Moves the index to the collection versions of a commit made by
+        this process whose changes it already holds, so it is not reloaded
+        for them; see caught_up()."""
+        with self._lock:
+            if self.loaded:
+                self.version = caught_up(self.version, committed) or self.version
+
+    def upsert(self, place_id, latitude, longitude):
+        with self._lock:
+            self._tombstone(place_id)
+            self._pending[place_id] = (float(latitude), float(longitude))
+            self._maybe_rebuild()
+
+    def remove(self, place_id):
+        with self._lock:
+            self._pending.pop(place_id, None)
+            self._tombstone(place_id)
+            self._maybe_rebuild()
+
+    def nearest(self, latitude, longitude, k, max_km=None):
+        """Returns up to k (place_id, distance_km) pairs, closest first."""
+        bound_sq = np.inf if max_km is None else chord_sq_for_km(max_km)
+        point = unit_vectors([latitude], [longitude])[0]
+
+        with self._lock:
+            tree_idx, _ = self._tree.query(point, k, bound_sq, self._alive)
+            candidates = [(self._ids[i], self._latitudes[i], self._longitudes[i])
+                          for i in tree_idx]
+            candidates.extend((place_id, lat, lon)
+                              for place_id, (lat, lon) in self._pending.items())
+
+        if not candidates:
+            return []
+        ids, lats, lons = zip(*candidates)
+        distances = haversine_km(latitude, longitude, lats, lons)
+        ranked = np.argsort(distances, kind='stable')[:k]
+        return [(ids[i], float(distances[i])) for i in ranked
+                if max_km is None or distances[i] <= max_km]
+
+    def _tombstone(self, place_id):
+        position = self._positions.get(place_id)
+        if position is not None and self._alive[position]:
+            self._alive[position] = False
+            self._removed.add(place_id)
+
+    def _maybe_rebuild(self):
+        changes = len(self._pending) + len(self._removed)
+        if changes >= max(REBUILD_MIN_CHANGES, REBUILD_FRACTION * len(self._ids)):
+            self._rebuild()
+
+    def _rebuild(self):
+        rows = {place_id: (lat, lon)
+                for place_id, lat, lon in zip(self._ids, self._latitudes, self._longitudes)
+                if place_id not in self._removed}
+        rows.update(self._pending)
+
+        self._ids = np.array(list(rows), dtype=object)
+        coordinates = np.array(list(rows.values()), dtype=np.float64).reshape(-1, 2)
+        self._latitudes, self._longitudes = coordinates[:, 0], coordinates[:, 1]
+        self._positions = {place_id: i for i, place_id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._tree = KDTree(unit_vectors(self._latitudes, self._longitudes))
+        self._pending = {}
+        self._removed = set()
@@ -1,7 +1,13 @@
 from app.models.amenity import Amenity
 from app.extensions import db
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
 
 class AmenityRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Amenity)
+
+
+class AsyncAmenityRepository(AsyncSQLAlchemyRepository):
+    def __init__(self, database):
+        super().__init__(Amenity, database)
@@ -1,7 +1,383 @@
-from app.models.place import Place
+import re
+from sqlalchemy import (and_, bindparam, column, exists, func, insert, literal_column, or_, select,
+                        table, text, update)
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.place import Place, place_amenity, GRID_COLUMNS, grid_row, grid_column
+from app.models.review import Review
+from app.models.user import User
+from app.models.amenity import Amenity
 from app.extensions import db
-from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.records import RecordRelation
+from app.persistence.repository import SQLAlchemyQueries, SQLAlchemyRepository, commit
+from app.persistence.versions import versions_by_table, versions_statement
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
+
+places_fts = table('places_fts', column('rowid'))
+FTS_RANK = func.bm25(literal_column('places_fts'), 10.0, 1.0)  # title weighs 10x description
+FTS_SNIPPET = func.snippet(literal_column('places_fts'), -1, '<mark>', '</mark>', '…', 16)
+
+
+def fts_query(text_query):
+    """Turns free text into a safe FTS5 expression: every word must match,
+    the last one as a prefix so results follow the user while they type."""
+    words = re.findall(r'\w+', text_query)
+    if not words:
+        raise ValueError("Search text must contain at least one word")
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def average_rating_expression():
+    """SQL twin of Place.average_rating, 0 for places without reviews."""
+    return func.coalesce(Place.rating_sum * 1.0 / func.nullif(Place.review_count, 0), 0)
+
+
+class PlaceSearchHit:
+    """A place plus its full-text relevance, marshalled like a Place."""
+    __slots__ = ('place', 'score', 'snippet')
+
+    def __init__(self, place, score=None, snippet=None):
+        self.place = place
+        self.score = score
+        self.snippet = snippet
+
+    def __getattr__(self, name):
+        return getattr(self.place, name)
+
+
+# Above this many grid rows a viewport is scanned as one contiguous band
+# of cells instead of one range per row.
+MAX_GRID_ROW_RANGES = 64
+
+
+class PlaceQueries(SQLAlchemyQueries):
+    """Place statements shared by PlaceRepository and AsyncPlaceRepository."""
+    profiles = {
+        # A page of places: owner rides along in the main SELECT, the two
+        # collections are fetched with one IN (...) query each.
+        'place_card': lambda: (
+            joinedload(Place.owner),
+            selectinload(Place.amenities),
+            selectinload(Place.reviews),
+        ),
+        # A single place: owner and amenities in one joined SELECT, reviews
+        # kept separate so they do not multiply the amenity rows.
+        'place_detail': lambda: (
+            joinedload(Place.owner),
+            joinedload(Place.amenities),
+            selectinload(Place.reviews),
+        ),
+        # Full dumps: amenity ids are fetched once per streamed batch
+        'place_export': lambda: (
+            selectinload(Place.amenities),
+        ),
+    }
+
+    expansions = {
+        'owner': lambda: joinedload(Place.owner),
+        'amenities': lambda: selectinload(Place.amenities),
+        'reviews': lambda: selectinload(Place.reviews),
+    }
+    derived_fields = {
+        'average_rating': ('review_count', 'rating_sum'),
+        'rating_histogram': tuple(f'rating_{stars}' for stars in range(1, 6)),
+    }
+    # Embedded records carry the columns the place card shows of them
+    record_relations = {
+        'owner': RecordRelation('owner_id', User, ('id', 'first_name', 'last_name', 'email'),
+                                User.id, joined=True),
+        'amenities': RecordRelation(
+            'id', Amenity, ('id', 'name'), place_amenity.c.place_id,
+            joins=[(place_amenity, place_amenity.c.amenity_id == Amenity.id)], many=True),
+        'reviews': RecordRelation('id', Review, ('id', 'text', 'rating', 'user_id'),
+                                  Review.place_id, many=True),
+    }
+    default_record_relations = ('owner', 'amenities', 'reviews')
+    # Place pages embed owners, amenities and reviews, so a change to any
+    # of those tables makes every page stale
+    version_tables = ('places', 'users', 'amenities', 'reviews', 'place_amenity')
+    # What the in-process geo and amenity indexes are built from
+    index_tables = ('places', 'place_amenity')
+
+    # sort name -> (callable building the sort expression, descending)
+    sorts = {
+        'created_at': (lambda: Place.created_at, False),
+        '-created_at': (lambda: Place.created_at, True),
+        'price': (lambda: Place.price, False),
+        '-price': (lambda: Place.price, True),
+        # Best rated first; places without reviews rank as 0
+        'rating': (lambda: average_rating_expression(), True),
+    }
 
-class PlaceRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Place)
+
+    def find_arguments(self, min_price=None, max_price=None, bbox=None, sort='created_at',
+                       place_ids=None, amenity_ids=None, amenity_mode='all', min_rating=None):
+        """get_page() arguments selecting the places matching the filters, in
+        `sort` order.
+
+        `place_ids` restricts the page to a precomputed candidate set;
+        `amenity_ids` filters through place_amenity in SQL instead, requiring
+        all of them (amenity_mode='all') or at least one ('any').
+        """
+        criteria = self._filter_criteria(min_price, max_price, bbox)
+        if min_rating is not None:
+            criteria.append(average_rating_expression() >= min_rating)
+        if place_ids is not None:
+            criteria.append(Place.id.in_(place_ids))
+        if amenity_ids:
+            criteria.append(self.amenity_criteria(amenity_ids, amenity_mode))
+        if sort not in self.sorts:
+            raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(self.sorts)}")
+        sort_key, descending = self.sorts[sort]
+        return {'criteria': criteria, 'sort': sort, 'sort_key': sort_key(),
+                'descending': descending}
+
+    def _filter_criteria(self, min_price, max_price, bbox):
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price cannot be greater than max_price")
+
+        criteria = []
+        if min_price is not None:
+            criteria.append(Place.price >= min_price)
+        if max_price is not None:
+            criteria.append(Place.price <= max_price)
+        if bbox is not None:
+            criteria.extend(self.bbox_criteria(*bbox))
+        return criteria
+
+    def amenity_criteria(self, amenity_ids, mode='all'):
+        def offers(condition):
+            return exists().where(place_amenity.c.place_id == Place.id, condition)
+
+        if mode == 'any':
+            return offers(place_amenity.c.amenity_id.in_(amenity_ids))
+        return and_(*[offers(place_amenity.c.amenity_id == amenity_id)
+                      for amenity_id in amenity_ids])
+
+    def bbox_criteria(self, min_lat, min_lon, max_lat, max_lon):
+        """Filter terms selecting the places inside a bounding box.
+
+        The grid_cell ranges let the index narrow the candidates down to the
+        cells touching the box; the exact latitude/longitude terms then drop
+        the points that fall in those cells but outside the box. A box with
+        min_lon > max_lon wraps around the antimeridian.
+        """
+        if min_lon <= max_lon:
+            column_spans = [(grid_column(min_lon), grid_column(max_lon))]
+            lon_filter = Place.longitude.between(min_lon, max_lon)
+        else:
+            column_spans = [(grid_column(min_lon), GRID_COLUMNS - 1),
+                            (0, grid_column(max_lon))]
+            lon_filter = or_(Place.longitude >= min_lon, Place.longitude <= max_lon)
+
+        first_row, last_row = grid_row(min_lat), grid_row(max_lat)
+        if last_row - first_row + 1 > MAX_GRID_ROW_RANGES:
+            cell_filter = Place.grid_cell.between(first_row * GRID_COLUMNS,
+                                                  (last_row + 1) * GRID_COLUMNS - 1)
+        else:
+            cell_filter = or_(*[
+                Place.grid_cell.between(row * GRID_COLUMNS + first_col,
+                                        row * GRID_COLUMNS + last_col)
+                for row in range(first_row, last_row + 1)
+                for first_col, last_col in column_spans
+            ])
+
+        return (cell_filter,
+                and_(Place.latitude.between(min_lat, max_lat), lon_filter))
+
+    def version_statement(self, place_id):
+        """Freshness key of a place detail document: one row, or none when
+        the place does not exist.
+
+        The document embeds the owner, amenities and reviews, so their
+        newest updated_at and their counts are part of the key, all read as
+        scalar subqueries.
+        """
+        def of_place(aggregate, source, link):
+            return select(aggregate).select_from(source).where(link).scalar_subquery()
+
+        amenities = Amenity.__table__.join(place_amenity,
+                                           place_amenity.c.amenity_id == Amenity.id)
+        amenity_link = place_amenity.c.place_id == Place.id
+        review_link = Review.place_id == Place.id
+        return (select(Place.id, Place.updated_at,
+                       of_place(User.updated_at, User, User.id == Place.owner_id),
+                       of_place(func.max(Amenity.updated_at), amenities, amenity_link),
+                       of_place(func.count(), amenities, amenity_link),
+                       of_place(func.max(Review.updated_at), Review, review_link),
+                       of_place(func.count(Review.id), Review, review_link))
+                .where(Place.id == place_id))
+
+    def index_version_statement(self):
+        """Freshness key of the in-process place indexes: the collection
+        versions of places and place_amenity."""
+        return versions_statement(self.index_tables)
+
+    def index_version(self, collection_version):
+        """The get_index_version() value, taken from a row of
+        collection_version_statement() the caller already read."""
+        versions = versions_by_table(collection_version, self.version_tables)
+        return {name: versions[name] for name in self.index_tables}
+
+
+class PlaceRepository(PlaceQueries, SQLAlchemyRepository):
+    def find_page(self, limit, cursor=None, profile=None, **filters):
+        """Pages through places matching `filters`, see find_arguments()."""
+        return self.get_page(limit, cursor, profile=profile, **self.find_arguments(**filters))
+
+    def find_record_page(self, limit, cursor=None, profile=None, **filters):
+        """find_page() returning read-only records, see get_record_page()."""
+        return self.get_record_page(limit, cursor, profile=profile,
+                                    **self.find_arguments(**filters))
+
+    def search_text(self, text_query, limit, cursor=None, min_price=None,
+                    max_price=None, bbox=None, profile=None):
+        """Pages through places matching `text_query`, most relevant first.
+
+        On SQLite this runs against the places_fts index with BM25 ranking
+        and highlighted snippets; elsewhere it degrades to LIKE matching in
+        creation order. Items are PlaceSearchHit objects.
+        """
+        criteria = self._filter_criteria(min_price, max_price, bbox)
+        if db.session.get_bind().dialect.name != 'sqlite':
+            for word in re.findall(r'\w+', text_query) or [text_query]:
+                pattern = f"%{word}%"
+                criteria.append(or_(Place.title.ilike(pattern), Place.description.ilike(pattern)))
+            page = self.get_page(limit, cursor, criteria=criteria, profile=profile)
+            page.items = [PlaceSearchHit(place) for place in page.items]
+            return page
+
+        expression = fts_query(text_query)
+        criteria.append(text("places_fts MATCH :fts_query").bindparams(fts_query=expression))
+        page = self.get_page(
+            limit, cursor, criteria=criteria, profile=profile,
+            sort=f"relevance:{expression}", sort_key=FTS_RANK,
+            columns=(FTS_RANK, FTS_SNIPPET),
+            joins=[(places_fts, places_fts.c.rowid == literal_column('places.rowid'))])
+        # bm25() is lower-is-better; flip it so clients see higher-is-better
+        page.items = [PlaceSearchHit(place, -rank, snippet)
+                      for place, rank, snippet in page.items]
+        return page
+
+    def rebuild_search_index(self):
+        """Repopulates places_fts from scratch (e.g. after a VACUUM renumbered rowids)."""
+        if db.session.get_bind().dialect.name == 'sqlite':
+            db.session.execute(text("INSERT INTO places_fts(places_fts) VALUES ('rebuild')"))
+            commit()
+
+    def apply_review_delta(self, place_id, removed_rating=None, added_rating=None):
+        """Adjusts a place's review aggregates in the current transaction.
+
+        Pass `added_rating` for a new review, `removed_rating` for a deleted
+        one and both for a rating change. The UPDATE is relative, so
+        concurrent writers cannot lose each other's increments.
+        """
+        count_delta = (added_rating is not None) - (removed_rating is not None)
+        values = {
+            'review_count': Place.review_count + count_delta,
+            'rating_sum': Place.rating_sum + (added_rating or 0) - (removed_rating or 0),
+        }
+        buckets = {}
+        if removed_rating is not None:
+            buckets[removed_rating] = buckets.get(removed_rating, 0) - 1
+        if added_rating is not None:
+            buckets[added_rating] = buckets.get(added_rating, 0) + 1
+        for rating, delta in buckets.items():
+            if delta:
+                column_ = getattr(Place, f'rating_{rating}')
+                values[f'rating_{rating}'] = column_ + delta
+        db.session.execute(update(Place).where(Place.id == place_id).values(**values))
+
+    def add_review_ratings(self, ratings_by_place):
+        """Counts new reviews into their places' aggregates in the current
+        transaction: one executemany UPDATE for {place_id: [rating, ...]}."""
+        if not ratings_by_place:
+            return
+        places = Place.__table__
+        statement = update(places).where(places.c.id == bindparam('place')).values(
+            review_count=places.c.review_count + bindparam('count'),
+            rating_sum=places.c.rating_sum + bindparam('total'),
+            **{f'rating_{stars}': places.c[f'rating_{stars}'] + bindparam(f'stars_{stars}')
+               for stars in range(1, 6)})
+        db.session.execute(statement, [
+            {'place': place_id, 'count': len(ratings), 'total': sum(ratings),
+             **{f'stars_{stars}': ratings.count(stars) for stars in range(1, 6)}}
+            for place_id, ratings in ratings_by_place.items()])
+
+    def recompute_review_aggregates(self):
+        """Rebuilds every place's aggregates from the reviews table."""
+        def reviews_of_place(aggregate, *conditions):
+            return (select(aggregate).where(Review.place_id == Place.id, *conditions)
+                    .scalar_subquery())
+
+        values = {
+            'review_count': reviews_of_place(func.count(Review.id)),
+            'rating_sum': reviews_of_place(func.coalesce(func.sum(Review.rating), 0)),
+        }
+        for rating in range(1, 6):
+            values[f'rating_{rating}'] = reviews_of_place(func.count(Review.id),
+                                                          Review.rating == rating)
+        result = db.session.execute(
+            update(Place).values(**values).execution_options(synchronize_session=False))
+        commit()
+        return result.rowcount
+
+    def get_ids_by_owner(self, owner_id):
+        return db.session.execute(
+            select(Place.id).where(Place.owner_id == owner_id)
+        ).scalars().all()
+
+    def get_ids_with_amenity(self, amenity_id):
+        return db.session.execute(
+            select(place_amenity.c.place_id).where(place_amenity.c.amenity_id == amenity_id)
+        ).scalars().all()
+
+    def get_index_version(self):
+        """{table: (version, updated_at)} of index_tables."""
+        return versions_by_table(db.session.execute(self.index_version_statement()).one(),
+                                 self.index_tables)
+
+    def get_amenity_links(self):
+        """Every (place_id, amenity_id) pair of the place_amenity table."""
+        return db.session.execute(
+            select(place_amenity.c.place_id, place_amenity.c.amenity_id)
+        ).all()
+
+    def add_amenity_links(self, links):
+        """Inserts {'place_id', 'amenity_id'} rows into place_amenity at once."""
+        if links:
+            db.session.execute(insert(place_amenity), links)
+            commit()
+
+    def get_coordinates(self):
+        """(id, latitude, longitude) for every place, without ORM hydration."""
+        return db.session.execute(
+            select(Place.id, Place.latitude, Place.longitude)
+        ).all()
+
+
+class AsyncPlaceRepository(PlaceQueries, AsyncSQLAlchemyRepository):
+    """The place browse and detail reads of PlaceRepository, for the ASGI server."""
+    def __init__(self, database):
+        super().__init__()
+        self.database = database
+
+    async def find_page(self, limit, cursor=None, profile=None, **filters):
+        return await self.get_page(limit, cursor, profile=profile,
+                                   **self.find_arguments(**filters))
+
+    async def find_record_page(self, limit, cursor=None, profile=None, **filters):
+        return await self.get_record_page(limit, cursor, profile=profile,
+                                          **self.find_arguments(**filters))
+
+    async def get_index_version(self):
+        row = (await self.session.execute(self.index_version_statement())).one()
+        return versions_by_table(row, self.index_tables)
+
+    async def get_amenity_links(self):
+        return (await self.session.execute(
+            select(place_amenity.c.place_id, place_amenity.c.amenity_id)
+        )).all()
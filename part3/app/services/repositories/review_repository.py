@@ -1,10 +1,23 @@
 from app.models.review import Review
 from app.extensions import db
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
 
 class ReviewRepository(SQLAlchemyRepository):
+    profiles = {
+        # Review output only carries the user_id/place_id foreign keys
+        'review_summary': lambda: (),
+    }
+
     def __init__(self):
         super().__init__(Review)
 
     def get_reviews_by_place(self, place_id):
         return self.model.query.filter_by(place_id=place_id).all()
+
+
+class AsyncReviewRepository(AsyncSQLAlchemyRepository):
+    profiles = ReviewRepository.profiles
+
+    def __init__(self, database):
+        super().__init__(Review, database)
@@ -1,10 +1,26 @@
 from app.models.user import User
 from app.extensions import db
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
 
 class UserRepository(SQLAlchemyRepository):
+    profiles = {
+        # User output carries no relationships, so none are loaded
+        'user_summary': lambda: (),
+    }
+
     def __init__(self):
         super().__init__(User)
 
     def get_user_by_email(self, email):
         return self.model.query.filter_by(email=email).first()
+
+
+class AsyncUserRepository(AsyncSQLAlchemyRepository):
+    profiles = UserRepository.profiles
+
+    def __init__(self, database):
+        super().__init__(User, database)
+
+    async def get_user_by_email(self, email):
+        return await self.get_by_attribute('email', email)
@@ -0,0 +1,9 @@
+import os
+
+from app.asgi import create_asgi_app
+
+# ASGI entry point, e.g. `uvicorn asgi:app --workers 4`
+app = create_asgi_app(os.getenv('HBNB_CONFIG', 'config.ProductionConfig'))
+
+if not app.flask_app.config.get('SECRET_KEY'):
+    raise RuntimeError("Set SECRET_KEY before starting the production server")
@@ -0,0 +1,61 @@
+"""Compares two load_test.py reports scenario by scenario.
+
+    python benchmarks/compare_reports.py before.json after.json [--threshold 0.10]
+
+Exits with status 1 when a scenario's p95 latency grew by more than the
+threshold, when it issues more SQL statements per request than before, or
+when it fails more requests (in process, query budget violations are 500s).
+"""
+import argparse
+import json
+
+
+def load(path):
+    with open(path) as handle:
+        return json.load(handle)['scenarios']
+
+
+def change(before, after):
+    if before is None or after is None:
+        return None
+    if not before:
+        return 0.0 if not after else float('inf')
+    return (after - before) / before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='tolerated relative p95 increase (default 0.10)')
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    regressions = []
+    print(f"{'scenario':<24} {'p95 before':>11} {'p95 after':>10} {'change':>8} "
+          f"{'sql before':>11} {'sql after':>10}")
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        p95 = change(old['latency_ms']['p95'], new['latency_ms']['p95'])
+        sql_old = old['sql_statements_per_request']
+        sql_new = new['sql_statements_per_request']
+        print(f"{name:<24} {old['latency_ms']['p95']:11.2f} {new['latency_ms']['p95']:10.2f} "
+              f"{p95:+8.1%} {sql_old if sql_old is not None else '-':>11} "
+              f"{sql_new if sql_new is not None else '-':>10}")
+        if p95 > args.threshold:
+            regressions.append(f"{name}: p95 {p95:+.1%}")
+        if sql_old is not None and sql_new is not None and sql_new > sql_old:
+            regressions.append(f"{name}: {sql_old} -> {sql_new} SQL statements per request")
+        if new['errors'] > old['errors']:
+            regressions.append(f"{name}: {old['errors']} -> {new['errors']} failed requests")
+
+    for name in sorted(set(before) ^ set(after)):
+        print(f"{name:<24} only in {'before' if name in before else 'after'}")
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,391 @@
+"""Load test: drives every /api/v1 endpoint against a synthetic dataset and
+reports latency percentiles, throughput, SQL statements per request and
+peak RSS as JSON.
+
+In-process (Flask test client, seeds the database when it is empty):
+
+    python benchmarks/load_test.py --database bench.db --scale small -o report.json
+
+Against a running server, after seeding its database with `flask seed`:
+
+    export DATABASE_URL=sqlite:///$PWD/bench.db SECRET_KEY=...
+    flask --app wsgi seed --scale large
+    gunicorn -c gunicorn.conf.py wsgi:app
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --scale large --server-pid <pid> -o report.json
+
+(--scale/--seed only label the report in this mode.)
+
+Compare two reports with benchmarks/compare_reports.py.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import event  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from config import Config  # noqa: E402
+from app.seeding import (ADMIN_EMAIL, CITIES, SCALES, SEED_PASSWORD,  # noqa: E402
+                         dataset_size, is_seeded, seed_dataset)
+
+# Items per request of the .../batch scenarios
+BATCH_SIZE = 100
+
+
+class InProcessClient:
+    """Requests through app.test_client(), counting the SQL they issue."""
+    mode = 'in-process'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.statements = 0
+        self.lock = threading.Lock()
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        with self.lock:
+            self.statements += 1
+
+    def statement_count(self):
+        return self.statements
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HTTPClient:
+    """Requests over one keep-alive connection per thread."""
+    mode = 'http'
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def statement_count(self):
+        return None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = self.connection_class(self.netloc, timeout=60)
+            try:
+                connection.request(method, self.prefix + path, payload, headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection: reconnect once
+                connection.close()
+                self.local.connection = None
+                if attempt == 2:
+                    raise
+
+
+def discover(client):
+    """Ids to aim the scenarios at, read through the API itself."""
+    def ids(path):
+        status, data = client.request('GET', f'{path}?limit=100&fields=id')
+        if status != 200:
+            raise RuntimeError(f"GET {path} answered {status}; is the database seeded?")
+        return [item['id'] for item in json.loads(data)['items']]
+
+    pools = {name: ids(f'/api/v1/{name}/') for name in ('users', 'amenities', 'places', 'reviews')}
+    for name, pool in pools.items():
+        if not pool:
+            raise RuntimeError(f"No {name} found; is the database seeded?")
+    return pools
+
+
+def scenarios(pools, run_id):
+    """(name, share of --requests, build, on_response, warm up) per scenario,
+    where build(i) returns the (method, path, body, needs_auth) of request i.
+
+    Write scenarios append what they create to `created` so the delete
+    scenarios that follow can remove it again.
+    """
+    users, amenities = pools['users'], pools['amenities']
+    places, reviews = pools['places'], pools['reviews']
+    created = {'users': [], 'amenities': [], 'places': [], 'reviews': []}
+    lat, lon = CITIES[0][1], CITIES[0][2]
+
+    def pick(pool, i):
+        return pool[i % len(pool)]
+
+    def pop(kind):
+        return created[kind].pop() if created[kind] else 'missing'
+
+    reads = [
+        ('users.list', 1, lambda i: ('GET', '/api/v1/users/?limit=20', None, False)),
+        ('users.get', 1, lambda i: ('GET', f'/api/v1/users/{pick(users, i)}', None, False)),
+        ('amenities.list', 1, lambda i: ('GET', '/api/v1/amenities/?limit=50', None, False)),
+        ('amenities.get', 1,
+         lambda i: ('GET', f'/api/v1/amenities/{pick(amenities, i)}', None, False)),
+        ('places.list', 1, lambda i: ('GET', '/api/v1/places/?limit=20', None, False)),
+        ('places.list_price', 1,
+         lambda i: ('GET', '/api/v1/places/?limit=20&min_price=80&max_price=150&sort=price',
+                    None, False)),
+        ('places.list_rating', 1,
+         lambda i: ('GET', '/api/v1/places/?limit=20&sort=rating&min_rating=4', None, False)),
+        ('places.list_amenities', 1,
+         lambda i: ('GET', f'/api/v1/places/?limit=20&amenities={amenities[0]},'
+                           f'{pick(amenities, i)}', None, False)),
+        ('places.list_fields', 1,
+         lambda i: ('GET', '/api/v1/places/?limit=100&fields=id,title,price', None, False)),
+        ('places.get', 1, lambda i: ('GET', f'/api/v1/places/{pick(places, i)}', None, False)),
+        ('places.get_fields', 1,
+         lambda i: ('GET', f'/api/v1/places/{pick(places, i)}?fields=id,title,owner',
+                    None, False)),
+        ('places.reviews', 1,
+         lambda i: ('GET', f'/api/v1/places/{pick(places, i)}/reviews', None, False)),
+        ('places.search_text', 1,
+         lambda i: ('GET', '/api/v1/places/search?q=ocean%20view&limit=20', None, False)),
+        ('places.search_bbox', 1,
+         lambda i: ('GET', f'/api/v1/places/search?bbox={lat - 0.5},{lon - 0.5},'
+                           f'{lat + 0.5},{lon + 0.5}&limit=20', None, False)),
+        ('places.nearby', 1,
+         lambda i: ('GET', f'/api/v1/places/nearby?lat={lat}&lon={lon}&k=20', None, False)),
+        ('places.cache_stats', 0.25, lambda i: ('GET', '/api/v1/places/cache-stats', None, True)),
+        ('reviews.list', 1, lambda i: ('GET', '/api/v1/reviews/?limit=20', None, False)),
+        ('reviews.get', 1, lambda i: ('GET', f'/api/v1/reviews/{pick(reviews, i)}', None, False)),
+    ]
+    writes = [
+        ('users.create', 0.25, lambda i: ('POST', '/api/v1/users/', {
+            'first_name': 'Load', 'last_name': 'Test', 'password': 'secret',
+            'email': f'load-{run_id}-{i}@bench.hbnb.io'}, True), 'users'),
+        ('amenities.create', 0.25, lambda i: ('POST', '/api/v1/amenities/',
+                                              {'name': f'Load {run_id} {i}'}, True), 'amenities'),
+        ('places.create', 0.25, lambda i: ('POST', '/api/v1/places/', {
+            'title': f'Load test place {i}', 'description': 'Created by the load test',
+            'price': 90 + i % 50, 'latitude': lat, 'longitude': lon,
+            'owner_id': pick(users, i), 'amenities': amenities[:3]}, True), 'places'),
+        ('reviews.create', 0.25, lambda i: ('POST', '/api/v1/reviews/', {
+            'text': 'Load test review', 'rating': 1 + i % 5,
+            'user_id': pick(users, i + 1), 'place_id': pick(places, i)}, True), 'reviews'),
+    ]
+    updates = [
+        ('users.update', 0.25, lambda i: ('PUT', f'/api/v1/users/{pick(users, i + 1)}',
+                                          {'first_name': f'Renamed{i}'}, True)),
+        ('amenities.update', 0.25, lambda i: ('PUT', f'/api/v1/amenities/{pick(amenities, i)}',
+                                              {'name': f'Amenity {run_id} {i}'}, True)),
+        ('places.update', 0.25, lambda i: ('PUT', f'/api/v1/places/{pick(places, i)}',
+                                           {'price': 100 + i % 50}, True)),
+        ('reviews.update', 0.25, lambda i: ('PUT', f'/api/v1/reviews/{pick(reviews, i)}',
+                                            {'text': f'Edited {i}', 'rating': 1 + i % 5}, True)),
+    ]
+    deletes = [
+        ('reviews.delete', 0.25, lambda i: ('DELETE', f'/api/v1/reviews/{pop("reviews")}',
+                                            None, True)),
+        ('places.delete', 0.25, lambda i: ('DELETE', f'/api/v1/places/{pop("places")}',
+                                           None, True)),
+        ('amenities.delete', 0.25, lambda i: ('DELETE', f'/api/v1/amenities/{pop("amenities")}',
+                                              None, True)),
+        ('users.delete', 0.25, lambda i: ('DELETE', f'/api/v1/users/{pop("users")}', None, True)),
+    ]
+    batches = [
+        ('amenities.create_batch', 0.05, lambda i: ('POST', '/api/v1/amenities/batch', [
+            {'name': f'Batch {run_id} {i} {n}'} for n in range(BATCH_SIZE)], True)),
+        ('places.create_batch', 0.05, lambda i: ('POST', '/api/v1/places/batch', [{
+            'title': f'Batch place {i}.{n}', 'price': 90 + n % 50, 'latitude': lat,
+            'longitude': lon, 'owner_id': pick(users, i + n), 'amenities': amenities[:3]}
+            for n in range(BATCH_SIZE)], True)),
+        ('reviews.create_batch', 0.05, lambda i: ('POST', '/api/v1/reviews/batch', [{
+            'text': 'Batch review', 'rating': 1 + n % 5, 'user_id': pick(users, i + n),
+            'place_id': pick(places, i * BATCH_SIZE + n)} for n in range(BATCH_SIZE)], True)),
+    ]
+    rest = [
+        ('auth.login', 0.1, lambda i: ('POST', '/api/v1/auth/login', {
+            'email': ADMIN_EMAIL, 'password': SEED_PASSWORD}, False)),
+        ('export.places', 0, lambda i: ('GET', '/api/v1/export/places', None, True)),
+        ('export.reviews', 0, lambda i: ('GET', '/api/v1/export/reviews?format=json',
+                                         None, True)),
+    ]
+
+    def remember(kind):
+        def on_response(status, data):
+            if status == 201:
+                created[kind].append(json.loads(data)['id'])
+        return on_response
+
+    for name, share, build in reads:
+        yield name, share, build, None, True
+    for name, share, build, kind in writes:
+        yield name, share, build, remember(kind), False
+    for name, share, build in updates + deletes + batches + rest:
+        yield name, share, build, None, False
+
+
+def peak_rss_kb(server_pids):
+    """Peak resident set size in KiB: of this process, or of the server's pids."""
+    if not server_pids:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = 0
+    for pid in server_pids:
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        peak = max(peak, int(line.split()[1]))
+        except OSError:
+            pass
+    return peak or None
+
+
+def run_scenario(client, token, build, on_response, count, concurrency, warmup):
+    auth = {'Authorization': f'Bearer {token}'}
+
+    def one(i):
+        method, path, body, needs_auth = build(i)
+        start = time.perf_counter()
+        status, data = client.request(method, path, body, auth if needs_auth else None)
+        elapsed = time.perf_counter() - start
+        if on_response is not None:
+            on_response(status, data)
+        return elapsed, status, len(data)
+
+    for i in range(warmup):
+        one(-1 - i)
+    statements = client.statement_count()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(count)))
+    wall = time.perf_counter() - start
+    if statements is not None:
+        statements = (client.statement_count() - statements) / count
+
+    latencies = np.array([elapsed for elapsed, _, _ in results]) * 1000
+    codes = {}
+    for _, status, _ in results:
+        codes[str(status)] = codes.get(str(status), 0) + 1
+    return {
+        'requests': count,
+        'errors': sum(n for code, n in codes.items() if not code.startswith(('2', '3'))),
+        'status_codes': codes,
+        'latency_ms': {
+            'mean': round(float(latencies.mean()), 3),
+            'p50': round(float(np.percentile(latencies, 50)), 3),
+            'p95': round(float(np.percentile(latencies, 95)), 3),
+            'p99': round(float(np.percentile(latencies, 99)), 3),
+            'max': round(float(latencies.max()), 3),
+        },
+        'throughput_rps': round(count / wall, 1),
+        'sql_statements_per_request': None if statements is None else round(statements, 2),
+        'response_bytes_mean': round(sum(size for _, _, size in results) / count),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    for name in ('users', 'places', 'reviews', 'amenities'):
+        parser.add_argument(f'--{name}', type=int, help=f'override the scale\'s {name} count')
+    parser.add_argument('--seed', type=int, default=42, help='dataset random seed')
+    parser.add_argument('--database', help='SQLite file to seed/use (default: a temp file)')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--server-pid', type=int, action='append', default=[],
+                        help='server process to report peak RSS for (repeatable)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured reads per scenario')
+    parser.add_argument('--only', help='comma-separated scenario name prefixes to run')
+    parser.add_argument('-o', '--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    sizes = dataset_size(args.scale, users=args.users, places=args.places,
+                         reviews=args.reviews, amenities=args.amenities)
+    meta = {'mode': 'http' if args.url else 'in-process', 'url': args.url,
+            'dataset': {**sizes, 'seed': args.seed}, 'requests': args.requests,
+            'concurrency': args.concurrency, 'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+
+    if args.url:
+        client = HTTPClient(args.url)
+    else:
+        database = args.database or os.path.join(tempfile.mkdtemp(), 'bench.db')
+        app = create_app(type('BenchmarkConfig', (Config,), {
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.abspath(database)}',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            # Budget violations show up as 500s in the report's error counts
+            'QUERY_BUDGET_ACTION': 'raise',
+        }))
+        with app.app_context():
+            db.create_all()
+            if is_seeded():
+                print(f"Using the existing data in {database}", file=sys.stderr)
+            else:
+                start = time.perf_counter()
+                written = seed_dataset(**sizes, seed=args.seed)
+                meta['seed_seconds'] = round(time.perf_counter() - start, 2)
+                print(f"Seeded {written} in {meta['seed_seconds']} s", file=sys.stderr)
+        client = InProcessClient(app)
+
+    status, data = client.request('POST', '/api/v1/auth/login',
+                                  {'email': ADMIN_EMAIL, 'password': SEED_PASSWORD})
+    if status != 200:
+        raise SystemExit(f"Admin login failed ({status}); seed with this harness first")
+    token = json.loads(data)['access_token']
+    pools = discover(client)
+
+    only = tuple(args.only.split(',')) if args.only else None
+    report = {'meta': meta, 'scenarios': {}}
+    for name, share, build, on_response, warm in scenarios(pools, int(time.time())):
+        if only and not name.startswith(only):
+            continue
+        # Full exports are too heavy to repeat --requests times
+        count = max(1, int(args.requests * share)) if share else 2
+        warmup = args.warmup if warm else 0
+        result = run_scenario(client, token, build, on_response, count, args.concurrency, warmup)
+        result['peak_rss_kb'] = peak_rss_kb(args.server_pid)
+        report['scenarios'][name] = result
+        print(f"{name:<24} p50 {result['latency_ms']['p50']:8.2f} ms  "
+              f"p99 {result['latency_ms']['p99']:8.2f} ms  "
+              f"{result['throughput_rps']:8.1f} req/s  "
+              f"sql {result['sql_statements_per_request']}  errors {result['errors']}",
+              file=sys.stderr)
+    report['peak_rss_kb'] = peak_rss_kb(args.server_pid)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Cost of a place list page: ORM objects versus read-only records.
+
+    python benchmarks/read_path_benchmark.py [--items 1000] [--repeat 20]
+
+Each run loads one page of `--items` places with their owner, amenities
+and reviews and serializes it, the way GET /api/v1/places/ does.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services import facade  # noqa: E402
+from app.api.v1.places import place_output_model  # noqa: E402
+from app.api.v1.serializer import compile_model, dumps  # noqa: E402
+from serializer_benchmark import best_of, seed  # noqa: E402
+
+
+def peak_allocation(func):
+    """Peak bytes allocated while `func` runs."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        db.create_all()
+        seed(args.items)
+        serialize = compile_model(place_output_model)
+
+        def orm_page():
+            page = facade.place_repo.find_page(args.items, profile='place_card')
+            body = dumps([serialize(place) for place in page.items])
+            # A request ends with a fresh session; do not let the next run
+            # find these objects in the identity map
+            db.session.remove()
+            return body
+
+        def record_page():
+            page = facade.place_repo.find_record_page(args.items)
+            body = dumps([serialize(place) for place in page.items])
+            db.session.remove()
+            return body
+
+        assert orm_page() == record_page()
+        results = [(label, best_of(args.repeat, func), peak_allocation(func))
+                   for label, func in (("ORM objects", orm_page), ("records", record_page))]
+
+    print(f"{args.items} places per page, best of {args.repeat}")
+    for label, seconds, peak in results:
+        print(f"  {label:<12} {seconds * 1000:8.2f} ms  {peak / 2**20:8.2f} MiB peak")
+    (_, orm_seconds, orm_peak), (_, record_seconds, record_peak) = results
+    print(f"  speed-up     {orm_seconds / record_seconds:8.1f}x  "
+          f"{orm_peak / record_peak:8.1f}x less memory")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Throughput of place list serialization: flask-restx marshal + json
+versus the compiled serializer + orjson.
+
+    python benchmarks/serializer_benchmark.py [--items 1000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_restx import marshal  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services import facade  # noqa: E402
+from app.api.v1.places import place_page_model  # noqa: E402
+from app.api.v1.serializer import compile_model, dumps  # noqa: E402
+
+
+def seed(items):
+    amenities = [facade.create_amenity({"name": f"Amenity {i}"}).id for i in range(5)]
+    owners = [facade.create_user({
+        "first_name": "Owner", "last_name": str(i),
+        "email": f"owner{i}@example.com", "password": "secret"
+    }).id for i in range(50)]
+    for i in range(items):
+        place = facade.create_place({
+            "title": f"Place {i}", "description": "A quiet place by the sea " * 4,
+            "price": 50 + i % 200, "latitude": 18.0 + i / 10000, "longitude": -66.0,
+            "owner_id": owners[i % len(owners)], "amenities": amenities[:i % 5]
+        })
+        for stars in range(1 + i % 3):
+            facade.create_review({"text": "Nice stay", "rating": 1 + stars,
+                                  "user_id": owners[(i + stars + 1) % len(owners)],
+                                  "place_id": place.id})
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        db.create_all()
+        seed(args.items)
+        page = facade.get_places_page(args.items, profile='place_card')
+        assert len(page.items) == args.items
+
+        serialize = compile_model(place_page_model)
+        marshalled = json.loads(json.dumps(marshal(page, place_page_model)))
+        assert json.loads(dumps(serialize(page))) == marshalled
+
+        baseline = best_of(args.repeat, lambda: json.dumps(marshal(page, place_page_model)))
+        compiled = best_of(args.repeat, lambda: dumps(serialize(page)))
+
+    print(f"{args.items} places per response, best of {args.repeat}")
+    for label, seconds in (("marshal + json", baseline), ("compiled + orjson", compiled)):
+        print(f"  {label:<18} {seconds * 1000:8.2f} ms  {args.items / seconds:10.0f} items/s")
+    print(f"  speed-up           {baseline / compiled:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
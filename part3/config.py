@@ -3,13 +3,55 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # Identities are {'id', 'is_admin'} dicts rather than plain strings
+    JWT_VERIFY_SUB = False
+    # bcrypt work factor; hashes of another cost are upgraded at next login
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # bcrypt runs in this many worker processes (0 hashes on the request thread);
+    # past MAX_PENDING queued hashes or TIMEOUT seconds requests get a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = 32
+    PASSWORD_HASH_TIMEOUT = 5
+    # Keyset pagination for list endpoints
+    DEFAULT_PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    # Items accepted by one POST .../batch request, and IDs by one ?ids= lookup
+    # (which also stops at IN_CHUNK_SIZE)
+    MAX_BATCH_SIZE = 1000
+    # Place detail read-through cache (entries, seconds)
+    PLACE_CACHE_SIZE = 1024
+    PLACE_CACHE_TTL = 300
+    # Rows fetched per round trip by the /export streams
+    EXPORT_BATCH_SIZE = 1000
+    # Echo per-request app/db/bcrypt timings in a Server-Timing response header
+    SERVER_TIMING = os.getenv('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+    # What a @query_budget violation does: 'log' a warning, 'raise' or 'off'
+    QUERY_BUDGET_ACTION = os.getenv('QUERY_BUDGET_ACTION', 'log')
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///development.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class ProductionConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Drop connections the database closed while they sat idle in the pool
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    # Query-count regressions fail the tests
+    QUERY_BUDGET_ACTION = 'raise'
+
 config = {
     'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,39 @@
+"""gunicorn settings: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Every value can be overridden through the environment variables below.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# One process per core (plus one) with a few threads each: requests spend
+# much of their time waiting on the database, which threads overlap.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+# Import the app once in the master so workers fork with the code loaded
+preload_app = True
+
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections.
+
+    Connections opened by the master before forking would otherwise be
+    shared by every worker. close=False leaves the parent's sockets alone
+    and only drops this process's references to them.
+    """
+    from app.extensions import db
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
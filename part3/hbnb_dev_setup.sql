@@ -29,11 +29,23 @@ CREATE TABLE IF NOT EXISTS places (
     latitude FLOAT,
     longitude FLOAT,
     owner_id CHAR(36),
+    grid_cell INT NOT NULL,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id)
 );
 
+-- grid_cell = floor((latitude + 90) / 0.1) * 3600 + floor((longitude + 180) / 0.1)
+CREATE INDEX IF NOT EXISTS ix_places_grid_cell ON places (grid_cell);
+CREATE INDEX IF NOT EXISTS ix_places_price ON places (price);
+
 -- Create Review Table
 CREATE TABLE IF NOT EXISTS reviews (
     id CHAR(36) PRIMARY KEY,
@@ -57,6 +69,16 @@ CREATE TABLE IF NOT EXISTS place_amenity (
     FOREIGN KEY (amenity_id) REFERENCES amenities(id)
 );
 
+-- Full-text index over place titles and descriptions (SQLite FTS5 only)
+-- CREATE VIRTUAL TABLE places_fts USING fts5(title, description, content='places', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2');
+-- plus AFTER INSERT/DELETE/UPDATE triggers on places, see app/models/place.py
+
+-- Keyset pagination indexes
+CREATE INDEX IF NOT EXISTS ix_users_created_at ON users (created_at);
+CREATE INDEX IF NOT EXISTS ix_amenities_created_at ON amenities (created_at);
+CREATE INDEX IF NOT EXISTS ix_places_created_at ON places (created_at);
+CREATE INDEX IF NOT EXISTS ix_reviews_created_at ON reviews (created_at);
+
 -- Insert Initial Data
 
 -- Admin User
@@ -22,4 +22,5 @@ class TestAmenityEndpoints(unittest.TestCase):
     def test_get_amenities(self):
         response = self.client.get('/api/v1/amenities/')
         self.assertEqual(response.status_code, 200)
-        self.assertIsInstance(response.json, list)
+        self.assertIsInstance(response.json["items"], list)
+        self.assertIn("next_cursor", response.json)
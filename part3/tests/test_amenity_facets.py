@@ -0,0 +1,136 @@
+import importlib
+import unittest
+from unittest import mock
+from sqlalchemy import insert
+from app import create_app
+from app.extensions import db
+from app.models.place import place_amenity
+from app.persistence.repository import IN_CHUNK_SIZE
+from app.services import facade
+
+facade_module = importlib.import_module("app.services.facade")
+
+
+class TestAmenityFacets(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+        self.wifi, self.pool, self.parking = (
+            facade.create_amenity({"name": name}).id for name in ("Wi-Fi", "Pool", "Parking"))
+        self.places = {}
+        for title, amenities in [
+            ("Loft", [self.wifi]),
+            ("Villa", [self.wifi, self.pool, self.parking]),
+            ("Cabin", [self.parking]),
+            ("Resort", [self.wifi, self.pool]),
+            ("Tent", []),
+        ]:
+            self.places[title] = facade.create_place({
+                "title": title, "price": 100, "latitude": 18.0, "longitude": -66.0,
+                "owner_id": owner.id, "amenities": amenities
+            }).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _get(self, **query):
+        response = self.client.get('/api/v1/places/', query_string=query)
+        self.assertEqual(response.status_code, 200)
+        titles = sorted(place["title"] for place in response.json["items"])
+        facets = {f["amenity_id"]: f["count"] for f in response.json["facets"]}
+        return titles, facets
+
+    def test_all_amenities(self):
+        titles, facets = self._get(amenities=f"{self.wifi},{self.pool}")
+        self.assertEqual(titles, ["Resort", "Villa"])
+        self.assertEqual(facets, {self.wifi: 2, self.pool: 2, self.parking: 1})
+
+    def test_any_amenity(self):
+        titles, _ = self._get(amenities=f"{self.pool},{self.parking}", amenities_mode="any")
+        self.assertEqual(titles, ["Cabin", "Resort", "Villa"])
+
+    def test_facets_without_filter(self):
+        titles, facets = self._get()
+        self.assertEqual(len(titles), 5)
+        self.assertEqual(facets, {self.wifi: 3, self.pool: 2, self.parking: 2})
+
+    def test_index_follows_writes(self):
+        self._get()  # load the index
+        facade.update_place(self.places["Tent"], {"amenities": [self.pool]})
+        facade.delete_place(self.places["Resort"])
+        titles, facets = self._get(amenities=self.pool)
+        self.assertEqual(titles, ["Tent", "Villa"])
+        self.assertEqual(facets[self.pool], 2)
+
+    def test_index_follows_writes_from_other_processes(self):
+        self._get()  # load the index
+        # Another worker links the Tent to the pool behind this facade's back
+        db.session.execute(insert(place_amenity).values(place_id=self.places["Tent"],
+                                                       amenity_id=self.pool))
+        db.session.commit()
+        titles, facets = self._get(amenities=self.pool)
+        self.assertEqual(titles, ["Resort", "Tent", "Villa"])
+        self.assertEqual(facets[self.pool], 3)
+
+    def test_index_is_not_reloaded_for_own_writes(self):
+        self._get()  # load the index
+        index = facade.amenity_index
+        with mock.patch.object(index, 'load', wraps=index.load) as load:
+            owner_id = facade.get_place(self.places["Tent"]).owner_id
+            facade.update_place(self.places["Tent"], {"amenities": [self.pool]})
+            facade.create_place({"title": "Hut", "price": 50, "latitude": 18.0, "longitude": -66.0,
+                                 "owner_id": owner_id, "amenities": [self.pool, self.parking]})
+            facade.create_review({"text": "Nice", "rating": 4, "user_id": owner_id,
+                                  "place_id": self.places["Loft"]})
+            facade.delete_place(self.places["Resort"])
+            facade.delete_amenity(self.wifi)
+            titles, facets = self._get(amenities=self.pool)
+            self.assertEqual(titles, ["Hut", "Tent", "Villa"])
+            self.assertEqual(facets, {self.pool: 3, self.parking: 2})
+            self.assertEqual(load.call_count, 0)
+
+            # Links written past the facade still reload it
+            db.session.execute(insert(place_amenity).values(place_id=self.places["Cabin"],
+                                                           amenity_id=self.pool))
+            db.session.commit()
+            titles, _ = self._get(amenities=self.pool)
+            self.assertEqual(titles, ["Cabin", "Hut", "Tent", "Villa"])
+            self.assertEqual(load.call_count, 1)
+
+    def test_updating_a_missing_place_leaves_the_index_alone(self):
+        self._get()  # load the index
+        facade.update_place("no-such-place", {"amenities": [self.pool]})
+        _, facets = self._get()
+        self.assertEqual(facets, {self.wifi: 3, self.pool: 2, self.parking: 2})
+
+    def test_id_filters_fit_in_one_in_chunk(self):
+        self.assertLessEqual(facade_module.MAX_BITMAP_ID_FILTER, IN_CHUNK_SIZE)
+
+    def test_sql_fallback_matches_bitmap(self):
+        original = facade_module.MAX_BITMAP_ID_FILTER
+        facade_module.MAX_BITMAP_ID_FILTER = 0
+        try:
+            titles, _ = self._get(amenities=f"{self.wifi},{self.pool}")
+            self.assertEqual(titles, ["Resort", "Villa"])
+            titles, _ = self._get(amenities=f"{self.pool},{self.parking}", amenities_mode="any")
+            self.assertEqual(titles, ["Cabin", "Resort", "Villa"])
+        finally:
+            facade_module.MAX_BITMAP_ID_FILTER = original
+
+    def test_unknown_amenity_matches_nothing(self):
+        titles, _ = self._get(amenities="no-such-amenity")
+        self.assertEqual(titles, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
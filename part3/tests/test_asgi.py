@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from app.asgi import HBnBASGI
+from app import create_app
+from config import TestingConfig
+from app.extensions import db, metrics
+from app.persistence.async_repository import async_database_uri
+from app.services import facade
+
+
+class TestAsyncDatabaseUri(unittest.TestCase):
+    def test_maps_sync_drivers(self):
+        self.assertEqual(async_database_uri('sqlite:///hbnb.db'), 'sqlite+aiosqlite:///hbnb.db')
+        self.assertEqual(async_database_uri('postgresql://u:p@db/hbnb'),
+                         'postgresql+asyncpg://u:p@db/hbnb')
+        with self.assertRaises(ValueError):
+            async_database_uri('oracle://db/hbnb')
+
+
+class TestASGIApp(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # The async engine needs a database it can reach over a second connection
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.app = create_app(type('FileTestingConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.path}'}))
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+        self.amenity = facade.create_amenity({"name": "Wi-Fi"}).id
+        self.places = [facade.create_place({
+            "title": f"Place {n}", "price": 100 + n, "latitude": 18.3,
+            "longitude": -66.5, "owner_id": owner.id, "amenities": [self.amenity]
+        }).id for n in range(3)]
+        self.asgi = HBnBASGI(self.app)
+
+    async def asyncTearDown(self):
+        await self.asgi.database.dispose()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        os.remove(self.path)
+
+    async def request(self, path, query='', headers=()):
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+            'query_string': query.encode(), 'http_version': '1.1', 'scheme': 'http',
+            'server': ('testserver', 80),
+            'headers': [(name.encode(), value.encode()) for name, value in headers],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.asgi(scope, receive, send)
+        headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return messages[0]['status'], headers, body
+
+    async def test_list_matches_the_flask_resource(self):
+        status, headers, body = await self.request('/api/v1/places/', 'limit=2&sort=-price')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-type'], 'application/json')
+        expected = self.client.get('/api/v1/places/?limit=2&sort=-price')
+        self.assertEqual(json.loads(body), expected.json)
+        self.assertEqual(headers['etag'], expected.headers['ETag'])
+
+    async def test_list_arguments_are_validated(self):
+        status, _, body = await self.request('/api/v1/places/', 'sort=nope')
+        self.assertEqual(status, 400)
+        status, _, body = await self.request('/api/v1/places/', 'min_price=9&max_price=1')
+        self.assertEqual(status, 400)
+        self.assertIn('min_price', json.loads(body)['message'])
+
+    async def test_list_projection(self):
+        status, _, body = await self.request('/api/v1/places/', 'fields=id,title')
+        self.assertEqual(status, 200)
+        self.assertEqual(set(json.loads(body)['items'][0]), {'id', 'title'})
+
+    async def test_list_by_ids_matches_the_flask_resource(self):
+        query = f'ids={self.places[2]},missing,{self.places[0]}&fields=id,price'
+        status, _, body = await self.request('/api/v1/places/', query)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), self.client.get(f'/api/v1/places/?{query}').json)
+        self.assertEqual(json.loads(body)['missing'], ['missing'])
+
+    async def test_repository_existence_checks(self):
+        repo = self.asgi.facade.place_repo
+        try:
+            self.assertTrue(await repo.exists(self.places[0]))
+            self.assertEqual(await repo.exists_many([self.places[1], "missing"]), {self.places[1]})
+        finally:
+            await self.asgi.database.remove()
+
+    async def test_detail_shares_the_place_cache_and_revalidates(self):
+        status, headers, body = await self.request(f'/api/v1/places/{self.places[0]}')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['amenities'][0]['id'], self.amenity)
+        self.assertEqual(self.client.get(f'/api/v1/places/{self.places[0]}').json,
+                         json.loads(body))
+        self.assertEqual(facade.get_place_cache_stats()['hits'], 1)
+
+        status, _, body = await self.request(f'/api/v1/places/{self.places[0]}',
+                                             headers=[('If-None-Match', headers['etag'])])
+        self.assertEqual((status, body), (304, b''))
+
+    async def test_detail_not_found(self):
+        status, _, _ = await self.request('/api/v1/places/missing')
+        self.assertEqual(status, 404)
+
+    async def test_concurrent_reads_share_the_event_loop(self):
+        results = await asyncio.gather(*[
+            self.request(f'/api/v1/places/{place_id}', 'fields=id,price')
+            for place_id in self.places * 5])
+        self.assertEqual([status for status, _, _ in results], [200] * 15)
+        self.assertEqual({json.loads(body)['id'] for _, _, body in results}, set(self.places))
+
+    async def test_other_routes_fall_back_to_flask(self):
+        status, _, body = await self.request('/api/v1/amenities/')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['items'][0]['name'], 'Wi-Fi')
+        status, _, _ = await self.request('/api/v1/places/nearby', 'lat=18&lon=-66')
+        self.assertEqual(status, 200)
+
+    async def test_records_metrics_under_the_flask_rule(self):
+        metrics.reset()
+        await self.request(f'/api/v1/places/{self.places[0]}', 'fields=id,title')
+        series = metrics.snapshot()[('/api/v1/places/<string:place_id>', 'GET')]
+        self.assertEqual(series.statuses, {200: 1})
+        self.assertGreater(series.statements, 0)
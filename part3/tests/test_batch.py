@@ -0,0 +1,112 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.query_budget import QueryBudget
+from app.services import facade
+
+
+class TestBatchCreate(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = facade.create_user({"first_name": "Ana", "last_name": "Ramos",
+                                         "email": "ana@example.com", "password": "secret"}).id
+        self.guest = facade.create_user({"first_name": "Eva", "last_name": "Cruz",
+                                         "email": "eva@example.com", "password": "secret"}).id
+        self.wifi = facade.create_amenity({"name": "Wi-Fi"}).id
+        with self.app.test_request_context():
+            self.admin = {"Authorization": "Bearer " + create_access_token(
+                identity={"id": self.owner, "is_admin": True})}
+            self.user = {"Authorization": "Bearer " + create_access_token(
+                identity={"id": self.guest, "is_admin": False})}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def place(self, n, **extra):
+        return {"title": f"Place {n}", "price": 50 + n, "latitude": 18.4, "longitude": -66.1,
+                "owner_id": self.owner, "amenities": [self.wifi], **extra}
+
+    def test_amenities(self):
+        response = self.client.post('/api/v1/amenities/batch', headers=self.admin,
+                                    json=[{"name": "Pool"}, {"name": "Wi-Fi"}, {"name": ""},
+                                          {"name": "Pool"}, {"name": "Gym"}])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.json["created"], response.json["failed"]), (2, 3))
+        self.assertEqual([result["status"] for result in response.json["results"]],
+                         [201, 409, 400, 409, 201])
+        self.assertEqual(facade.get_amenity(response.json["results"][4]["id"]).name, "Gym")
+
+        response = self.client.post('/api/v1/amenities/batch', headers=self.user,
+                                    json=[{"name": "Sauna"}])
+        self.assertEqual(response.status_code, 403)
+
+    def test_places_are_validated_per_item(self):
+        response = self.client.post('/api/v1/places/batch', headers=self.admin, json=[
+            self.place(1), self.place(2, owner_id="missing"), self.place(3, price=-1),
+            self.place(4, amenities=["missing"]), "not an object"])
+        self.assertEqual(response.status_code, 207)
+        results = response.json["results"]
+        self.assertEqual([result["status"] for result in results], [201, 400, 400, 400, 400])
+        self.assertEqual(results[1], {"index": 1, "status": 400, "message": "Invalid owner_id"})
+        self.assertEqual(results[3]["message"], "Amenity ID missing is invalid")
+
+        place = facade.get_place(results[0]["id"])
+        self.assertEqual([amenity.id for amenity in place.amenities], [self.wifi])
+        # Columns the mapper events fill in are written by the bulk insert too
+        page = facade.search_places(10, bbox=(18, -67, 19, -66))
+        self.assertEqual([hit.id for hit in page.items], [place.id])
+
+    def test_places_cost_the_same_statements_at_any_size(self):
+        counts = []
+        for size in (2, 50):
+            with QueryBudget() as budget:
+                response = self.client.post('/api/v1/places/batch', headers=self.admin,
+                                            json=[self.place(n) for n in range(size)])
+            self.assertEqual(response.status_code, 201)
+            counts.append(budget.count)
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(facade.get_all_places()), 52)
+
+    def test_places_of_other_owners_are_forbidden(self):
+        response = self.client.post('/api/v1/places/batch', headers=self.user,
+                                    json=[self.place(1), self.place(2, owner_id=self.guest)])
+        self.assertEqual([result["status"] for result in response.json["results"]], [403, 201])
+
+    def test_reviews_update_place_aggregates(self):
+        places = [facade.create_place(self.place(n)).id for n in range(2)]
+        response = self.client.post('/api/v1/reviews/batch', json=[
+            {"text": "Great", "rating": 5, "user_id": self.guest, "place_id": places[0]},
+            {"text": "Fine", "rating": 3, "user_id": self.guest, "place_id": places[0]},
+            {"text": "Good", "rating": 4, "user_id": self.owner, "place_id": places[1]},
+            {"text": "Lost", "rating": 4, "user_id": self.guest, "place_id": "missing"},
+            {"text": "Bad", "rating": 9, "user_id": self.guest, "place_id": places[1]}])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result["status"] for result in response.json["results"]],
+                         [201, 201, 201, 400, 400])
+        first, second = facade.get_place(places[0]), facade.get_place(places[1])
+        self.assertEqual((first.review_count, first.average_rating), (2, 4.0))
+        self.assertEqual(first.rating_histogram, [0, 0, 1, 0, 1])
+        self.assertEqual(second.rating_histogram, [0, 0, 0, 1, 0])
+
+    def test_reviews_with_non_integer_ratings_are_rejected(self):
+        place = facade.create_place(self.place(0)).id
+        response = self.client.post('/api/v1/reviews/batch', json=[
+            {"text": "Half", "rating": 4.5, "user_id": self.guest, "place_id": place},
+            {"text": "Text", "rating": "5", "user_id": self.guest, "place_id": place}])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result["status"] for result in response.json["results"]], [400, 400])
+        created = facade.get_place(place)
+        self.assertEqual((created.review_count, created.rating_histogram), (0, [0, 0, 0, 0, 0]))
+
+    def test_rejects_bad_bodies(self):
+        self.app.config['MAX_BATCH_SIZE'] = 2
+        for body in ({"title": "x"}, [], [self.place(n) for n in range(3)]):
+            response = self.client.post('/api/v1/places/batch', headers=self.admin, json=body)
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,37 @@
+import unittest
+from sqlalchemy import inspect
+from app import create_app
+from app.extensions import db
+from app.services import facade
+
+
+class TestInitDb(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.runner = self.app.test_cli_runner()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_creates_schema_and_admin_once(self):
+        result = self.runner.invoke(args=["init-db", "--admin-email", "root@hbnb.io",
+                                          "--admin-password", "s3cret"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Admin user root@hbnb.io created", result.output)
+        self.assertIn("places", inspect(db.engine).get_table_names())
+        admin = facade.get_user_by_email("root@hbnb.io")
+        self.assertTrue(admin.is_admin)
+        self.assertTrue(admin.verify_password("s3cret"))
+
+        result = self.runner.invoke(args=["init-db", "--admin-email", "root@hbnb.io"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("already exists", result.output)
+        self.assertTrue(facade.get_user_by_email("root@hbnb.io").verify_password("s3cret"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from app.models.amenity import Amenity
+from app.services import facade
+
+
+class TestConditionalGet(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        }).id
+        self.amenity = facade.create_amenity({"name": "Wi-Fi"}).id
+        self.other_amenity = facade.create_amenity({"name": "Pool"}).id
+        self.place = facade.create_place({
+            "title": "Seaside View", "price": 150, "latitude": 18.3,
+            "longitude": -66.5, "owner_id": self.owner, "amenities": [self.amenity]
+        }).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _revalidate(self, url, etag):
+        return self.client.get(url, headers={"If-None-Match": etag})
+
+    def test_entity_etag_and_304(self):
+        url = f'/api/v1/users/{self.owner}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn("Last-Modified", first.headers)
+
+        again = self._revalidate(url, etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
+        self.assertEqual(again.headers["ETag"], etag)
+
+        facade.update_user(self.owner, {"first_name": "Anabel"})
+        changed = self._revalidate(url, etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_if_modified_since(self):
+        url = f'/api/v1/users/{self.owner}'
+        modified = self.client.get(url).headers["Last-Modified"]
+        response = self.client.get(url, headers={"If-Modified-Since": modified})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_fresh_check_does_not_load_the_place(self):
+        url = f'/api/v1/places/{self.place}'
+        etag = self.client.get(url).headers["ETag"]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            self.assertEqual(self._revalidate(url, etag).status_code, 304)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(len(statements), 1)
+
+    def test_place_etag_follows_embedded_documents(self):
+        url = f'/api/v1/places/{self.place}'
+        etag = self.client.get(url).headers["ETag"]
+        facade.update_amenity(self.amenity, {"name": "Fast Wi-Fi"})
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+        etag = self.client.get(url).headers["ETag"]
+        facade.update_place(self.place, {"amenities": [self.other_amenity]})
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+        etag = self.client.get(url).headers["ETag"]
+        facade.create_review({"text": "Lovely", "rating": 5,
+                              "user_id": self.owner, "place_id": self.place})
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+    def test_list_etag_changes_on_delete(self):
+        url = '/api/v1/amenities/'
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self._revalidate(url, etag).status_code, 304)
+        facade.delete_amenity(self.other_amenity)
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+        url = '/api/v1/places/'
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self._revalidate(url, etag).status_code, 304)
+        facade.update_user(self.owner, {"last_name": "Ruiz"})
+        self.assertEqual(self._revalidate(url, etag).status_code, 200)
+
+    def test_list_versions_read_counters_not_tables(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            etag = self.client.get('/api/v1/reviews/').headers["ETag"]
+            self.assertEqual(self._revalidate('/api/v1/reviews/', etag).status_code, 304)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertNotIn("reviews", statements[-1])
+        self.assertNotIn("max(", statements[-1].lower())
+
+    def test_writes_bump_collection_versions(self):
+        reviews = facade.get_reviews_version()
+        places = facade.get_places_version()
+        facade.create_review({"text": "Lovely", "rating": 5,
+                              "user_id": self.owner, "place_id": self.place})
+        self.assertEqual(facade.get_reviews_version()[0], reviews[0] + 1)
+        self.assertNotEqual(facade.get_places_version(), places)
+
+        # Statements run on the session count as writes as well
+        amenities = facade.get_amenities_version()
+        db.session.execute(db.update(Amenity).values(name=Amenity.name + "!"))
+        db.session.commit()
+        self.assertEqual(facade.get_amenities_version()[0], amenities[0] + 1)
+        # A transaction that writes nothing leaves the counters alone
+        db.session.commit()
+        self.assertEqual(facade.get_amenities_version()[0], amenities[0] + 1)
+
+    def test_place_version_reads_reviews_through_an_index(self):
+        statement = facade.place_repo.version_statement(self.place)
+        sql = str(statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        plan = [row[-1] for row in db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql))]
+        self.assertIn("SEARCH reviews USING INDEX ix_reviews_place_id (place_id=?)", plan)
+        self.assertFalse([step for step in plan if step.startswith("SCAN")])
+
+    def test_missing_entity_is_still_404(self):
+        response = self.client.get('/api/v1/places/missing', headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
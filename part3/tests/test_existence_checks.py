@@ -0,0 +1,67 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.query_budget import QueryBudget
+from app.services import facade
+
+
+class TestExistenceChecks(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = facade.create_user({"first_name": "Ana", "last_name": "Ramos",
+                                         "email": "ana@example.com", "password": "secret"}).id
+        self.guest = facade.create_user({"first_name": "Eva", "last_name": "Cruz",
+                                         "email": "eva@example.com", "password": "secret"}).id
+        self.place = facade.create_place({"title": "Loft", "price": 80, "latitude": 18.4,
+                                          "longitude": -66.1, "owner_id": self.owner}).id
+        self.review = facade.create_review({"text": "Nice", "rating": 4,
+                                            "user_id": self.guest, "place_id": self.place}).id
+        with self.app.test_request_context():
+            self.as_owner = {"Authorization": "Bearer " + create_access_token(
+                identity={"id": self.owner, "is_admin": False})}
+            self.as_guest = {"Authorization": "Bearer " + create_access_token(
+                identity={"id": self.guest, "is_admin": False})}
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_repository_reads_no_objects(self):
+        with QueryBudget() as budget:
+            self.assertTrue(facade.place_repo.exists(self.place))
+            self.assertFalse(facade.place_repo.exists("missing"))
+            self.assertEqual(facade.user_repo.exists_many([self.owner, "missing"]), {self.owner})
+            row = facade.review_repo.get_columns(self.review, 'user_id', 'rating')
+            self.assertEqual((row.user_id, row.rating), (self.guest, 4))
+            self.assertIsNone(facade.review_repo.get_columns("missing", 'user_id'))
+        self.assertEqual(budget.count, 5)
+        self.assertEqual(len(db.session.identity_map), 0)
+
+    def test_place_owner_checks(self):
+        response = self.client.put(f'/api/v1/places/{self.place}', headers=self.as_guest,
+                                   json={"title": "Mine"})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete('/api/v1/places/missing', headers=self.as_guest)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.put(f'/api/v1/places/{self.place}', headers=self.as_owner,
+                                   json={"title": "Studio"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(facade.get_place(self.place).title, "Studio")
+
+    def test_review_author_checks(self):
+        response = self.client.delete(f'/api/v1/reviews/{self.review}', headers=self.as_owner)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.put('/api/v1/reviews/missing', headers=self.as_guest,
+                                   json={"rating": 5})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.put(f'/api/v1/reviews/{self.review}', headers=self.as_guest,
+                                   json={"rating": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(facade.get_place(self.place).rating_histogram, [0, 0, 0, 0, 1])
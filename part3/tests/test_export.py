@@ -0,0 +1,82 @@
+import json
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.services import facade
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.app.config["EXPORT_BATCH_SIZE"] = 2
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.admin = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos", "email": "ana@example.com",
+            "password": "secret", "is_admin": True
+        })
+        self.amenity = facade.create_amenity({"name": "Wi-Fi"})
+        for i in range(5):
+            place = facade.create_place({
+                "title": f"Place {i}", "price": 100 + i, "latitude": 18.0,
+                "longitude": -66.0, "owner_id": self.admin.id,
+                "amenities": [self.amenity.id] if i % 2 else []
+            })
+            facade.create_review({"text": "Nice", "rating": 4,
+                                  "user_id": self.admin.id, "place_id": place.id})
+
+        with self.app.test_request_context():
+            admin_token = create_access_token(identity={"id": self.admin.id, "is_admin": True})
+            user_token = create_access_token(identity={"id": self.admin.id, "is_admin": False})
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        self.user_headers = {"Authorization": f"Bearer {user_token}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_places_ndjson(self):
+        response = self.client.get('/api/v1/export/places', headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertTrue(response.is_streamed)
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([row["id"] for row in rows], sorted(row["id"] for row in rows))
+        self.assertEqual(sum(row["amenity_ids"] == [self.amenity.id] for row in rows), 2)
+
+    def test_json_array(self):
+        response = self.client.get('/api/v1/export/reviews?format=json',
+                                   headers=self.admin_headers)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(len(response.json), 5)
+
+        response = self.client.get('/api/v1/export/amenities?format=json',
+                                   headers=self.admin_headers)
+        self.assertEqual(response.json, [{
+            "id": self.amenity.id, "name": "Wi-Fi",
+            "created_at": self.amenity.created_at.isoformat(),
+            "updated_at": self.amenity.updated_at.isoformat()
+        }])
+
+    def test_users_do_not_leak_passwords(self):
+        response = self.client.get('/api/v1/export/users', headers=self.admin_headers)
+        row = json.loads(response.get_data(as_text=True))
+        self.assertEqual(row["email"], "ana@example.com")
+        self.assertNotIn("password", row)
+
+    def test_admin_only_and_unknown_collection(self):
+        self.assertEqual(self.client.get('/api/v1/export/places').status_code, 401)
+        response = self.client.get('/api/v1/export/places', headers=self.user_headers)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get('/api/v1/export/bookings', headers=self.admin_headers)
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+from app import create_app
+from app.extensions import db
+from app.persistence.repository import IN_CHUNK_SIZE
+from app.query_budget import QueryBudget
+from app.services import facade
+
+
+class TestGetMany(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = facade.create_user({"first_name": "Ana", "last_name": "Ramos",
+                                         "email": "ana@example.com", "password": "secret"}).id
+        self.wifi = facade.create_amenity({"name": "Wi-Fi"}).id
+        self.places = [facade.create_place({
+            "title": f"Place {n}", "price": 50 + n, "latitude": 18.4, "longitude": -66.1,
+            "owner_id": self.owner, "amenities": [self.wifi]}).id for n in range(6)]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_request_order_and_misses(self):
+        ids = [self.places[3], "missing", self.places[0], self.places[3]]
+        places = facade.get_many_places(ids)
+        self.assertEqual([place and place.id for place in places],
+                         [self.places[3], None, self.places[0], self.places[3]])
+
+    def test_large_lists_are_chunked(self):
+        with mock.patch('app.persistence.repository.IN_CHUNK_SIZE', 4):
+            with QueryBudget() as budget:
+                places = facade.get_many_places(list(reversed(self.places)))
+        self.assertEqual([place.id for place in places], list(reversed(self.places)))
+        self.assertEqual(budget.count, 2)
+
+    def test_ids_argument(self):
+        ids = ",".join([self.places[2], "missing", self.places[1]])
+        response = self.client.get(f"/api/v1/places/?ids={ids}&fields=id,title&expand=amenities")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["missing"], ["missing"])
+        self.assertEqual([place["title"] for place in response.json["items"]],
+                         ["Place 2", "Place 1"])
+        self.assertEqual(response.json["items"][0]["amenities"][0]["id"], self.wifi)
+        self.assertNotIn("price", response.json["items"][0])
+
+        response = self.client.get(f"/api/v1/users/?ids={self.owner},nobody&fields=id,email")
+        self.assertEqual(response.json, {"items": [{"id": self.owner, "email": "ana@example.com"}],
+                                         "missing": ["nobody"]})
+
+    def test_statements_do_not_grow_with_the_id_count(self):
+        counts = []
+        for ids in (self.places[:1], self.places):
+            with QueryBudget() as budget:
+                response = self.client.get(f"/api/v1/places/?ids={','.join(ids)}")
+            self.assertEqual(len(response.json["items"]), len(ids))
+            counts.append(budget.count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_a_full_in_chunk_fits_the_budget(self):
+        # TestingConfig raises on a budget overrun, so 200 means it held
+        facade.create_places([{"title": f"Place {n}", "price": 50, "latitude": 18.4,
+                               "longitude": -66.1, "owner_id": self.owner,
+                               "amenities": [self.wifi]}
+                              for n in range(IN_CHUNK_SIZE - len(self.places))])
+        ids = [place.id for place in facade.get_all_places()]
+        self.assertEqual(len(ids), IN_CHUNK_SIZE)
+        response = self.client.get(f"/api/v1/places/?ids={','.join(ids)}&expand=amenities,owner")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["items"]), IN_CHUNK_SIZE)
+
+        response = self.client.get(f"/api/v1/places/?ids={','.join(ids + ['one-more'])}")
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_empty_or_oversized_lists(self):
+        self.app.config['MAX_BATCH_SIZE'] = 3
+        for ids in ("", ",", ",".join(self.places[:4])):
+            response = self.client.get(f"/api/v1/amenities/?ids={ids}")
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,69 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from app.services import facade
+
+
+class TestLoadingProfiles(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        amenities = [facade.create_amenity({"name": name}).id for name in ("Wi-Fi", "Pool")]
+        self.place_ids = []
+        for i in range(5):
+            owner = facade.create_user({
+                "first_name": "Owner", "last_name": str(i),
+                "email": f"owner{i}@example.com", "password": "secret"
+            })
+            place = facade.create_place({
+                "title": f"Place {i}", "price": 100 + i, "latitude": 18.0,
+                "longitude": -66.0, "owner_id": owner.id, "amenities": list(amenities)
+            })
+            self.place_ids.append(place.id)
+            facade.create_review({
+                "text": "Nice", "rating": 4, "user_id": owner.id, "place_id": place.id
+            })
+        db.session.expunge_all()
+
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self._count)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self._count)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_place_list_statement_count_is_fixed(self):
+        self.client.get('/api/v1/places/')  # warm the in-process amenity index
+        self.statements.clear()
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["items"]), 5)
+        self.assertTrue(all(len(p["amenities"]) == 2 for p in response.json["items"]))
+        self.assertTrue(all(p["owner"]["email"] for p in response.json["items"]))
+        # ETag version, places + owners, then amenities, then reviews
+        self.assertEqual(len(self.statements), 4)
+
+    def test_place_detail_statement_count_is_fixed(self):
+        response = self.client.get(f'/api/v1/places/{self.place_ids[0]}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json["reviews"]), 1)
+        # ETag version, then the place with owner/amenities, then reviews
+        self.assertEqual(len(self.statements), 3)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(KeyError):
+            facade.get_place(self.place_ids[0], profile="everything")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import threading
+import unittest
+from app import create_app
+from app.extensions import db, metrics
+from app.services import facade
+from config import TestingConfig
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(type('TimingConfig', (TestingConfig,), {'SERVER_TIMING': True}))
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        metrics.reset()
+        self.owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def series(self, rule, method='GET'):
+        return metrics.snapshot()[(rule, method)]
+
+    def test_records_requests_per_rule(self):
+        self.client.get('/api/v1/amenities/')
+        self.client.get(f'/api/v1/users/{self.owner.id}')
+        self.client.get(f'/api/v1/users/{self.owner.id}')
+        self.client.get('/api/v1/places/missing')
+
+        users = self.series('/api/v1/users/<string:user_id>')
+        self.assertEqual(users.count, 2)
+        self.assertEqual(users.statuses, {200: 2})
+        self.assertEqual(sum(users.buckets), 2)
+        self.assertGreaterEqual(users.statements, 2)
+        self.assertGreater(users.db_seconds, 0)
+        self.assertGreater(users.response_bytes, 0)
+        self.assertEqual(self.series('/api/v1/places/<string:place_id>').statuses, {404: 1})
+        self.assertEqual(self.series('/api/v1/amenities/').count, 1)
+
+    def test_server_timing_and_password_hash_time(self):
+        response = self.client.post('/api/v1/auth/login', json={
+            "email": "ana@example.com", "password": "secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers['Server-Timing'],
+                         r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ statements", hash;dur=[\d.]+$')
+        self.assertGreater(self.series('/api/v1/auth/login', 'POST').hash_seconds, 0)
+
+    def test_threads_record_into_their_own_shards(self):
+        def browse():
+            client = self.app.test_client()
+            for _ in range(10):
+                client.get('/api/v1/amenities/')
+        threads = [threading.Thread(target=browse) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.series('/api/v1/amenities/').count, 40)
+
+    def test_prometheus_exposition(self):
+        self.client.get('/api/v1/amenities/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        text = response.get_data(as_text=True)
+        labels = 'endpoint="/api/v1/amenities/",method="GET"'
+        self.assertIn('# TYPE hbnb_http_request_duration_seconds histogram', text)
+        self.assertIn(f'hbnb_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', text)
+        self.assertIn(f'hbnb_http_request_duration_seconds_count{{{labels}}} 1', text)
+        self.assertIn(f'hbnb_http_requests_total{{{labels},status="200"}} 1', text)
+        self.assertIn(f'hbnb_db_statements_total{{{labels}}}', text)
+        # Scrapes are not recorded
+        self.assertNotIn('endpoint="/metrics"', self.client.get('/metrics').get_data(as_text=True))
@@ -0,0 +1,127 @@
+import unittest
+from app import create_app
+from app.extensions import db
+from app.services import facade
+
+
+class TestKeysetPagination(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.amenity_ids = [
+            facade.create_amenity({"name": f"Amenity {i:02d}"}).id
+            for i in range(7)
+        ]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_walks_every_row_once(self):
+        seen = []
+        cursor = None
+        while True:
+            query = {"limit": 3}
+            if cursor:
+                query["cursor"] = cursor
+            response = self.client.get('/api/v1/amenities/', query_string=query)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json["items"]), 3)
+            seen.extend(item["id"] for item in response.json["items"])
+            cursor = response.json["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(self.amenity_ids))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_last_page_has_no_cursor(self):
+        response = self.client.get('/api/v1/amenities/', query_string={"limit": 50})
+        self.assertEqual(len(response.json["items"]), 7)
+        self.assertIsNone(response.json["next_cursor"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/amenities/', query_string={"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_limit(self):
+        response = self.client.get('/api/v1/places/', query_string={"limit": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+
+class TestPlaceFilters(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+        self.prices = [35, 80, 10, 150, 80, 60, 220]
+        self.place_ids = []
+        for i, price in enumerate(self.prices):
+            place = facade.create_place({
+                "title": f"Place {i}", "price": price, "latitude": 18.0,
+                "longitude": -66.0, "owner_id": owner.id, "amenities": []
+            })
+            self.place_ids.append(place.id)
+        for place_id, rating in [(self.place_ids[3], 2), (self.place_ids[5], 5), (self.place_ids[0], 4)]:
+            facade.create_review({"text": "Stay", "rating": rating,
+                                  "user_id": owner.id, "place_id": place_id})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _walk(self, **query):
+        items, cursor = [], None
+        while True:
+            params = dict(query, limit=2)
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get('/api/v1/places/', query_string=params)
+            self.assertEqual(response.status_code, 200)
+            items.extend(response.json["items"])
+            cursor = response.json["next_cursor"]
+            if not cursor:
+                return items
+
+    def test_price_range(self):
+        items = self._walk(min_price=35, max_price=80)
+        self.assertEqual(sorted(p["price"] for p in items), [35, 60, 80, 80])
+
+    def test_sort_by_price_both_ways(self):
+        self.assertEqual([p["price"] for p in self._walk(sort="price")], sorted(self.prices))
+        self.assertEqual([p["price"] for p in self._walk(sort="-price")],
+                         sorted(self.prices, reverse=True))
+
+    def test_sort_by_rating(self):
+        items = self._walk(sort="rating")
+        self.assertEqual([p["id"] for p in items[:3]],
+                         [self.place_ids[5], self.place_ids[0], self.place_ids[3]])
+        self.assertEqual(len(items), len(self.prices))
+
+    def test_cursor_is_bound_to_sort(self):
+        cursor = self.client.get('/api/v1/places/', query_string={"limit": 1, "sort": "price"}).json["next_cursor"]
+        response = self.client.get('/api/v1/places/', query_string={"cursor": cursor, "sort": "-price"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_filters(self):
+        response = self.client.get('/api/v1/places/', query_string={"min_price": 100, "max_price": 50})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/places/', query_string={"sort": "title"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
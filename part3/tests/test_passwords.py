@@ -0,0 +1,82 @@
+import unittest
+from app import create_app
+from app.extensions import db, password_hasher
+from app.passwords import PasswordHasher, PasswordHasherBusy, hash_cost
+from app.services import facade
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_inline_hash_and_verify(self):
+        hasher = PasswordHasher(rounds=4)
+        hashed = hasher.hash("secret")
+        self.assertEqual(hash_cost(hashed), 4)
+        self.assertTrue(hasher.verify("secret", hashed))
+        self.assertFalse(hasher.verify("wrong", hashed))
+        self.assertFalse(hasher.verify("secret", "plain text"))
+        self.assertFalse(hasher.needs_rehash(hashed))
+        self.assertTrue(PasswordHasher(rounds=5).needs_rehash(hashed))
+        with self.assertRaises(ValueError):
+            hasher.hash("")
+
+    def test_worker_pool(self):
+        hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+        try:
+            self.assertIsNone(hasher._pool)  # created on first use
+            hashed = hasher.hash("secret")
+            self.assertTrue(hasher.verify("secret", hashed))
+            self.assertNotEqual(hasher._pool._mp_context.get_start_method(), "fork")
+            hasher._slots.acquire()  # a hash already in flight
+            with self.assertRaises(PasswordHasherBusy):
+                hasher.hash("other")
+            hasher._slots.release()
+            self.assertTrue(hasher.verify("secret", hashed))
+        finally:
+            hasher.shutdown()
+
+
+class TestLoginRehash(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.user = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+
+    def tearDown(self):
+        password_hasher.init_app(self.app)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _login(self, password="secret"):
+        return self.client.post('/api/v1/auth/login',
+                                json={"email": "ana@example.com", "password": password})
+
+    def test_rehash_when_cost_changes(self):
+        self.assertEqual(hash_cost(self.user.password), 4)
+        password_hasher.configure(5, 0, 32, 5)
+        self.assertEqual(self._login("wrong").status_code, 401)
+        self.assertEqual(hash_cost(self.user.password), 4)
+        self.assertEqual(self._login().status_code, 200)
+        self.assertEqual(hash_cost(facade.get_user(self.user.id).password), 5)
+        self.assertEqual(self._login().status_code, 200)
+
+    def test_busy_hasher_answers_503(self):
+        password_hasher.configure(4, 1, 0, 5)
+        response = self._login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+    def test_updated_password_is_hashed(self):
+        facade.update_user(self.user.id, {"password": "new secret"})
+        user = facade.get_user(self.user.id)
+        self.assertNotEqual(user.password, "new secret")
+        self.assertTrue(user.verify_password("new secret"))
+
+
+if __name__ == "__main__":
+    unittest.main()
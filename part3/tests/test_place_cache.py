@@ -0,0 +1,98 @@
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.place import Place
+from app.services import facade
+
+
+class TestPlaceCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        }).id
+        self.guest = facade.create_user({
+            "first_name": "Luis", "last_name": "Vega",
+            "email": "luis@example.com", "password": "secret"
+        }).id
+        self.amenity = facade.create_amenity({"name": "Wi-Fi"}).id
+        self.place = facade.create_place({
+            "title": "Seaside View", "price": 150, "latitude": 18.3,
+            "longitude": -66.5, "owner_id": self.owner, "amenities": [self.amenity]
+        }).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _detail(self):
+        response = self.client.get(f'/api/v1/places/{self.place}')
+        self.assertEqual(response.status_code, 200)
+        return response.json
+
+    def test_second_read_is_a_hit(self):
+        self._detail()
+        self._detail()
+        stats = facade.get_place_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_invalidated_by_place_review_owner_and_amenity_writes(self):
+        self._detail()
+        facade.update_place(self.place, {"title": "Seaside Villa"})
+        self.assertEqual(self._detail()["title"], "Seaside Villa")
+
+        review = facade.create_review({"text": "Lovely", "rating": 5,
+                                       "user_id": self.guest, "place_id": self.place}).id
+        self.assertEqual(len(self._detail()["reviews"]), 1)
+        facade.update_review(review, {"text": "Lovely, again"})
+        self.assertEqual(self._detail()["reviews"][0]["text"], "Lovely, again")
+        facade.delete_review(review)
+        self.assertEqual(self._detail()["reviews"], [])
+
+        facade.update_user(self.owner, {"first_name": "Anabel"})
+        self.assertEqual(self._detail()["owner"]["first_name"], "Anabel")
+
+        facade.update_amenity(self.amenity, {"name": "Fast Wi-Fi"})
+        self.assertEqual(self._detail()["amenities"][0]["name"], "Fast Wi-Fi")
+
+        facade.delete_place(self.place)
+        self.assertEqual(self.client.get(f'/api/v1/places/{self.place}').status_code, 404)
+
+    def test_writes_from_other_processes_are_not_served_stale(self):
+        first = self.client.get(f'/api/v1/places/{self.place}')
+        # Another worker updates the row; this process's cache is not told
+        db.session.execute(update(Place).where(Place.id == self.place).values(
+            title="Seaside Villa", updated_at=datetime.utcnow() + timedelta(seconds=1)))
+        db.session.commit()
+        response = self.client.get(f'/api/v1/places/{self.place}',
+                                   headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["title"], "Seaside Villa")
+        self.assertEqual(self._detail()["title"], "Seaside Villa")
+
+    def test_stats_endpoint_requires_admin(self):
+        with self.app.test_request_context():
+            admin = create_access_token(identity={"id": self.owner, "is_admin": True})
+            guest = create_access_token(identity={"id": self.guest, "is_admin": False})
+        self._detail()
+        response = self.client.get('/api/v1/places/cache-stats',
+                                   headers={"Authorization": f"Bearer {guest}"})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get('/api/v1/places/cache-stats',
+                                   headers={"Authorization": f"Bearer {admin}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
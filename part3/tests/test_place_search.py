@@ -0,0 +1,188 @@
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app import create_app
+from app.extensions import db
+from app.models.place import Place
+from app.services.geo_index import PlaceGeoIndex
+from app.services import facade
+
+
+class TestPlaceSearch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+        self.places = {}
+        for title, lat, lon in [
+            ("San Juan Loft", 18.4655, -66.1057),
+            ("Ponce Villa", 18.0111, -66.6141),
+            ("Madrid Flat", 40.4168, -3.7038),
+            ("Fiji Hut", -17.7134, 178.0650),
+            ("Samoa Fale", -13.7590, -172.1046),
+        ]:
+            place = facade.create_place({
+                "title": title, "description": f"{title} description", "price": 100,
+                "latitude": lat, "longitude": lon, "owner_id": owner.id, "amenities": []
+            })
+            self.places[title] = place.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _titles(self, response):
+        self.assertEqual(response.status_code, 200)
+        return sorted(place["title"] for place in response.json["items"])
+
+    def test_bbox_returns_places_inside(self):
+        response = self.client.get('/api/v1/places/search', query_string={"bbox": "17.9,-67.3,18.6,-65.2"})
+        self.assertEqual(self._titles(response), ["Ponce Villa", "San Juan Loft"])
+
+    def test_bbox_cell_neighbours_are_excluded(self):
+        # Same grid cell as San Juan, but the point itself is outside the box
+        response = self.client.get('/api/v1/places/search', query_string={"bbox": "18.40,-66.11,18.46,-66.10"})
+        self.assertEqual(self._titles(response), [])
+
+    def test_bbox_across_antimeridian(self):
+        response = self.client.get('/api/v1/places/search', query_string={"bbox": "-20,170,-10,-170"})
+        self.assertEqual(self._titles(response), ["Fiji Hut", "Samoa Fale"])
+
+    def test_bbox_whole_world(self):
+        response = self.client.get('/api/v1/places/search', query_string={"bbox": "-90,-180,90,180"})
+        self.assertEqual(len(self._titles(response)), 5)
+
+    def test_bbox_follows_updates(self):
+        facade.update_place(self.places["Madrid Flat"], {"latitude": 18.2, "longitude": -66.3})
+        response = self.client.get('/api/v1/places/search', query_string={"bbox": "17.9,-67.3,18.6,-65.2"})
+        self.assertEqual(self._titles(response), ["Madrid Flat", "Ponce Villa", "San Juan Loft"])
+
+    def test_invalid_bbox(self):
+        for bbox in ("1,2,3", "a,b,c,d", "50,0,10,10", "0,-200,10,10"):
+            response = self.client.get('/api/v1/places/search', query_string={"bbox": bbox})
+            self.assertEqual(response.status_code, 400, bbox)
+
+
+    def test_nearby_ranks_by_distance(self):
+        response = self.client.get('/api/v1/places/nearby', query_string={"lat": 18.2, "lon": -66.5, "k": 3})
+        self.assertEqual(response.status_code, 200)
+        titles = [hit["place"]["title"] for hit in response.json]
+        self.assertEqual(titles, ["Ponce Villa", "San Juan Loft", "Madrid Flat"])
+        distances = [hit["distance_km"] for hit in response.json]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[1], 51.0, delta=0.5)
+
+    def test_nearby_max_km(self):
+        response = self.client.get('/api/v1/places/nearby', query_string={"lat": 18.2, "lon": -66.5, "max_km": 40})
+        self.assertEqual([hit["place"]["title"] for hit in response.json], ["Ponce Villa"])
+
+    def test_nearby_follows_writes(self):
+        self.client.get('/api/v1/places/nearby', query_string={"lat": 0, "lon": 0})
+        facade.update_place(self.places["Madrid Flat"], {"latitude": 18.21, "longitude": -66.5})
+        facade.delete_place(self.places["Ponce Villa"])
+        response = self.client.get('/api/v1/places/nearby', query_string={"lat": 18.2, "lon": -66.5, "k": 2})
+        self.assertEqual([hit["place"]["title"] for hit in response.json], ["Madrid Flat", "San Juan Loft"])
+
+    def test_nearby_follows_writes_from_other_processes(self):
+        self.client.get('/api/v1/places/nearby', query_string={"lat": 0, "lon": 0})
+        # Another worker moves a place; this process's index is not told
+        db.session.execute(update(Place).where(Place.id == self.places["Madrid Flat"]).values(
+            latitude=18.21, longitude=-66.5, updated_at=datetime.utcnow() + timedelta(seconds=1)))
+        db.session.commit()
+        response = self.client.get('/api/v1/places/nearby',
+                                   query_string={"lat": 18.2, "lon": -66.5, "k": 1})
+        self.assertEqual([hit["place"]["title"] for hit in response.json], ["Madrid Flat"])
+
+    def test_nearby_does_not_reload_for_own_writes(self):
+        nearby = {"lat": 18.2, "lon": -66.5, "k": 1}
+        self.client.get('/api/v1/places/nearby', query_string=nearby)
+        index = facade.place_geo_index
+        with mock.patch.object(index, 'load', wraps=index.load) as load:
+            user_id = facade.get_place(self.places["Fiji Hut"]).owner_id
+            facade.update_place(self.places["Madrid Flat"], {"latitude": 18.21, "longitude": -66.5})
+            review = facade.create_review({"text": "Nice", "rating": 4, "user_id": user_id,
+                                           "place_id": self.places["Madrid Flat"]})
+            facade.update_review(review.id, {"rating": 5})
+            facade.delete_review(review.id)
+            facade.create_places([{"title": "Cayey Cabin", "price": 80, "latitude": 18.11,
+                                   "longitude": -66.16, "owner_id": user_id}])
+            response = self.client.get('/api/v1/places/nearby', query_string=nearby)
+            self.assertEqual([hit["place"]["title"] for hit in response.json], ["Madrid Flat"])
+            self.assertEqual(load.call_count, 0)
+
+            # A write the facade did not make still reloads it
+            db.session.execute(update(Place).where(Place.id == self.places["Fiji Hut"])
+                               .values(latitude=18.2, longitude=-66.5))
+            db.session.commit()
+            response = self.client.get('/api/v1/places/nearby', query_string=nearby)
+            self.assertEqual([hit["place"]["title"] for hit in response.json], ["Fiji Hut"])
+            self.assertEqual(load.call_count, 1)
+
+    def test_index_load_replaces_its_contents(self):
+        index = PlaceGeoIndex()
+        index.load([("a", 0.0, 0.0)])
+        index.load([("b", 1.0, 1.0)])
+        self.assertEqual([place_id for place_id, _ in index.nearest(0, 0, 5)], ["b"])
+
+    def test_nearby_invalid_point(self):
+        response = self.client.get('/api/v1/places/nearby', query_string={"lat": 95, "lon": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_text_search_ranks_and_highlights(self):
+        facade.create_place({
+            "title": "Beach Loft", "description": "Steps from the beach", "price": 90,
+            "latitude": 18.45, "longitude": -66.07,
+            "owner_id": facade.get_user_by_email("ana@example.com").id, "amenities": []
+        })
+        facade.update_place(self.places["Ponce Villa"], {"description": "Quiet street near a beach"})
+        response = self.client.get('/api/v1/places/search', query_string={"q": "beach"})
+        self.assertEqual(response.status_code, 200)
+        items = response.json["items"]
+        self.assertEqual([item["title"] for item in items], ["Beach Loft", "Ponce Villa"])
+        self.assertGreater(items[0]["score"], items[1]["score"])
+        self.assertIn("<mark>beach</mark>", items[1]["snippet"])
+
+    def test_text_search_prefix_and_bbox(self):
+        response = self.client.get('/api/v1/places/search', query_string={"q": "vill"})
+        self.assertEqual([item["title"] for item in response.json["items"]], ["Ponce Villa"])
+        response = self.client.get('/api/v1/places/search',
+                                   query_string={"q": "description", "bbox": "17.9,-67.3,18.6,-65.2"})
+        self.assertEqual(sorted(item["title"] for item in response.json["items"]),
+                         ["Ponce Villa", "San Juan Loft"])
+
+    def test_text_search_pages(self):
+        seen, cursor = [], None
+        while True:
+            params = {"q": "description", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get('/api/v1/places/search', query_string=params)
+            seen.extend(item["id"] for item in response.json["items"])
+            cursor = response.json["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(self.places.values()))
+
+    def test_text_search_follows_deletes(self):
+        facade.delete_place(self.places["Fiji Hut"])
+        response = self.client.get('/api/v1/places/search', query_string={"q": "fiji"})
+        self.assertEqual(response.json["items"], [])
+
+    def test_search_requires_q_or_bbox(self):
+        self.assertEqual(self.client.get('/api/v1/places/search').status_code, 400)
+        response = self.client.get('/api/v1/places/search', query_string={"q": "!!!"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
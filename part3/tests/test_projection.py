@@ -0,0 +1,112 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from app.services import facade
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        amenity = facade.create_amenity({"name": "Wi-Fi"}).id
+        self.place_ids = []
+        for i in range(3):
+            owner = facade.create_user({
+                "first_name": "Owner", "last_name": str(i),
+                "email": f"owner{i}@example.com", "password": "secret"
+            })
+            place = facade.create_place({
+                "title": f"Place {i}", "price": 100 + i, "latitude": 18.0,
+                "longitude": -66.0, "owner_id": owner.id, "amenities": [amenity]
+            })
+            self.place_ids.append(place.id)
+            facade.create_review({"text": "Nice", "rating": 4,
+                                  "user_id": owner.id, "place_id": place.id})
+        db.session.expunge_all()
+        self.client.get('/api/v1/places/')  # warm the in-process amenity index
+
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self._count)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self._count)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_card_projection_skips_relationships(self):
+        response = self.client.get('/api/v1/places/?fields=title,price')
+        self.assertEqual(response.status_code, 200)
+        items = response.json["items"]
+        self.assertEqual(len(items), 3)
+        self.assertEqual(set(items[0]), {"id", "title", "price"})
+        self.assertIn("next_cursor", response.json)
+        # ETag version, then the places alone
+        self.assertEqual(len(self.statements), 2)
+        self.assertNotIn("description", self.statements[-1])
+        self.assertNotIn("reviews", self.statements[-1])
+
+    def test_expand_loads_only_requested_relationships(self):
+        response = self.client.get('/api/v1/places/?expand=owner')
+        item = response.json["items"][0]
+        self.assertIn("owner", item)
+        self.assertIn("average_rating", item)
+        self.assertNotIn("amenities", item)
+        self.assertNotIn("reviews", item)
+        self.assertEqual(len(self.statements), 2)
+
+        self.statements.clear()
+        response = self.client.get('/api/v1/places/?fields=title,average_rating,amenities')
+        item = response.json["items"][0]
+        self.assertEqual(set(item), {"id", "title", "average_rating", "amenities"})
+        self.assertEqual(item["average_rating"], 4.0)
+        self.assertEqual(item["amenities"][0]["name"], "Wi-Fi")
+        self.assertEqual(len(self.statements), 3)
+
+    def test_place_detail_projection(self):
+        url = f'/api/v1/places/{self.place_ids[0]}?fields=title&expand='
+        self.assertEqual(self.client.get(url).json, {"id": self.place_ids[0], "title": "Place 0"})
+        response = self.client.get('/api/v1/places/missing?fields=title')
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_resources_and_nearby(self):
+        response = self.client.get('/api/v1/users/?fields=first_name')
+        self.assertEqual(set(response.json["items"][0]), {"id", "first_name"})
+        response = self.client.get('/api/v1/reviews/?fields=rating')
+        self.assertEqual(response.json["items"][0]["rating"], 4)
+        response = self.client.get('/api/v1/places/nearby?lat=18&lon=-66&k=1&fields=title')
+        self.assertEqual(set(response.json[0]), {"distance_km", "place"})
+        self.assertEqual(set(response.json[0]["place"]), {"id", "title"})
+
+    def test_search_projects_inherited_fields(self):
+        response = self.client.get('/api/v1/places/search?bbox=17,-67,19,-65&fields=title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json["items"][0]), {"id", "title"})
+        response = self.client.get('/api/v1/places/search?q=place&fields=title,score')
+        self.assertEqual(set(response.json["items"][0]), {"id", "title", "score"})
+
+        response = self.client.get('/api/v1/places/search?q=place&expand=owner')
+        self.assertEqual(response.status_code, 200)
+        item = response.json["items"][0]
+        self.assertTrue({"title", "price", "average_rating", "score", "snippet", "owner"}
+                        <= set(item))
+        self.assertNotIn("amenities", item)
+        self.assertIn("next_cursor", response.json)
+
+    def test_invalid_projection(self):
+        response = self.client.get('/api/v1/places/?fields=secret')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/users/?expand=places')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.query_budget import QueryBudget, QueryBudgetExceeded, query_budget
+from app.services import facade
+
+
+class TestQueryBudget(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        for n in range(5):
+            facade.create_user({"first_name": "Ana", "last_name": "Ramos",
+                                "email": f"ana{n}@example.com", "password": "secret"})
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_counts_statements_and_enforces_the_limit(self):
+        with QueryBudget(2) as budget:
+            facade.get_user_by_email("ana0@example.com")
+        self.assertEqual(budget.count, 1)
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, "3 statements, budget is 2"):
+            with QueryBudget(2):
+                for n in range(3):
+                    facade.get_user_by_email(f"ana{n}@example.com")
+
+    def test_flags_lazy_loads_in_a_loop(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, r"N\+1: ran 5 times: SELECT"):
+            with QueryBudget():
+                for user in db.session.scalars(db.select(User)).all():
+                    user.places
+        # max_repeats=None turns the check off
+        with QueryBudget(max_repeats=None) as budget:
+            for user in db.session.scalars(db.select(User)).all():
+                user.reviews
+        self.assertEqual(budget.count, 6)
+
+    def test_nested_budgets_and_decorator(self):
+        @query_budget(1)
+        def lookup(*emails):
+            return [facade.get_user_by_email(email) for email in emails]
+
+        with QueryBudget() as outer:
+            lookup("ana0@example.com")
+            with self.assertRaisesRegex(QueryBudgetExceeded, r"^TestQueryBudget\..*lookup: 2"):
+                lookup("ana1@example.com", "ana2@example.com")
+        # Every open budget counts a statement
+        self.assertEqual(outer.count, 3)
+
+    def test_log_and_off_actions(self):
+        self.app.config['QUERY_BUDGET_ACTION'] = 'log'
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            with QueryBudget(0, name='users'):
+                facade.get_user_by_email("ana0@example.com")
+        self.assertIn("users: 1 statements, budget is 0", logs.output[0])
+
+        self.app.config['QUERY_BUDGET_ACTION'] = 'off'
+        with QueryBudget(0):
+            facade.get_user_by_email("ana0@example.com")
+
+    def test_overrun_is_raised_before_the_commit(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with QueryBudget(0):
+                facade.create_user({"first_name": "Eva", "last_name": "Cruz",
+                                    "email": "eva@example.com", "password": "secret"})
+        db.session.rollback()
+        self.assertIsNone(facade.get_user_by_email("eva@example.com"))
+
+
+class TestWriteBudgets(unittest.TestCase):
+    """The costliest legitimate path of each write endpoint fits its
+    budget; the test configuration raises on overruns."""
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.owner = facade.create_user({"first_name": "Ana", "last_name": "Ramos",
+                                         "email": "ana@example.com", "password": "secret"}).id
+        self.amenities = [facade.create_amenity({"name": f"Amenity {n}"}).id for n in range(5)]
+        self.places = [facade.create_place({
+            "title": f"Place {n}", "price": 50, "latitude": 18.4, "longitude": -66.1,
+            "owner_id": self.owner, "amenities": self.amenities[:2]}).id for n in range(2)]
+        self.review = facade.create_review({"text": "Stay", "rating": 4, "user_id": self.owner,
+                                            "place_id": self.places[0]}).id
+        with self.app.test_request_context():
+            self.user = {"Authorization": "Bearer " + create_access_token(
+                identity={"id": self.owner, "is_admin": False})}
+            self.admin = {"Authorization": "Bearer " + create_access_token(
+                identity={"id": "admin", "is_admin": True})}
+        # Loaded indexes are kept current by the writes below
+        self.client.get('/api/v1/places/nearby', query_string={"lat": 18, "lon": -66})
+        self.client.get('/api/v1/places/', query_string={"amenity": self.amenities[0]})
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_place_update_relinking_amenities_and_moving(self):
+        response = self.client.put(f'/api/v1/places/{self.places[1]}', headers=self.user, json={
+            "title": "Moved", "latitude": 18.1, "longitude": -66.3,
+            "amenities": self.amenities[1:]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_place_delete_with_amenities(self):
+        response = self.client.delete(f'/api/v1/places/{self.places[1]}', headers=self.user)
+        self.assertEqual(response.status_code, 204)
+
+    def test_review_moved_to_another_place(self):
+        response = self.client.put(f'/api/v1/reviews/{self.review}', headers=self.user,
+                                   json={"text": "Moved", "rating": 2, "place_id": self.places[1]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(facade.get_place(self.places[1]).rating_histogram, [0, 1, 0, 0, 0])
+
+    def test_user_update_by_admin(self):
+        response = self.client.put(f'/api/v1/users/{self.owner}', headers=self.admin, json={
+            "first_name": "Ana", "email": "ana.ramos@example.com", "password": "changed"})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,85 @@
+import unittest
+from app import create_app
+from app.extensions import db
+from app.persistence.projection import Projection
+from app.query_budget import QueryBudget
+from app.services import facade
+from app.api.v1.places import place_output_model, PLACE_RELATIONS
+from app.api.v1.projection import projection_mask
+from app.api.v1.serializer import compile_model
+
+
+class TestRecordPages(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        owners = [facade.create_user({"first_name": "Ana", "last_name": str(n),
+                                      "email": f"ana{n}@example.com", "password": "secret"}).id
+                  for n in range(2)]
+        amenities = [facade.create_amenity({"name": name}).id for name in ("Wi-Fi", "Pool")]
+        self.places = [facade.create_place({
+            "title": f"Place {n}", "price": 50 + n, "latitude": 18.4, "longitude": -66.1,
+            "owner_id": owners[n % 2], "amenities": amenities[:n % 3]}).id for n in range(5)]
+        facade.create_review({"text": "Nice", "rating": 4, "user_id": owners[1],
+                              "place_id": self.places[0]})
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def assertSamePages(self, profile, sort='created_at'):
+        mask = None
+        if isinstance(profile, Projection):
+            mask = projection_mask(profile, place_output_model, PLACE_RELATIONS)
+        serialize = compile_model(place_output_model, mask)
+        cursor = record_cursor = None
+        for _ in range(3):
+            page = facade.place_repo.find_page(2, cursor, profile=profile, sort=sort)
+            records = facade.place_repo.find_record_page(2, record_cursor, profile=profile,
+                                                         sort=sort)
+            self.assertEqual([serialize(record) for record in records.items],
+                             [serialize(place) for place in page.items])
+            cursor, record_cursor = page.next_cursor, records.next_cursor
+            self.assertEqual(record_cursor, cursor)
+
+    def test_serialize_like_the_models(self):
+        self.assertSamePages('place_card')
+        self.assertSamePages('place_card', sort='rating')
+        self.assertSamePages(Projection(['title', 'average_rating'], ['owner', 'reviews']))
+        self.assertSamePages(Projection(None, ['amenities']), sort='-price')
+
+    def test_records_are_not_session_objects(self):
+        page = facade.get_places_page(10)
+        self.assertEqual(len(db.session.identity_map), 0)
+        record = page.items[0]
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual((record.id, record.average_rating), (self.places[0], 4.0))
+        self.assertEqual(record.owner.first_name, "Ana")
+        self.assertEqual(sorted(amenity.name for amenity in page.items[2].amenities),
+                         ["Pool", "Wi-Fi"])
+
+    def test_statements_per_page(self):
+        with QueryBudget() as budget:
+            facade.place_repo.find_record_page(10)
+        # Places with their owner joined in, then amenities and reviews
+        self.assertEqual(budget.count, 3)
+        with QueryBudget() as budget:
+            facade.place_repo.find_record_page(10, profile=Projection(['title'], ['owner']))
+        self.assertEqual(budget.count, 1)
+
+    def test_embedded_relations_are_read_through_indexes(self):
+        for name, relation in facade.place_repo.record_relations.items():
+            if relation.joined:
+                continue
+            sql = str(relation.statement(self.places).compile(
+                db.engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql))]
+            self.assertFalse([step for step in plan if step.startswith("SCAN")], (name, plan))
+
+    def test_unknown_relationship(self):
+        with self.assertRaises(ValueError):
+            facade.user_repo.get_record_page(10, profile=Projection(None, ['places']))
@@ -0,0 +1,94 @@
+import unittest
+from app import create_app
+from app.extensions import db
+from app.models.place import Place
+from app.services import facade
+
+
+class TestReviewAggregates(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.users = [facade.create_user({
+            "first_name": "Guest", "last_name": str(i),
+            "email": f"guest{i}@example.com", "password": "secret"
+        }).id for i in range(3)]
+        self.place = facade.create_place({
+            "title": "Seaside View", "price": 150, "latitude": 18.3,
+            "longitude": -66.5, "owner_id": self.users[0], "amenities": []
+        }).id
+        self.other = facade.create_place({
+            "title": "Hill Hut", "price": 80, "latitude": 18.1,
+            "longitude": -66.2, "owner_id": self.users[0], "amenities": []
+        }).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _review(self, user, rating, place=None):
+        return facade.create_review({"text": "Stay", "rating": rating,
+                                     "user_id": user, "place_id": place or self.place}).id
+
+    def _aggregates(self, place_id):
+        response = self.client.get(f'/api/v1/places/{place_id}')
+        self.assertEqual(response.status_code, 200)
+        body = response.json
+        return body["review_count"], body["average_rating"], body["rating_histogram"]
+
+    def test_create_update_delete_keep_aggregates(self):
+        self.assertEqual(self._aggregates(self.place), (0, None, [0, 0, 0, 0, 0]))
+        first = self._review(self.users[1], 5)
+        second = self._review(self.users[2], 2)
+        self.assertEqual(self._aggregates(self.place), (2, 3.5, [0, 1, 0, 0, 1]))
+
+        facade.update_review(second, {"rating": 4})
+        self.assertEqual(self._aggregates(self.place), (2, 4.5, [0, 0, 0, 1, 1]))
+
+        facade.update_review(first, {"place_id": self.other})
+        self.assertEqual(self._aggregates(self.place), (1, 4.0, [0, 0, 0, 1, 0]))
+        self.assertEqual(self._aggregates(self.other), (1, 5.0, [0, 0, 0, 0, 1]))
+
+        facade.delete_review(second)
+        self.assertEqual(self._aggregates(self.place), (0, None, [0, 0, 0, 0, 0]))
+
+    def test_invalid_rating_update_is_rejected(self):
+        review = self._review(self.users[1], 3)
+        with self.assertRaises(ValueError):
+            facade.update_review(review, {"rating": 9})
+        self.assertEqual(self._aggregates(self.place), (1, 3.0, [0, 0, 1, 0, 0]))
+
+    def test_non_integer_rating_is_rejected(self):
+        for rating in (4.5, "5"):
+            response = self.client.post('/api/v1/reviews/', json={
+                "text": "Stay", "rating": rating, "user_id": self.users[1],
+                "place_id": self.place})
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._aggregates(self.place), (0, None, [0, 0, 0, 0, 0]))
+
+    def test_recompute_command(self):
+        self._review(self.users[1], 5)
+        self._review(self.users[2], 1, place=self.other)
+        db.session.execute(db.update(Place).values(review_count=0, rating_sum=0, rating_5=0))
+        db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["recompute-review-aggregates"])
+        self.assertIn("2 places", result.output)
+        db.session.expire_all()
+        self.assertEqual(self._aggregates(self.place), (1, 5.0, [0, 0, 0, 0, 1]))
+        self.assertEqual(self._aggregates(self.other), (1, 1.0, [1, 0, 0, 0, 0]))
+
+    def test_min_rating_filter(self):
+        self._review(self.users[1], 5)
+        self._review(self.users[2], 2, place=self.other)
+        response = self.client.get('/api/v1/places/', query_string={"min_rating": 4})
+        self.assertEqual([p["id"] for p in response.json["items"]], [self.place])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from sqlalchemy import func, select
+from app import create_app
+from app.extensions import db
+from app.models.place import Place, place_amenity
+from app.models.review import Review
+from app.services import facade
+
+
+class TestSeedCommand(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.runner = self.app.test_cli_runner()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def seed(self, *extra):
+        return self.runner.invoke(args=["seed", "--scale", "tiny", "--users", "20",
+                                        "--places", "50", "--reviews", "300", *extra])
+
+    def test_seeds_consistent_rows(self):
+        result = self.seed()
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("300 reviews", result.output)
+
+        admin = facade.get_user_by_email("admin@hbnb.io")
+        self.assertTrue(admin.is_admin)
+        self.assertTrue(admin.verify_password("hbnb-seed"))
+        self.assertEqual(db.session.scalar(select(func.sum(Place.review_count))), 300)
+        self.assertGreater(db.session.scalar(select(func.count()).select_from(place_amenity)), 0)
+
+        # Stored aggregates match the reviews table
+        before = db.session.execute(select(Place.id, Place.rating_sum, Place.rating_5)
+                                    .order_by(Place.id)).all()
+        facade.recompute_review_aggregates()
+        after = db.session.execute(select(Place.id, Place.rating_sum, Place.rating_5)
+                                   .order_by(Place.id)).all()
+        self.assertEqual(before, after)
+
+        # The full-text index is filled by the insert triggers
+        page = facade.search_places(5, text_query="in")
+        self.assertTrue(page.items)
+
+    def test_same_seed_same_rows_and_refuses_to_overwrite(self):
+        self.assertEqual(self.seed().exit_code, 0)
+        first = db.session.scalars(select(Review.id).order_by(Review.id)).all()
+
+        result = self.seed()
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("--reset", result.output)
+
+        self.assertEqual(self.seed("--reset").exit_code, 0)
+        self.assertEqual(db.session.scalars(select(Review.id).order_by(Review.id)).all(), first)
+
+        self.assertEqual(self.seed("--reset", "--seed", "7").exit_code, 0)
+        self.assertNotEqual(db.session.scalars(select(Review.id).order_by(Review.id)).all(),
+                            first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import unittest
+from flask_restx import fields, marshal, Model
+from app import create_app
+from app.extensions import db
+from app.services import facade
+from app.api.v1 import serializer
+from app.api.v1.serializer import compile_model
+from app.api.v1.places import place_output_model, place_page_model, nearby_model
+from app.api.v1.export import place_export_model
+
+
+class TestCompiledSerializer(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        owner = facade.create_user({
+            "first_name": "Ana", "last_name": "Ramos",
+            "email": "ana@example.com", "password": "secret"
+        })
+        amenity = facade.create_amenity({"name": "Wi-Fi"})
+        self.place = facade.create_place({
+            "title": "Seaside View", "price": 150, "latitude": 18.3,
+            "longitude": -66.5, "owner_id": owner.id, "amenities": [amenity.id]
+        })
+        facade.create_review({"text": "Lovely", "rating": 5,
+                              "user_id": owner.id, "place_id": self.place.id})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def assertSameAsMarshal(self, data, model, mask=None):
+        self.assertEqual(compile_model(model, mask)(data), marshal(data, model, mask=mask))
+
+    def test_matches_marshal(self):
+        self.assertSameAsMarshal(self.place, place_output_model)
+        self.assertSameAsMarshal(self.place, place_export_model)
+        self.assertSameAsMarshal(self.place, place_output_model, "id,title,owner{first_name}")
+        page = facade.get_places_page(10)
+        self.assertSameAsMarshal(page, place_page_model)
+        self.assertSameAsMarshal({"place": self.place, "distance_km": 1.5}, nearby_model)
+
+    def test_missing_values_and_defaults(self):
+        model = Model("Sample", {
+            "name": fields.String(default="unnamed"),
+            "count": fields.Integer,
+            "tags": fields.List(fields.String),
+            "child": fields.Nested(Model("Child", {"id": fields.String})),
+            "maybe": fields.Nested(Model("Maybe", {"id": fields.String}), allow_null=True),
+        })
+        self.assertSameAsMarshal({}, model)
+        self.assertSameAsMarshal({"name": "x", "count": "3", "tags": [1, 2],
+                                  "child": {"id": 7}, "maybe": {"id": 8}}, model)
+
+    def test_masks_share_compiled_functions(self):
+        self.assertIs(compile_model(place_output_model, "title,id,owner{last_name,first_name}"),
+                      compile_model(place_output_model, "id,title,title,owner{first_name,last_name}"))
+        self.assertSameAsMarshal(self.place, place_output_model, "title,id,id")
+
+    def test_compiled_cache_is_bounded(self):
+        for n in range(serializer.COMPILED_CACHE_SIZE + 10):
+            compile_model(Model(f"Scratch{n}", {"id": fields.String}), "id")
+        self.assertEqual(serializer._compiled.stats()["size"], serializer.COMPILED_CACHE_SIZE)
+
+    def test_responses_are_json(self):
+        response = self.client.get(f'/api/v1/places/{self.place.id}')
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(json.loads(response.data), marshal(self.place, place_output_model))
+
+    def test_mask_header(self):
+        header = {"X-Fields": "id,title,owner{first_name}"}
+        response = self.client.get(f'/api/v1/places/{self.place.id}', headers=header)
+        self.assertEqual(response.json, {"id": self.place.id, "title": "Seaside View",
+                                         "owner": {"first_name": "Ana"}})
+        self.assertIn("X-Fields", response.headers["Vary"])
+        response = self.client.get('/api/v1/users/', headers={"X-Fields": "items{email}"})
+        self.assertEqual(response.json, {"items": [{"email": "ana@example.com"}]})
+        # ?fields takes precedence over the header
+        response = self.client.get('/api/v1/users/?fields=first_name', headers={"X-Fields": "items"})
+        self.assertEqual(set(response.json["items"][0]), {"id", "first_name"})
+        # The full document is still served (and cached) without the header
+        response = self.client.get(f'/api/v1/places/{self.place.id}')
+        self.assertEqual(response.json, marshal(self.place, place_output_model))
+
+        response = self.client.get('/api/v1/users/', headers={"X-Fields": "items{email"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_mask_header_is_documented(self):
+        spec = self.client.get('/swagger.json').json
+        parameters = spec["paths"]["/api/v1/places/{place_id}"]["get"]["parameters"]
+        self.assertIn("X-Fields", [parameter["name"] for parameter in parameters])
+        parameters = spec["paths"]["/api/v1/users/"]["get"]["parameters"]
+        self.assertIn("X-Fields", [parameter["name"] for parameter in parameters])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from sqlalchemy import event
+from app import create_app
+from app.extensions import db
+from app.persistence.repository import in_unit_of_work, on_commit, unit_of_work
+from app.services import facade
+
+
+class TestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.commits = 0
+        event.listen(db.engine, "commit", self._count)
+
+    def tearDown(self):
+        event.remove(db.engine, "commit", self._count)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _count(self, conn):
+        self.commits += 1
+
+    def user(self, n):
+        return {"first_name": "Ana", "last_name": "Ramos",
+                "email": f"ana{n}@example.com", "password": "secret"}
+
+    def test_writes_commit_once(self):
+        with facade.unit_of_work():
+            owner = facade.create_user(self.user(0))
+            amenity = facade.create_amenity({"name": "Wi-Fi"})
+            place = facade.create_place({"title": "Loft", "price": 80, "latitude": 1,
+                                         "longitude": 2, "owner_id": owner.id,
+                                         "amenities": [amenity.id]})
+            facade.create_review({"text": "Great", "rating": 5, "user_id": owner.id,
+                                  "place_id": place.id})
+            self.assertEqual(self.commits, 0)
+        self.assertEqual(self.commits, 1)
+        self.assertEqual(facade.get_place(place.id).review_count, 1)
+
+        # Outside a unit every write still commits by itself
+        facade.create_user(self.user(1))
+        facade.create_user(self.user(2))
+        self.assertEqual(self.commits, 3)
+
+    def test_rolls_back_everything_on_error(self):
+        owner = facade.create_user(self.user(0)).id
+        with self.assertRaises(ValueError):
+            with facade.unit_of_work():
+                facade.create_user(self.user(1))
+                facade.update_user(owner, {"first_name": "Eva"})
+                facade.create_place({"title": "Loft", "price": 80, "latitude": 1,
+                                     "longitude": 2, "owner_id": "missing"})
+        self.assertFalse(in_unit_of_work())
+        self.assertIsNone(facade.get_user_by_email("ana1@example.com"))
+        self.assertEqual(facade.get_user(owner).first_name, "Ana")
+
+    def test_nested_units_join_the_outer_one(self):
+        calls = []
+        with unit_of_work():
+            facade.create_user(self.user(0))
+            with unit_of_work():
+                facade.create_user(self.user(1))
+                on_commit(lambda: calls.append('committed'))
+            self.assertEqual((self.commits, calls), (0, []))
+        self.assertEqual((self.commits, calls), (1, ['committed']))
+
+        with self.assertRaises(RuntimeError):
+            with unit_of_work():
+                on_commit(lambda: calls.append('rolled back'))
+                raise RuntimeError
+        self.assertEqual(calls, ['committed'])
+
+    def test_place_cache_is_invalidated_after_the_commit(self):
+        owner = facade.create_user(self.user(0))
+        place_id = facade.create_place({"title": "Loft", "price": 80, "latitude": 1,
+                                        "longitude": 2, "owner_id": owner.id}).id
+        serialize = lambda place: {"title": place.title}
+        facade.get_place_document(place_id, serialize)
+        with facade.unit_of_work():
+            facade.update_place(place_id, {"title": "Attic"})
+            # A concurrent reader caching the place before the commit
+            facade.place_cache.set(place_id, {"title": "Loft"})
+        self.assertEqual(facade.get_place_document(place_id, serialize), {"title": "Attic"})
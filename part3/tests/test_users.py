@@ -34,7 +34,8 @@ class TestUserEndpoints(unittest.TestCase):
     def test_get_all_users(self):
         response = self.client.get("/api/v1/users/")
         self.assertEqual(response.status_code, 200)
-        self.assertIsInstance(response.get_json(), list)
+        self.assertIsInstance(response.get_json()["items"], list)
+        self.assertIn("next_cursor", response.get_json())
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,9 @@
+import os
+
+from app import create_app
+
+# WSGI entry point, e.g. `gunicorn -c gunicorn.conf.py wsgi:app`
+app = create_app(os.getenv('HBNB_CONFIG', 'config.ProductionConfig'))
+
+if not app.config.get('SECRET_KEY'):
+    raise RuntimeError("Set SECRET_KEY before starting the production server")
@@ -49,22 +49,43 @@ function checkAuthentication() {
     return token; // Return token for use in other functions
 }
 
-async function fetchPlaces(token = null) {
+// Places shown per page; "Load more" fetches the next one
+const PLACES_PAGE_SIZE = 20;
+// Bumped by every new listing (e.g. a price filter change) so the responses
+// of an older one, still in flight, are ignored
+let placesRequestId = 0;
+
+async function fetchPlaces(token = null, maxPrice = 'all', cursor = null) {
+    const requestId = cursor ? placesRequestId : ++placesRequestId;
+    if (!cursor) setupLoadMore(token, maxPrice, null); // The old listing's next page is moot
     try {
         const headers = {};
         if (token) {
             headers['Authorization'] = `Bearer ${token}`;
         }
 
-        const response = await fetch(`${config.apiBaseUrl}/places/`, {
+        // Price filtering happens server-side so only matching places are sent
+        // The cards only show the title and price, so skip owners, amenities and reviews
+        const params = new URLSearchParams({ fields: 'id,title,price', limit: PLACES_PAGE_SIZE });
+        if (maxPrice !== 'all') {
+            params.set('max_price', maxPrice);
+        }
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        const response = await fetch(`${config.apiBaseUrl}/places/?${params}`, {
             method: 'GET',
             headers: headers,
-            redirect: 'follow' 
+            redirect: 'follow'
         });
+        if (requestId !== placesRequestId) return; // A newer listing replaced this one
 
         if (response.ok) {
-            const places = await response.json();
-            displayPlaces(places);
+            const page = await response.json();
+            if (requestId !== placesRequestId) return;
+            displayPlaces(page.items, Boolean(cursor));
+            setupLoadMore(token, maxPrice, page.next_cursor);
+            setupPriceFilter(token, maxPrice);
         } else if (response.status === 401) {
             // If unauthorized, clear token and show login link
             document.cookie = 'token=; path=/; expires=Thu, 01 Jan 1970 00:00:00 UTC;';
@@ -72,23 +93,24 @@ async function fetchPlaces(token = null) {
         } else {
             console.error('Failed to fetch places:', response.statusText);
             alert('Failed to load places. Please try again.');
+            if (cursor) setupLoadMore(token, maxPrice, cursor); // Let the user retry
         }
     } catch (error) {
         console.error('Error fetching places:', error);
         alert('An error occurred while fetching places.');
+        if (cursor && requestId === placesRequestId) setupLoadMore(token, maxPrice, cursor);
     }
 }
 
-function displayPlaces(places) {
+function displayPlaces(places, append = false) {
     const placesContainer = document.querySelector('.place-card-container');
     if (!placesContainer) return; // Ensure element exists
 
-    placesContainer.innerHTML = ''; // Clear existing content
+    if (!append) placesContainer.innerHTML = ''; // Clear existing content
 
     places.forEach(place => {
         const placeCard = document.createElement('div');
         placeCard.className = 'place-card';
-        placeCard.setAttribute('data-price', place.price); // For filtering
 
         placeCard.innerHTML = `
             <h2>${place.title}</h2>
@@ -97,12 +119,25 @@ function displayPlaces(places) {
         `;
         placesContainer.appendChild(placeCard);
     });
-    setupPriceFilter(places);
 }
 
-function setupPriceFilter(places) {
+function setupLoadMore(token, maxPrice, nextCursor) {
+    const loadMore = document.getElementById('load-more');
+    if (!loadMore) return; // Ensure element exists
+
+    // Shown only while there is a next page; each click fetches it once
+    loadMore.style.display = nextCursor ? 'block' : 'none';
+    loadMore.disabled = false;
+    loadMore.onclick = () => {
+        loadMore.disabled = true;
+        fetchPlaces(token, maxPrice, nextCursor);
+    };
+}
+
+function setupPriceFilter(token, selectedPrice) {
     const priceFilter = document.getElementById('price-filter');
-    if (!priceFilter) return; // Ensure element exists
+    if (!priceFilter || priceFilter.dataset.ready) return; // Ensure element exists, wire once
+    priceFilter.dataset.ready = 'true';
 
     const prices = [10, 50, 100];
 
@@ -118,19 +153,10 @@ function setupPriceFilter(places) {
     allOption.value = 'all';
     allOption.textContent = 'All';
     priceFilter.appendChild(allOption);
+    priceFilter.value = String(selectedPrice);
 
     priceFilter.addEventListener('change', (event) => {
-        const selectedPrice = event.target.value;
-        const placeCards = document.querySelectorAll('.place-card');
-
-        placeCards.forEach(card => {
-            const placePrice = parseFloat(card.getAttribute('data-price'));
-            if (selectedPrice === 'all' || placePrice <= parseFloat(selectedPrice)) {
-                card.style.display = 'block';
-            } else {
-                card.style.display = 'none';
-            }
-        });
+        fetchPlaces(token, event.target.value);
     });
 }
 